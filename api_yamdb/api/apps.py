@@ -1,9 +1,53 @@
 """Настройки конфигурации приложения API."""
 
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed,
+                                      post_delete,
+                                      post_migrate,
+                                      post_save)
 
 
 class ApiConfig(AppConfig):
     """Класс, конфигурирующий приложение API."""
 
     name = 'api'
+
+    def ready(self):
+        """Подключение настройки соединений, замеров и инвалидации кэша."""
+        from api.cache import (MODEL_NAMESPACES,
+                               invalidate_all,
+                               invalidate_model,
+                               invalidate_user)
+        from api.sqlite_pragmas import apply_sqlite_pragmas
+        from api.slow_queries import install_slow_query_log
+        from api.timing import install_query_timer
+
+        connection_created.connect(
+            apply_sqlite_pragmas, dispatch_uid='apply_sqlite_pragmas'
+        )
+        if (settings.SERVER_TIMING['ENABLED']
+                or settings.METRICS['ENABLED']
+                or settings.QUERY_BUDGET['ENABLED']):
+            connection_created.connect(
+                install_query_timer, dispatch_uid='install_query_timer'
+            )
+        if settings.SLOW_QUERY_LOG['ENABLED']:
+            connection_created.connect(
+                install_slow_query_log, dispatch_uid='install_slow_query_log'
+            )
+        for label in MODEL_NAMESPACES:
+            model = apps.get_model(label)
+            on_save = (invalidate_user if model is get_user_model()
+                       else invalidate_model)
+            post_save.connect(on_save, sender=model,
+                              dispatch_uid=f'invalidate_cache_{label}')
+            post_delete.connect(invalidate_model, sender=model,
+                                dispatch_uid=f'invalidate_cache_{label}')
+        m2m_changed.connect(
+            invalidate_model, sender=apps.get_model('reviews.GenreTitle'),
+            dispatch_uid='invalidate_cache_genre_title_m2m'
+        )
+        post_migrate.connect(invalidate_all, dispatch_uid='invalidate_cache')
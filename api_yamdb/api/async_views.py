@@ -0,0 +1,75 @@
+"""Асинхронные представления чтения для ASGI.
+
+В Django 3.2 нет асинхронного ORM, поэтому GET/HEAD-запросы
+обрабатываются теми же viewset DRF, но в пуле потоков
+(sync_to_async с thread_sensitive=False): цикл событий не блокируется
+на время запросов к БД и рендеринга ответа, и медленные клиенты
+не занимают рабочие потоки. Остальные методы выполняются обычным
+синхронным представлением.
+"""
+
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+from api.profiling import profile_call
+from api.timing import current_timings
+from api.views import (CategoryViewSet,
+                       GenreViewSet,
+                       ReviewViewSet,
+                       TitleViewSet)
+
+ASYNC_VIEWSETS = (TitleViewSet, GenreViewSet, CategoryViewSet, ReviewViewSet)
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def _render(view, request, args, kwargs):
+    """Вызов представления и рендеринг ответа в потоке пула."""
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            timings = current_timings()
+            if timings is not None:
+                timings.view_finished()
+            response.render()
+            if timings is not None:
+                timings.render_finished()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Асинхронная обертка представления viewset DRF.
+
+    view - результат ViewSet.as_view(actions); атрибуты cls, actions
+    и csrf_exempt переносятся на обертку для middleware.
+    """
+    read = sync_to_async(partial(profile_call, _render),
+                         thread_sensitive=False)
+    write = sync_to_async(view)
+
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read(view, request, args, kwargs)
+        return await write(request, *args, **kwargs)
+
+    async_view.cls = view.cls
+    async_view.actions = view.actions
+    async_view.initkwargs = view.initkwargs
+    async_view.csrf_exempt = True
+    return async_view
+
+
+def async_patterns(patterns):
+    """URL-шаблоны, в которых представления ASYNC_VIEWSETS асинхронные."""
+    result = []
+    for pattern in patterns:
+        if getattr(pattern.callback, 'cls', None) in ASYNC_VIEWSETS:
+            pattern = URLPattern(pattern.pattern,
+                                 async_read_view(pattern.callback),
+                                 pattern.default_args, pattern.name)
+        result.append(pattern)
+    return result
@@ -0,0 +1,123 @@
+"""Кэш ответов API для viewset'ов.
+
+Ответы list и retrieve кэшируются в двухуровневом кэше
+(api.tiered_cache) по пространствам имен - типам ресурсов;
+изменение моделей инвалидирует зависящие от них пространства.
+"""
+
+from django.conf import settings
+from django.db import transaction
+
+from api.db_router import routing_state
+from api.tiered_cache import TieredCache
+
+# Пространства имен: типы ресурсов API.
+TITLES = 'titles'
+GENRES = 'genres'
+CATEGORIES = 'categories'
+REVIEWS = 'reviews'
+COMMENTS = 'comments'
+NAMESPACES = (TITLES, GENRES, CATEGORIES, REVIEWS, COMMENTS)
+
+api_cache = TieredCache()
+
+
+def cached_response(namespace, request, handler, *args, **kwargs):
+    """Ответ handler с данными из кэша по полному адресу запроса.
+
+    Данные ответов API не зависят от пользователя, поэтому ключ -
+    адрес запроса со схемой и хостом: ссылки пагинации next/previous
+    в ответе абсолютные и не должны доставаться клиентам, пришедшим
+    по другому хосту или схеме. Если настроена реплика,
+    в кэше лежат данные из нее; запросы, которые должны читать
+    из основной базы (после записи), кэш не используют.
+    """
+    from rest_framework.response import Response
+
+    state = routing_state()
+    if not api_cache.enabled or (settings.REPLICA_DATABASE
+                                 and state is not None
+                                 and not state.use_replica):
+        return handler(request, *args, **kwargs)
+    return Response(api_cache.get_or_set(
+        namespace, request.build_absolute_uri(),
+        lambda: handler(request, *args, **kwargs).data
+    ))
+
+
+class CachedListMixin:
+    """Кэширование ответов list в пространстве имен cache_namespace."""
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        """Список объектов из кэша."""
+        return cached_response(self.cache_namespace, request, super().list,
+                               *args, **kwargs)
+
+
+class CachedRetrieveMixin:
+    """Кэширование ответов retrieve в пространстве имен cache_namespace."""
+
+    cache_namespace = None
+
+    def retrieve(self, request, *args, **kwargs):
+        """Объект из кэша."""
+        return cached_response(self.cache_namespace, request,
+                               super().retrieve, *args, **kwargs)
+
+
+def invalidate(*namespaces):
+    """Инвалидация пространств имен (по умолчанию - всех)."""
+    api_cache.invalidate(*(namespaces or NAMESPACES))
+
+
+# Пространства имен, данные которых зависят от моделей: например,
+# отзыв меняет рейтинг произведения, а username автора есть в отзывах.
+MODEL_NAMESPACES = {
+    'reviews.Category': (CATEGORIES, TITLES),
+    'reviews.Genre': (GENRES, TITLES),
+    'reviews.Title': (TITLES, REVIEWS, COMMENTS),
+    'reviews.GenreTitle': (TITLES,),
+    'reviews.Review': (REVIEWS, COMMENTS, TITLES),
+    'reviews.Comment': (COMMENTS,),
+    'users.CustomUser': (REVIEWS, COMMENTS),
+}
+# Поля пользователя, которые попадают в кэшированные ответы.
+USER_CACHED_FIELDS = ('username', 'role')
+
+
+def invalidate_model(sender, **kwargs):
+    """Инвалидация пространств имен, зависящих от измененной модели.
+
+    Выполняется после фиксации транзакции, чтобы запрос, прочитавший
+    версию до фиксации, не сохранил старые данные под новой версией.
+    """
+    namespaces = MODEL_NAMESPACES[sender._meta.label]
+    transaction.on_commit(lambda: invalidate(*namespaces))
+
+
+def invalidate_user(sender, instance, created, update_fields=None,
+                    **kwargs):
+    """Инвалидация ответов с данными пользователя, если они изменились.
+
+    Новый пользователь еще не встречается в ответах; у остальных
+    значения USER_CACHED_FIELDS сравниваются с загруженными из БД
+    (CustomUser.from_db), без дополнительных запросов.
+    """
+    if created or (update_fields is not None
+                   and not set(update_fields) & set(USER_CACHED_FIELDS)):
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    current = {name: getattr(instance, name) for name in USER_CACHED_FIELDS}
+    if all(name in loaded and loaded[name] == value
+           for name, value in current.items()):
+        return
+    if hasattr(instance, '_loaded_values'):
+        instance._loaded_values.update(current)
+    invalidate_model(sender, **kwargs)
+
+
+def invalidate_all(sender, **kwargs):
+    """Инвалидация всего кэша API (после миграций и очистки БД)."""
+    invalidate()
@@ -0,0 +1,194 @@
+"""Сжатие ответов и предварительно сжатые статические файлы.
+
+Ответы сжимаются в brotli, если установлен пакет brotli и клиент его
+принимает, иначе в gzip. Настройки - в settings.COMPRESSION.
+Статические файлы сжимаются один раз при collectstatic
+(PrecompressedStaticFilesStorage): рядом с файлом в STATIC_ROOT
+появляются file.gz и file.br. Представление serve_static отдает
+подходящий клиенту вариант, а для адреса с версией содержимого
+(versioned_static_url) разрешает кэшировать ответ на STATIC_MAX_AGE.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import zlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import StaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.templatetags.static import static
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.http import require_safe
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость
+    brotli = None
+
+BROTLI = 'br'
+GZIP = 'gzip'
+SUFFIXES = {BROTLI: '.br', GZIP: '.gz'}
+# Кодировка из Accept-Encoding, если она не запрещена весом q=0.
+ACCEPT_ENCODING_RE = re.compile(
+    r'\b(br|gzip)\b(?!\s*;\s*q=0(?:\.0*)?\s*(?:,|$))'
+)
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def accepted_encodings(request):
+    """Поддерживаемые сервером кодировки из Accept-Encoding по приоритету."""
+    accepted = set(ACCEPT_ENCODING_RE.findall(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    ))
+    encodings = [BROTLI] if brotli is not None else []
+    encodings.append(GZIP)
+    return [encoding for encoding in encodings if encoding in accepted]
+
+
+def compress(content, encoding, best=False):
+    """Сжатие байтов целиком; best - максимальная степень сжатия."""
+    if encoding == BROTLI:
+        quality = 11 if best else settings.COMPRESSION['BROTLI_QUALITY']
+        return brotli.compress(content, quality=quality)
+    level = 9 if best else settings.COMPRESSION['GZIP_LEVEL']
+    return gzip.compress(content, level, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """Потоковое сжатие: сжатые данные отдаются по мере поступления."""
+    if encoding == BROTLI:
+        compressor = brotli.Compressor(
+            quality=settings.COMPRESSION['BROTLI_QUALITY']
+        )
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(settings.COMPRESSION['GZIP_LEVEL'],
+                                  zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def precompress_file(full_path):
+    """Сжатые копии файла рядом с ним; возвращает пути созданных копий.
+
+    Сжатие выполняется один раз, поэтому с максимальной степенью.
+    """
+    with open(full_path, 'rb') as source:
+        content = source.read()
+    encodings = [GZIP] + ([BROTLI] if brotli is not None else [])
+    created = []
+    for encoding in encodings:
+        compressed = compress(content, encoding, best=True)
+        if len(compressed) >= len(content):
+            continue
+        compressed_path = full_path + SUFFIXES[encoding]
+        with open(compressed_path, 'wb') as target:
+            target.write(compressed)
+        created.append(compressed_path)
+    return created
+
+
+class PrecompressedStaticFilesStorage(StaticFilesStorage):
+    """Хранилище статики, сжимающее крупные файлы при collectstatic."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        """Сжатие файлов с подходящими расширениями и размером."""
+        config = settings.COMPRESSION
+        for path in paths:
+            full_path = self.path(path)
+            processed = (
+                not dry_run
+                and path.endswith(tuple(config['STATIC_EXTENSIONS']))
+                and os.path.getsize(full_path) >= config['MIN_SIZE']
+            )
+            if processed:
+                processed = bool(precompress_file(full_path))
+            yield path, path, processed
+
+
+def find_static(path):
+    """Полный путь к статическому файлу: из STATIC_ROOT или из finders."""
+    if settings.STATIC_ROOT:
+        try:
+            full_path = safe_join(settings.STATIC_ROOT, path)
+        except SuspiciousFileOperation:
+            return None
+        if os.path.isfile(full_path):
+            return full_path
+    return finders.find(path)
+
+
+@lru_cache(maxsize=256)
+def static_version(full_path, mtime):
+    """Версия файла: начало хэша содержимого."""
+    digest = hashlib.blake2b(digest_size=8)
+    with open(full_path, 'rb') as source:
+        for chunk in iter(lambda: source.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_version(full_path):
+    """Версия файла с учетом его изменения."""
+    return static_version(full_path, os.stat(full_path).st_mtime_ns)
+
+
+def versioned_static_url(path):
+    """Адрес статического файла с версией содержимого в параметре v."""
+    full_path = find_static(path)
+    if full_path is None:
+        return static(path)
+    return f'{static(path)}?v={file_version(full_path)}'
+
+
+@require_safe
+def serve_static(request, path):
+    """Статический файл в сжатом варианте, если клиент его принимает.
+
+    Запрос с актуальной версией файла в параметре v можно кэшировать
+    на STATIC_MAX_AGE; остальные ответы клиент проверяет по ETag.
+    """
+    full_path = find_static(path)
+    if full_path is None or os.path.isdir(full_path):
+        raise Http404('Файл не найден.')
+    version = file_version(full_path)
+    etag = f'"{version}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        content_type = (mimetypes.guess_type(full_path)[0]
+                        or 'application/octet-stream')
+        variant, encoding = full_path, None
+        for accepted in accepted_encodings(request):
+            if os.path.isfile(full_path + SUFFIXES[accepted]):
+                variant, encoding = full_path + SUFFIXES[accepted], accepted
+                break
+        response = FileResponse(open(variant, 'rb'),
+                                content_type=content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if request.GET.get('v') == version:
+        response['Cache-Control'] = (
+            f'public, max-age={settings.COMPRESSION["STATIC_MAX_AGE"]}, '
+            'immutable'
+        )
+    else:
+        response['Cache-Control'] = 'no-cache'
+    return response
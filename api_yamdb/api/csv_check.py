@@ -0,0 +1,263 @@
+"""Проверка CSV-файлов перед импортом.
+
+Из каждого файла читаются только ключевые колонки: первичный ключ,
+внешние ключи, уникальные и целочисленные поля. Целые числа хранятся
+в компактных массивах array('q'), а проверки выполняются по всей
+колонке сразу с помощью множеств: внешние ключи - разностью
+множеств, диапазоны значений - валидацией различающихся значений.
+Полный отчет об ошибках формируется до записи чего-либо в БД.
+"""
+
+from array import array
+
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from api.csv_import import CsvStream, map_columns, open_csv
+from api.utils import chunks
+
+# Значения-заглушки в целочисленных колонках: пусто и не число.
+MISSING = -2 ** 63
+INVALID = MISSING + 1
+INTEGER_TYPES = ('AutoField', 'BigAutoField', 'SmallAutoField',
+                 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+                 'PositiveIntegerField', 'PositiveSmallIntegerField',
+                 'PositiveBigIntegerField')
+
+
+def is_integer(field):
+    """Поле (или поле, на которое ссылается внешний ключ) целочисленное."""
+    if field.is_relation:
+        field = field.target_field
+    return field.get_internal_type() in INTEGER_TYPES
+
+
+def unique_groups(model):
+    """Наборы полей модели, значения которых должны быть уникальны."""
+    groups = [(field,) for field in model._meta.concrete_fields
+              if field.unique]
+    for constraint in model._meta.constraints:
+        if (isinstance(constraint, models.UniqueConstraint)
+                and constraint.condition is None):
+            groups.append(tuple(model._meta.get_field(name)
+                                for name in constraint.fields))
+    return groups
+
+
+class TableKeys:
+    """Ключевые колонки CSV-файла одной таблицы."""
+
+    def __init__(self, model, csv_file_path, renames=None):
+        """Подготовка колонок к чтению."""
+        self.model = model
+        self.csv_file_path = csv_file_path
+        self.renames = renames
+        self.lines = array('q')
+        self.values = {}
+
+    def is_key(self, field):
+        """Колонку нужно читать для проверок."""
+        in_unique = any(field in group for group in unique_groups(self.model))
+        return field.is_relation or in_unique or is_integer(field)
+
+    def load(self, report):
+        """Чтение ключевых колонок; ошибки разбора - в отчет."""
+        with open_csv(self.csv_file_path) as csv_file:
+            stream = CsvStream(csv_file)
+            columns = [
+                (position, field) for position, field
+                in map_columns(self.model, stream.header, self.renames)
+                if self.is_key(field)
+            ]
+            for _, field in columns:
+                self.values[field] = (array('q') if is_integer(field)
+                                      else [])
+            line = stream.reader.line_num
+            for row in stream:
+                self.lines.append(line + 1)
+                line = stream.reader.line_num
+                if len(row) != len(stream.header):
+                    report.add(self, len(self.lines) - 1,
+                               'неверное количество колонок')
+                    row = [''] * len(stream.header)
+                for position, field in columns:
+                    self._append(field, row[position], report)
+
+    def _append(self, field, raw, report):
+        """Добавление значения колонки с разбором целых чисел."""
+        values = self.values[field]
+        if not is_integer(field):
+            values.append(raw)
+            return
+        if raw == '':
+            values.append(MISSING)
+            return
+        try:
+            values.append(int(raw))
+        except ValueError:
+            values.append(INVALID)
+            report.add(self, len(self.lines) - 1,
+                       f'{field.name}: "{raw}" - не целое число')
+
+    def column(self, fields):
+        """Значения одного поля или кортежи значений набора полей."""
+        if len(fields) == 1:
+            return self.values[fields[0]]
+        return list(zip(*(self.values[field] for field in fields)))
+
+
+class CheckReport:
+    """Отчет об ошибках проверки CSV-файлов."""
+
+    def __init__(self):
+        """Пустой отчет."""
+        self.errors = []
+        self.files = {}
+
+    def register(self, keys):
+        """Файл таблицы: ошибки выводятся в порядке регистрации файлов."""
+        self.files.setdefault(str(keys.csv_file_path), len(self.files))
+
+    def add(self, keys, index, message):
+        """Ошибка в строке index (с нуля) файла таблицы keys."""
+        self.errors.append(
+            (str(keys.csv_file_path), keys.lines[index], message)
+        )
+
+    def __bool__(self):
+        """В отчете есть ошибки."""
+        return bool(self.errors)
+
+    def lines(self):
+        """Строки отчета в порядке файлов и номеров строк."""
+        return [
+            f'{csv_file}:{line}: {message}'
+            for csv_file, line, message in sorted(
+                self.errors, key=lambda error: (self.files[error[0]],
+                                                error[1])
+            )
+        ]
+
+
+def _is_empty(value):
+    """Пустое или неразобранное значение (в том числе в наборе полей)."""
+    if isinstance(value, tuple):
+        return any(_is_empty(item) for item in value)
+    return value in (MISSING, INVALID, '')
+
+
+def db_values(model, group, values):
+    """Пары (значение, pk) из БД для значений набора полей из values.
+
+    Для набора из нескольких полей значения - кортежи: строки БД
+    отбираются по первому полю и сравниваются по всему набору.
+    """
+    values = set(values)
+    composite = len(group) > 1
+    lookup = {value[0] for value in values} if composite else values
+    found = {}
+    for chunk in chunks(lookup):
+        rows = model.objects.filter(**{
+            f'{group[0].attname}__in': chunk
+        }).values_list(*(field.attname for field in group), 'pk')
+        for *value, pk in rows:
+            value = tuple(value) if composite else value[0]
+            if value in values:
+                found[value] = pk
+    return found
+
+
+def check_unique(keys, report, incremental):
+    """Повторы уникальных значений в файле и совпадения с БД.
+
+    При инкрементальном импорте совпадение с БД - ошибка, только если
+    значение принадлежит строке с другим первичным ключом.
+    """
+    pk_values = keys.values.get(keys.model._meta.pk)
+    has_rows = keys.model.objects.exists()
+    for group in unique_groups(keys.model):
+        if any(field not in keys.values for field in group):
+            continue
+        name = '+'.join(field.name for field in group)
+        first_index = {}
+        for index, value in enumerate(keys.column(group)):
+            if _is_empty(value):
+                continue
+            if value in first_index:
+                report.add(keys, index, f'{name}: повтор значения {value} '
+                           f'(строка {keys.lines[first_index[value]]})')
+            else:
+                first_index[value] = index
+        if not has_rows:
+            continue
+        in_db = db_values(keys.model, group, first_index)
+        for value, db_pk in in_db.items():
+            index = first_index[value]
+            if (incremental and pk_values is not None
+                    and pk_values[index] == db_pk):
+                continue
+            report.add(keys, index,
+                       f'{name}: значение {value} уже есть в БД')
+
+
+def check_foreign_keys(keys, tables, report):
+    """Ссылки на строки, которых нет ни в файлах, ни в БД."""
+    for field, values in keys.values.items():
+        if not field.is_relation:
+            continue
+        parent = field.related_model
+        parent_keys = set()
+        if parent in tables and parent._meta.pk in tables[parent].values:
+            parent_keys.update(tables[parent].values[parent._meta.pk])
+        missing = set(values) - parent_keys - {MISSING, INVALID}
+        if missing and parent.objects.exists():
+            missing -= set(db_values(parent, (parent._meta.pk,), missing))
+        for index, value in enumerate(values):
+            if value in missing:
+                report.add(keys, index, f'{field.name}: нет объекта '
+                           f'{parent.__name__} с ключом {value}')
+            elif value == MISSING and not field.null:
+                report.add(keys, index, f'{field.name}: пустое значение')
+
+
+def check_values(keys, report):
+    """Валидаторы целочисленных полей (оценка, год и т.п.).
+
+    Каждое различающееся значение проверяется валидаторами поля
+    один раз, затем отмечаются все строки с ошибочными значениями.
+    """
+    for field, values in keys.values.items():
+        if field.is_relation or field.primary_key or not is_integer(field):
+            continue
+        invalid = {}
+        for value in set(values) - {MISSING, INVALID}:
+            try:
+                field.run_validators(value)
+            except ValidationError as error:
+                invalid[value] = '; '.join(error.messages)
+        for index, value in enumerate(values):
+            if value in invalid:
+                report.add(keys, index,
+                           f'{field.name}: {value} - {invalid[value]}')
+            elif value == MISSING and not field.null:
+                report.add(keys, index, f'{field.name}: пустое значение')
+
+
+def check_csv_files(tables, incremental=False):
+    """Проверка всех CSV-файлов до импорта.
+
+    tables - список (model, csv_file_path, renames).
+    Возвращает CheckReport со всеми найденными ошибками.
+    """
+    report = CheckReport()
+    loaded = {}
+    for model, csv_file_path, renames in tables:
+        keys = TableKeys(model, csv_file_path, renames)
+        report.register(keys)
+        keys.load(report)
+        loaded[model] = keys
+    for keys in loaded.values():
+        check_unique(keys, report, incremental)
+        check_foreign_keys(keys, loaded, report)
+        check_values(keys, report)
+    return report
@@ -0,0 +1,484 @@
+"""Потоковый импорт CSV-файлов в БД.
+
+Строки CSV не превращаются ни в словари, ни в объекты моделей:
+каждая строка сразу преобразуется в кортеж значений для INSERT,
+а в памяти держится только текущая пачка. Прогресс импорта можно
+сохранять в файл контрольной точки и продолжать прерванный импорт
+с последней зафиксированной пачки. Независимые таблицы можно
+загружать параллельно в отдельных процессах в порядке зависимостей
+по внешним ключам.
+"""
+
+import csv
+import glob
+import gzip
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+
+import django
+from django.apps import apps
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from api.utils import chunks
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BATCH_SIZE = 1000
+PROGRESS_INTERVAL = 1.0
+
+
+def peak_rss_mb():
+    """Пиковый объем памяти процесса в МБ (None, если неизвестен)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss в Linux - в килобайтах, в macOS - в байтах.
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def open_csv(csv_file_path, binary=False):
+    """Открытие CSV-файла на чтение, в том числе сжатого gzip (*.gz).
+
+    binary - чтение байтов без декодирования.
+    """
+    if str(csv_file_path).endswith('.gz'):
+        if binary:
+            return gzip.open(csv_file_path, 'rb')
+        return gzip.open(csv_file_path, 'rt', encoding='utf-8', newline='')
+    if binary:
+        return open(csv_file_path, 'rb')
+    return open(csv_file_path, 'r', encoding='utf-8')
+
+
+def find_csv(data_dir, csv_file):
+    """Путь к CSV-файлу в каталоге: обычному или сжатому gzip."""
+    csv_file_path = os.path.join(data_dir, csv_file)
+    if (not os.path.exists(csv_file_path)
+            and os.path.exists(f'{csv_file_path}.gz')):
+        return f'{csv_file_path}.gz'
+    return csv_file_path
+
+
+class CsvStream:
+    """Построчное чтение CSV-файла с сохранением позиции в файле.
+
+    Строки читаются через readline, поэтому после каждой записи
+    позиция файла точно указывает на начало следующей записи
+    (в том числе для значений с переводами строк внутри кавычек).
+    """
+
+    def __init__(self, csv_file, offset=None):
+        """Чтение заголовка и переход к сохраненной позиции."""
+        self.csv_file = csv_file
+        self.reader = csv.reader(iter(csv_file.readline, ''))
+        self.header = next(self.reader)
+        if offset is not None:
+            csv_file.seek(offset)
+
+    def __iter__(self):
+        """Итерация по строкам CSV-файла в виде списков."""
+        return self.reader
+
+    def tell(self):
+        """Позиция начала следующей записи."""
+        return self.csv_file.tell()
+
+
+def map_columns(model, header, renames=None):
+    """Список (номер колонки, поле модели) для заголовка CSV-файла.
+
+    Колонка может называться как поле (author) или как его колонка
+    в БД (author_id); renames задает дополнительные переименования.
+    """
+    renames = renames or {}
+    fields_by_name = {}
+    for field in model._meta.concrete_fields:
+        fields_by_name[field.name] = field
+        fields_by_name[field.attname] = field
+    columns = []
+    for position, column in enumerate(header):
+        field = fields_by_name.get(renames.get(column, column))
+        if field is None:
+            raise ValueError(
+                f'В модели {model.__name__} нет поля для колонки {column}.'
+            )
+        columns.append((position, field))
+    return columns
+
+
+class TableInsert:
+    """Преобразование строк CSV в кортежи и их вставка через executemany.
+
+    Значения полей из CSV приводятся так же, как при сохранении модели.
+    Поля, отсутствующие в CSV, получают значения по умолчанию, поля
+    auto_now/auto_now_add - время вставки (как при objects.create),
+    даже если они есть в CSV. Значения auto_now_add из CSV (например,
+    даты публикации из выгрузки export_db) сохраняются только при
+    keep_auto_now_add, значения обоих видов - при keep_auto_now.
+    """
+
+    def __init__(self, model, header, renames=None, keep_auto_now=False,
+                 keep_auto_now_add=False):
+        """Сопоставление колонок CSV полям модели и подготовка INSERT."""
+        self.model = model
+        self.csv_fields = [
+            (position, field)
+            for position, field in map_columns(model, header, renames)
+            if keep_auto_now or not (
+                getattr(field, 'auto_now', False)
+                or (getattr(field, 'auto_now_add', False)
+                    and not keep_auto_now_add)
+            )
+        ]
+        in_csv = {field for _, field in self.csv_fields}
+        key_indexes = [index for index, (_, field)
+                       in enumerate(self.csv_fields) if field.primary_key]
+        self.key_index = key_indexes[0] if key_indexes else None
+        self.default_fields = [
+            field for field in model._meta.concrete_fields
+            if field not in in_csv
+            and not (field.primary_key and self._is_auto_field(field))
+        ]
+        quote_name = connection.ops.quote_name
+        fields = [field for _, field in self.csv_fields] + self.default_fields
+        self.columns = [field.column for field in fields]
+        self.sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote_name(model._meta.db_table),
+            ', '.join(quote_name(column) for column in self.columns),
+            ', '.join(['%s'] * len(fields))
+        )
+
+    @staticmethod
+    def _is_auto_now(field):
+        """Поле заполняется временем сохранения."""
+        return (getattr(field, 'auto_now', False)
+                or getattr(field, 'auto_now_add', False))
+
+    @staticmethod
+    def _is_auto_field(field):
+        """Первичный ключ, генерируемый БД."""
+        return field.get_internal_type() in ('AutoField', 'BigAutoField',
+                                             'SmallAutoField')
+
+    @staticmethod
+    def convert(field, raw):
+        """Приведение строки из CSV к значению для БД."""
+        if raw == '' and not field.empty_strings_allowed:
+            value = None
+        else:
+            value = field.to_python(raw)
+        return field.get_db_prep_save(value, connection)
+
+    def prepare(self, row):
+        """Кортеж значений колонок CSV для одной строки."""
+        return tuple(
+            self.convert(field, row[position])
+            for position, field in self.csv_fields
+        )
+
+    def defaults(self):
+        """Кортеж значений для полей, которых нет в CSV."""
+        now = timezone.now()
+        return tuple(
+            field.get_db_prep_save(
+                now if self._is_auto_now(field) else field.get_default(),
+                connection
+            )
+            for field in self.default_fields
+        )
+
+    def existing_keys(self, keys):
+        """Первичные ключи из keys, которые уже есть в таблице."""
+        existing = set()
+        for chunk in chunks(keys):
+            existing.update(self.model.objects.filter(
+                pk__in=chunk
+            ).values_list('pk', flat=True))
+        return existing
+
+    def without_existing(self, rows):
+        """Подготовленные строки, первичных ключей которых нет в таблице.
+
+        Без колонки первичного ключа в CSV строки возвращаются как есть.
+        """
+        if self.key_index is None:
+            return rows
+        existing = self.existing_keys(
+            [row[self.key_index] for row in rows]
+        )
+        return [row for row in rows if row[self.key_index] not in existing]
+
+    def insert(self, rows):
+        """Вставка пачки подготовленных строк одним executemany."""
+        defaults = self.defaults()
+        with connection.cursor() as cursor:
+            cursor.executemany(self.sql, [row + defaults for row in rows])
+
+
+class ImportCheckpoint:
+    """Файл контрольной точки импорта.
+
+    Для каждой таблицы хранится количество импортированных строк,
+    позиция в CSV-файле после последней зафиксированной пачки
+    и признак завершения. Без пути к файлу ничего не сохраняет.
+    При параллельном импорте каждая таблица пишет свой файл рядом
+    с основным (см. for_table); при загрузке они объединяются
+    с основным, а при записи основного файла - удаляются.
+    """
+
+    def __init__(self, path=None, is_part=False):
+        """Загрузка сохраненного состояния, если файлы уже есть."""
+        self.path = path
+        self.is_part = is_part
+        self.tables = {}
+        if not is_part:
+            for state_path in [self.path, *self._part_paths()]:
+                if state_path and os.path.exists(state_path):
+                    with open(state_path, 'r',
+                              encoding='utf-8') as checkpoint_file:
+                        self.tables.update(json.load(checkpoint_file))
+
+    def __bool__(self):
+        """Контрольная точка включена."""
+        return bool(self.path)
+
+    def _part_paths(self):
+        """Файлы контрольных точек отдельных таблиц."""
+        if not self.path or self.is_part:
+            return []
+        return glob.glob(f'{glob.escape(self.path)}.*.part')
+
+    def for_table(self, table):
+        """Контрольная точка таблицы в отдельном файле."""
+        part = ImportCheckpoint(
+            f'{self.path}.{table}.part' if self.path else None, is_part=True
+        )
+        if table in self.tables:
+            part.tables[table] = self.tables[table]
+        return part
+
+    def position(self, table):
+        """Позиция в файле и количество уже импортированных строк."""
+        state = self.tables.get(table, {})
+        return state.get('offset'), state.get('rows', 0)
+
+    def is_completed(self, table):
+        """Таблица уже полностью импортирована."""
+        return self.tables.get(table, {}).get('completed', False)
+
+    def save(self, table, offset, rows, completed=False):
+        """Сохранение прогресса таблицы (атомарная замена файла)."""
+        if not self.path:
+            return
+        self.tables[table] = {
+            'offset': offset, 'rows': rows, 'completed': completed
+        }
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump(self.tables, checkpoint_file)
+        os.replace(tmp_path, self.path)
+        for part_path in self._part_paths():
+            os.remove(part_path)
+
+    def clear(self):
+        """Удаление файлов после успешного импорта всех таблиц."""
+        for state_path in [self.path, *self._part_paths()]:
+            if state_path and os.path.exists(state_path):
+                os.remove(state_path)
+        self.tables = {}
+
+
+class ImportProgress:
+    """Периодический вывод скорости импорта и пикового объема памяти."""
+
+    def __init__(self, table, write, rows=0):
+        """Начало отсчета для таблицы."""
+        self.table = table
+        self.write = write
+        self.rows = rows
+        self.started_rows = rows
+        self.started = self.last_report = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        """Время импорта таблицы в секундах."""
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        """Скорость импорта в текущем запуске."""
+        elapsed = self.elapsed
+        return (self.rows - self.started_rows) / elapsed if elapsed else 0.0
+
+    def summary(self):
+        """Строка с количеством строк, скоростью и памятью."""
+        peak = peak_rss_mb()
+        memory = f', пик памяти {peak:.1f} МБ' if peak is not None else ''
+        return (f'{self.rows} строк, {self.rows_per_second:.0f} строк/с'
+                f'{memory}')
+
+    def update(self, rows):
+        """Учет импортированной пачки, вывод не чаще раза в интервал."""
+        self.rows += rows
+        now = time.perf_counter()
+        if self.write and now - self.last_report >= PROGRESS_INTERVAL:
+            self.last_report = now
+            self.write(f'{self.table}: {self.summary()}')
+
+
+def import_csv_table(model, csv_file_path, renames=None,
+                     batch_size=BATCH_SIZE, checkpoint=None, write=None,
+                     per_batch_commit=None, keep_auto_now_add=False):
+    """Потоковый импорт одного CSV-файла в таблицу модели.
+
+    Без контрольной точки вся таблица грузится в одной транзакции.
+    С контрольной точкой каждая пачка фиксируется отдельно и после
+    фиксации позиция сохраняется в файл, так что прерванный импорт
+    продолжается с последней зафиксированной пачки. Если процесс
+    остановился между фиксацией пачки и записью файла, эта пачка
+    прочитается повторно, поэтому из первой пачки после продолжения
+    пропускаются строки с первичными ключами, уже записанными в БД.
+    keep_auto_now_add сохраняет даты публикации из CSV (TableInsert).
+    Возвращает объект ImportProgress с итогами импорта таблицы.
+    """
+    checkpoint = checkpoint or ImportCheckpoint()
+    if per_batch_commit is None:
+        per_batch_commit = bool(checkpoint)
+    table = model._meta.label
+    offset, rows_done = checkpoint.position(table)
+    progress = ImportProgress(model.__name__, write, rows_done)
+    if checkpoint.is_completed(table):
+        return progress
+    table_atomic = (nullcontext() if per_batch_commit
+                    else transaction.atomic())
+    with open_csv(csv_file_path) as csv_file, table_atomic:
+        stream = CsvStream(csv_file, offset)
+        insert = TableInsert(model, stream.header, renames,
+                             keep_auto_now_add=keep_auto_now_add)
+        resumed = offset is not None
+        batch = []
+        for row in stream:
+            batch.append(insert.prepare(row))
+            if len(batch) >= batch_size:
+                _flush(insert, batch, stream, checkpoint, table, progress,
+                       per_batch_commit, resumed)
+                batch = []
+                resumed = False
+        if batch:
+            _flush(insert, batch, stream, checkpoint, table, progress,
+                   per_batch_commit, resumed)
+        checkpoint.save(table, stream.tell(), progress.rows, completed=True)
+    return progress
+
+
+def _flush(insert, batch, stream, checkpoint, table, progress,
+           per_batch_commit, resumed=False):
+    """Вставка пачки и сохранение контрольной точки после фиксации.
+
+    resumed - первая пачка после продолжения импорта: ее строки могли
+    быть зафиксированы до остановки, но не отмечены в файле.
+    """
+    rows = insert.without_existing(batch) if resumed else batch
+    with transaction.atomic() if per_batch_commit else nullcontext():
+        if rows:
+            insert.insert(rows)
+    progress.update(len(batch))
+    checkpoint.save(table, stream.tell(), progress.rows)
+
+
+def table_dependencies(models):
+    """Граф зависимостей таблиц по внешним ключам.
+
+    Для каждой модели - множество моделей из того же набора,
+    на которые она ссылается и которые нужно загрузить раньше.
+    """
+    models = set(models)
+    return {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+
+
+def _init_worker():
+    """Инициализация Django в процессе пула (нужна при запуске spawn)."""
+    django.setup()
+
+
+def _import_table_worker(model_label, csv_file_path, renames, batch_size,
+                         checkpoint, keep_auto_now_add):
+    """Импорт одной таблицы в процессе пула через свое соединение с БД.
+
+    SQLite допускает только одного писателя, поэтому для нее пачки
+    фиксируются по одной, чтобы процессы не ждали друг друга
+    до конца импорта целой таблицы.
+    """
+    model = apps.get_model(model_label)
+    try:
+        progress = import_csv_table(
+            model, csv_file_path, renames, batch_size=batch_size,
+            checkpoint=checkpoint,
+            per_batch_commit=(bool(checkpoint)
+                              or connection.vendor == 'sqlite'),
+            keep_auto_now_add=keep_auto_now_add
+        )
+    finally:
+        connections.close_all()
+    return progress.summary(), progress.elapsed
+
+
+def import_tables_parallel(tables, workers, batch_size=BATCH_SIZE,
+                           checkpoint=None, on_done=None,
+                           keep_auto_now_add=False):
+    """Параллельный импорт таблиц с учетом зависимостей.
+
+    tables - список (model, csv_file_path, renames). Таблицы без
+    незагруженных родителей запускаются сразу, зависимые - как только
+    завершатся все их родители. После каждой таблицы вызывается
+    on_done(model, summary, elapsed).
+    """
+    checkpoint = checkpoint or ImportCheckpoint()
+    sources = {model: (path, renames) for model, path, renames in tables}
+    dependencies = table_dependencies(sources)
+    pending = [model for model, _, _ in tables]
+    done = set()
+    running = {}
+    # Дочерние процессы не должны наследовать открытые соединения.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker) as executor:
+        while pending or running:
+            for model in [model for model in pending
+                          if dependencies[model] <= done]:
+                pending.remove(model)
+                csv_file_path, renames = sources[model]
+                label = model._meta.label
+                future = executor.submit(
+                    _import_table_worker, label, str(csv_file_path),
+                    renames, batch_size, checkpoint.for_table(label),
+                    keep_auto_now_add
+                )
+                running[future] = model
+            if not running:
+                raise ValueError(
+                    'Циклическая зависимость между таблицами: '
+                    + ', '.join(model.__name__ for model in pending)
+                )
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                model = running.pop(future)
+                summary, elapsed = future.result()
+                done.add(model)
+                if on_done:
+                    on_done(model, summary, elapsed)
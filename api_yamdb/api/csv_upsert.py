@@ -0,0 +1,341 @@
+"""Инкрементальный импорт CSV-файлов с определением изменений.
+
+Для каждой записи CSV считается хэш ее байтов в файле и сравнивается
+с хэшем, сохраненным при прошлом импорте (модель ImportedRow):
+неизмененные записи не декодируются и не разбираются. Новые строки
+вставляются, измененные - обновляются пачками, неизмененные
+пропускаются без записи в БД. Строки, пропавшие из выгрузки,
+можно удалить. Новые и измененные строки, уникальные значения
+которых (slug, username, email, один отзыв автора на произведение)
+уже принадлежат строке БД с другим первичным ключом, пропускаются
+и попадают в отчет; их хэши не сохраняются, и при следующем импорте
+они проверяются снова.
+"""
+
+import csv
+import hashlib
+
+from django.db import connection, transaction
+
+from api.csv_import import (BATCH_SIZE,
+                            ImportProgress,
+                            TableInsert,
+                            open_csv)
+from api.csv_check import db_values, unique_groups
+from api.utils import chunks
+from reviews.models import ImportedRow
+
+HASHES_FETCH_SIZE = 10000
+
+
+def raw_records(csv_file):
+    """Записи CSV-файла, открытого в двоичном режиме, в виде байтов.
+
+    Запись заканчивается на конце строки файла вне кавычек, поэтому
+    значения с переводами строк внутри кавычек остаются в одной записи.
+    """
+    record = None
+    for line in csv_file:
+        record = line if record is None else record + line
+        if not record.count(b'"') % 2:
+            yield record
+            record = None
+    if record is not None:
+        yield record
+
+
+def parse_record(record):
+    """Значения записи CSV."""
+    return next(csv.reader([record.decode('utf-8')]))
+
+
+def record_hash(record):
+    """Хэш байтов записи CSV без перевода строки."""
+    return hashlib.blake2b(
+        record.rstrip(b'\r\n'), digest_size=16
+    ).hexdigest()
+
+
+class TableUpsert(TableInsert):
+    """Вставка и обновление пачек строк по первичному ключу из CSV.
+
+    Перед записью пачка проверяется на конфликты уникальных значений
+    (conflicts), чтобы одна строка не прерывала импорт IntegrityError.
+    """
+
+    def __init__(self, model, header, renames=None,
+                 keep_auto_now_add=False):
+        """Подготовка INSERT, UPDATE и поиска ключа строки."""
+        super().__init__(model, header, renames,
+                         keep_auto_now_add=keep_auto_now_add)
+        if self.key_index is None:
+            raise ValueError(
+                f'В CSV-файле модели {model.__name__} нет колонки '
+                'первичного ключа.'
+            )
+        self.key_position = self.csv_fields[self.key_index][0]
+        self.update_indexes = [index for index, (_, field)
+                               in enumerate(self.csv_fields)
+                               if not field.primary_key]
+        quote_name = connection.ops.quote_name
+        self.update_sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+            quote_name(model._meta.db_table),
+            ', '.join(f'{quote_name(self.csv_fields[index][1].column)} = %s'
+                      for index in self.update_indexes),
+            quote_name(model._meta.pk.column)
+        )
+        indexes = {field: index
+                   for index, (_, field) in enumerate(self.csv_fields)}
+        self.unique_indexes = [
+            (group, [indexes[field] for field in group])
+            for group in unique_groups(model)
+            if group != (model._meta.pk,)
+            and all(field in indexes for field in group)
+        ]
+
+    def record_key(self, record):
+        """Первичный ключ записи CSV.
+
+        Если ключ - первая колонка без кавычек, запись не разбирается.
+        """
+        if self.key_position == 0 and not record.startswith(b'"'):
+            end = record.find(b',')
+            if end != -1:
+                return record[:end].decode('utf-8')
+        return parse_record(record)[self.key_position]
+
+    def conflicts(self, rows):
+        """Конфликты уникальных значений подготовленных строк.
+
+        Значение конфликтует, если оно уже есть в БД у строки с другим
+        первичным ключом или повторяется в пачке. Возвращает словарь
+        {номер строки в rows: описание конфликта}.
+        """
+        found = {}
+        for group, indexes in self.unique_indexes:
+            name = '+'.join(field.name for field in group)
+            first = {}
+            for number, row in enumerate(rows):
+                value = tuple(row[index] for index in indexes)
+                if None in value:
+                    continue
+                value = value if len(value) > 1 else value[0]
+                if value in first:
+                    found.setdefault(number, f'{name}: повтор значения '
+                                             f'{value} в CSV-файле')
+                else:
+                    first[value] = number
+            for value, db_pk in db_values(self.model, group, first).items():
+                number = first[value]
+                if db_pk != rows[number][self.key_index]:
+                    found.setdefault(number, f'{name}: значение {value} '
+                                             f'уже есть у строки {db_pk}')
+        return found
+
+    def update(self, rows):
+        """Обновление пачки подготовленных строк одним executemany."""
+        if not rows or not self.update_indexes:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(self.update_sql, [
+                tuple(row[index] for index in self.update_indexes)
+                + (row[self.key_index],)
+                for row in rows
+            ])
+
+
+def _stored_hashes(table):
+    """Все сохраненные хэши строк таблицы одним последовательным чтением.
+
+    Запрос выполняется напрямую через курсор: для неизмененных строк
+    это единственная работа с БД.
+    """
+    quote_name = connection.ops.quote_name
+    stored = {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT {}, {} FROM {} WHERE {} = %s'.format(
+                quote_name('row_key'), quote_name('row_hash'),
+                quote_name(ImportedRow._meta.db_table), quote_name('table')
+            ),
+            [table]
+        )
+        while True:
+            rows = cursor.fetchmany(HASHES_FETCH_SIZE)
+            if not rows:
+                break
+            stored.update(rows)
+    return stored
+
+
+def _forget_deleted_rows(model, table, stored):
+    """Удаление хэшей строк, удаленных из таблицы после прошлого импорта.
+
+    Иначе такие строки считались бы неизмененными или обновленными
+    и больше не вставлялись. Строки без пары в таблице ищет сама БД
+    по индексу первичного ключа. Возвращает количество забытых хэшей.
+    """
+    quote_name = connection.ops.quote_name
+    pk = model._meta.pk
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT {key} FROM {hashes} WHERE {table} = %s AND NOT EXISTS '
+            '(SELECT 1 FROM {rows} WHERE {rows}.{pk} = '
+            'CAST({hashes}.{key} AS {pk_type}))'.format(
+                key=quote_name('row_key'),
+                hashes=quote_name(ImportedRow._meta.db_table),
+                table=quote_name('table'),
+                rows=quote_name(model._meta.db_table),
+                pk=quote_name(pk.column),
+                pk_type=pk.cast_db_type(connection)
+            ),
+            [table]
+        )
+        deleted = [row[0] for row in cursor.fetchall()]
+    for chunk in chunks(deleted):
+        ImportedRow.objects.filter(table=table, row_key__in=chunk).delete()
+        for key in chunk:
+            del stored[key]
+    return len(deleted)
+
+
+def _update_hashes(table, hashes):
+    """Обновление хэшей измененных строк одним executemany."""
+    if not hashes:
+        return
+    quote_name = connection.ops.quote_name
+    sql = 'UPDATE {} SET {} = %s WHERE {} = %s AND {} = %s'.format(
+        quote_name(ImportedRow._meta.db_table), quote_name('row_hash'),
+        quote_name('table'), quote_name('row_key')
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(new_hash, table, key)
+                                 for key, new_hash in hashes])
+
+
+def _skip_conflicts(upsert, batch, counts, write):
+    """Пачка без строк с конфликтами уникальных значений.
+
+    batch - список (ключ, хэш, хэш известен, подготовленная строка);
+    о каждой пропущенной строке сообщается через write.
+    """
+    conflicts = upsert.conflicts([row for *_, row in batch])
+    for number, message in sorted(conflicts.items()):
+        if write:
+            write(f'{upsert.model.__name__}, строка с ключом '
+                  f'{batch[number][0]}: {message}; строка пропущена.')
+    counts['conflicts'] += len(conflicts)
+    return [entry for number, entry in enumerate(batch)
+            if number not in conflicts]
+
+
+def _upsert_batch(upsert, table, batch, counts, write=None):
+    """Запись пачки новых и измененных строк в одной транзакции.
+
+    Строка без сохраненного хэша могла попасть в БД обычным импортом
+    или через API, поэтому для таких строк проверяется наличие ключа.
+    Строки с конфликтами уникальных значений пропускаются.
+    """
+    to_insert, to_update, new_hashes, changed_hashes = [], [], [], []
+    unknown = []
+    batch = _skip_conflicts(
+        upsert,
+        [(key, new_hash, is_known, upsert.prepare(parse_record(record)))
+         for key, new_hash, is_known, record in batch],
+        counts, write
+    )
+    for key, new_hash, is_known, row in batch:
+        if is_known:
+            to_update.append(row)
+            changed_hashes.append((key, new_hash))
+        else:
+            unknown.append((key, new_hash, row))
+    existing = upsert.existing_keys(
+        [row[upsert.key_index] for _, _, row in unknown]
+    )
+    for key, new_hash, row in unknown:
+        if row[upsert.key_index] in existing:
+            to_update.append(row)
+        else:
+            to_insert.append(row)
+        new_hashes.append(
+            ImportedRow(table=table, row_key=key, row_hash=new_hash)
+        )
+    with transaction.atomic():
+        if to_insert:
+            upsert.insert(to_insert)
+        upsert.update(to_update)
+        ImportedRow.objects.bulk_create(new_hashes)
+        _update_hashes(table, changed_hashes)
+    counts['inserted'] += len(to_insert)
+    counts['updated'] += len(to_update)
+
+
+def upsert_csv_table(model, csv_file_path, renames=None,
+                     batch_size=BATCH_SIZE, write=None,
+                     keep_auto_now_add=False):
+    """Инкрементальный импорт одного CSV-файла в таблицу модели.
+
+    Неизмененные записи отсеиваются по хэшу до разбора CSV,
+    в пачки попадают только новые и измененные. Хэши строк, удаленных
+    из таблицы после прошлого импорта, забываются, и такие строки
+    вставляются заново. Каждая пачка
+    записывается в своей транзакции, поэтому прерванный импорт можно
+    просто запустить заново. Возвращает ImportProgress, счетчики
+    вставленных, обновленных, неизмененных и пропущенных из-за
+    конфликтов уникальных значений строк и ключи строк,
+    импортированных ранее, но отсутствующих в CSV.
+    """
+    table = model._meta.label
+    progress = ImportProgress(model.__name__, write)
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'conflicts': 0}
+    stored = _stored_hashes(table)
+    _forget_deleted_rows(model, table, stored)
+    with open_csv(csv_file_path, binary=True) as csv_file:
+        records = raw_records(csv_file)
+        upsert = TableUpsert(model, parse_record(next(records)), renames,
+                             keep_auto_now_add=keep_auto_now_add)
+        batch = []
+        read = 0
+        for record in records:
+            if not record.strip():
+                continue
+            read += 1
+            key = upsert.record_key(record)
+            new_hash = record_hash(record)
+            old_hash = stored.pop(key, None)
+            if old_hash == new_hash:
+                counts['unchanged'] += 1
+            else:
+                batch.append((key, new_hash, old_hash is not None, record))
+                if len(batch) >= batch_size:
+                    _upsert_batch(upsert, table, batch, counts, write)
+                    batch = []
+            if read == batch_size:
+                progress.update(read)
+                read = 0
+        if batch:
+            _upsert_batch(upsert, table, batch, counts, write)
+        progress.update(read)
+    return progress, counts, set(stored)
+
+
+def delete_missing_rows(model, stale_keys):
+    """Удаление строк, импортированных ранее, но пропавших из CSV.
+
+    Удаляются только строки, загруженные инкрементальным импортом;
+    связанные объекты удаляются каскадно средствами ORM.
+    Возвращает количество удаленных строк таблицы.
+    """
+    table = model._meta.label
+    pk_field = model._meta.pk
+    deleted = 0
+    for chunk in chunks(stale_keys):
+        with transaction.atomic():
+            deleted += model.objects.filter(
+                pk__in=[pk_field.to_python(key) for key in chunk]
+            ).delete()[1].get(model._meta.label, 0)
+            ImportedRow.objects.filter(
+                table=table, row_key__in=chunk
+            ).delete()
+    return deleted
@@ -0,0 +1,71 @@
+"""Маршрутизация запросов к БД между основной базой и репликой.
+
+Чтение направляется в реплику (settings.REPLICA_DATABASE) только
+внутри запросов, которые middleware ReplicaRoutingMiddleware отметило
+как безопасные. После первой записи в запросе все дальнейшие чтения
+выполняются в основной базе, чтобы запрос видел свои изменения.
+Состояние хранится в contextvars и не смешивается между запросами
+в разных потоках и корутинах.
+"""
+
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY_DATABASE = 'default'
+
+
+class RoutingState:
+    """Состояние маршрутизации текущего запроса."""
+
+    def __init__(self):
+        """Запрос читает из основной базы, пока не отмечен иначе."""
+        self.use_replica = False
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def start_routing():
+    """Новое состояние маршрутизации для запроса; возвращает токен."""
+    return _state.set(RoutingState())
+
+
+def finish_routing(token):
+    """Восстановление состояния, бывшего до запроса; возвращает итог."""
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def routing_state():
+    """Состояние маршрутизации текущего запроса или None."""
+    return _state.get()
+
+
+class ReplicaRouter:
+    """Чтение из реплики для отмеченных запросов, запись - в основную БД."""
+
+    def db_for_read(self, model, **hints):
+        """Реплика, если запрос безопасный и еще ничего не записал."""
+        state = _state.get()
+        if (state is not None and state.use_replica and not state.wrote
+                and settings.REPLICA_DATABASE):
+            return settings.REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        """Основная база; после записи запрос читает только из нее."""
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплика содержит те же данные, что и основная база."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Миграции применяются только к основной базе."""
+        return db != settings.REPLICA_DATABASE
@@ -0,0 +1,283 @@
+"""Генерация синтетических данных для нагрузочного тестирования.
+
+Популярность произведений, жанров, категорий и отзывов распределена
+по закону Ципфа: немногие произведения собирают большую часть
+отзывов, а комментарии чаще пишут к отзывам на популярные
+произведения. У каждого произведения своя средняя оценка, оценки
+отзывов разбросаны вокруг нее. Строки сразу собираются в кортежи
+и вставляются пачками через executemany (см. TableInsert), поэтому
+миллионы отзывов создаются за минуты. Одинаковые seed и start_date
+дают одинаковые данные, если генерация начинается с пустой БД:
+первичные ключи продолжают уже занятые в таблицах. Без start_date
+даты отсчитываются назад от начала текущих суток.
+"""
+
+import random
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api.cache import invalidate
+from api.csv_import import ImportProgress, TableInsert
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from users.models import CustomUser
+
+BATCH_SIZE = 5000
+ZIPF_EXPONENT = 1.1
+PERIOD_DAYS = 3 * 365
+DATES_POOL_SIZE = 10000
+TEXTS_POOL_SIZE = 1000
+# Вероятности того, что у произведения 1, 2 или 3 жанра.
+GENRES_PER_TITLE_WEIGHTS = (50, 35, 15)
+# Доли модераторов и администраторов среди пользователей.
+MODERATORS_SHARE = 0.01
+ADMINS_SHARE = 0.001
+WORDS = (
+    'сюжет', 'герой', 'автор', 'финал', 'актер', 'музыка', 'история',
+    'атмосфера', 'диалог', 'сцена', 'идея', 'образ', 'глава', 'ритм',
+    'отличный', 'скучный', 'неожиданный', 'слабый', 'яркий', 'мрачный',
+    'затянутый', 'живой', 'честный', 'странный', 'лучший', 'средний',
+    'очень', 'совсем', 'слишком', 'почти', 'местами', 'всегда',
+    'понравился', 'разочаровал', 'удивил', 'запомнился', 'держит',
+)
+
+
+def zipf_counts(total, size, cap, exponent=ZIPF_EXPONENT):
+    """Распределение total объектов по size позициям по закону Ципфа.
+
+    Позиция с рангом r получает долю, пропорциональную 1 / r**exponent,
+    но не больше cap объектов; остаток распределяется по позициям,
+    еще не достигшим cap. Возвращает список количеств по рангам.
+    """
+    total = min(total, size * cap)
+    if not total:
+        return [0] * size
+    weights = [rank ** -exponent for rank in range(1, size + 1)]
+    scale = total / sum(weights)
+    counts = [min(cap, int(weight * scale)) for weight in weights]
+    remainder = total - sum(counts)
+    while remainder:
+        open_ranks = [rank for rank in range(size) if counts[rank] < cap]
+        share = max(1, remainder // len(open_ranks))
+        for rank in open_ranks:
+            added = min(share, cap - counts[rank], remainder)
+            counts[rank] += added
+            remainder -= added
+            if not remainder:
+                break
+    return counts
+
+
+def zipf_index(rng, size):
+    """Случайный индекс от 0 до size - 1 с перекосом к началу.
+
+    Логарифмически равномерное распределение - быстрое приближение
+    закона Ципфа с показателем 1.
+    """
+    return int(size ** rng.random()) - 1
+
+
+class FakeDataGenerator:
+    """Генератор связанных синтетических данных всех таблиц."""
+
+    def __init__(self, seed=0, batch_size=BATCH_SIZE, write=None,
+                 start_date=None):
+        """Источник случайных чисел, пулы дат и текстов.
+
+        start_date - первый день периода дат отзывов и комментариев
+        (datetime.date); по умолчанию период заканчивается сегодня.
+        """
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.write = write
+        if start_date is None:
+            start = timezone.now().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            ) - timedelta(days=PERIOD_DAYS)
+        else:
+            start = timezone.make_aware(datetime.combine(start_date,
+                                                         time.min))
+        self.current_year = (start + timedelta(days=PERIOD_DAYS)).year
+        self.dates = self._dates_pool(start)
+        self.texts = [self._text(5, 40) for _ in range(TEXTS_POOL_SIZE)]
+
+    def _dates_pool(self, start):
+        """Готовые для БД значения дат за PERIOD_DAYS дней от start."""
+        field = Review._meta.get_field('pub_date')
+        return [
+            field.get_db_prep_save(
+                start + timedelta(
+                    seconds=self.rng.randrange(PERIOD_DAYS * 24 * 3600)
+                ),
+                connection
+            )
+            for _ in range(DATES_POOL_SIZE)
+        ]
+
+    def _text(self, min_words, max_words):
+        """Случайный текст из словаря WORDS."""
+        words = self.rng.choices(
+            WORDS, k=self.rng.randint(min_words, max_words)
+        )
+        return ' '.join(words).capitalize() + '.'
+
+    @staticmethod
+    def first_id(model):
+        """Первый свободный первичный ключ таблицы."""
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def insert(self, model, header, rows):
+        """Вставка строк пачками в одной транзакции.
+
+        rows - итератор кортежей значений, готовых для БД, в порядке
+        колонок header. Возвращает ImportProgress.
+        """
+        insert = TableInsert(model, header, keep_auto_now=True)
+        progress = ImportProgress(model.__name__, self.write)
+        batch = []
+        with transaction.atomic():
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    insert.insert(batch)
+                    progress.update(len(batch))
+                    batch = []
+            if batch:
+                insert.insert(batch)
+                progress.update(len(batch))
+        return progress
+
+    def user_rows(self, ids):
+        """Пользователи: в основном user, немного модераторов и админов."""
+        random_share = self.rng.random
+        for user_id in ids:
+            share = random_share()
+            if share < ADMINS_SHARE:
+                role = CustomUser.ADMIN
+            elif share < ADMINS_SHARE + MODERATORS_SHARE:
+                role = CustomUser.MODERATOR
+            else:
+                role = CustomUser.USER
+            yield (user_id, f'fake_user_{user_id}',
+                   f'fake_user_{user_id}@example.com', role)
+
+    @staticmethod
+    def slug_rows(ids, prefix):
+        """Категории или жанры с уникальными slug."""
+        for object_id in ids:
+            yield (object_id, f'{prefix.capitalize()} {object_id}',
+                   f'fake-{prefix}-{object_id}')
+
+    def title_rows(self, ids, category_ids):
+        """Произведения: свежие годы чаще, категории - по Ципфу."""
+        rng = self.rng
+        for title_id in ids:
+            year = max(1900, self.current_year
+                       - int(rng.expovariate(1 / 15)))
+            category = (category_ids[zipf_index(rng, len(category_ids))]
+                        if category_ids else None)
+            description = (rng.choice(self.texts)
+                           if rng.random() < 0.8 else None)
+            yield (title_id, f'Произведение {title_id}', year,
+                   description, category)
+
+    def genre_title_rows(self, title_ids, genre_ids):
+        """Связи произведений с одним-тремя жанрами, жанры - по Ципфу."""
+        rng = self.rng
+        if not genre_ids:
+            return
+        for title_id in title_ids:
+            count = min(len(genre_ids), rng.choices(
+                (1, 2, 3), weights=GENRES_PER_TITLE_WEIGHTS
+            )[0])
+            genres = set()
+            while len(genres) < count:
+                genres.add(genre_ids[zipf_index(rng, len(genre_ids))])
+            for genre_id in sorted(genres):
+                yield (title_id, genre_id)
+
+    def review_rows(self, first_id, title_ranks, user_ids, counts):
+        """Отзывы: по counts[rank] разных авторов на произведение.
+
+        Авторы произведения выбираются без повторов, поэтому
+        ограничение "один отзыв автора на произведение" соблюдается
+        без хранения уже созданных пар. Оценки разбросаны вокруг
+        средней оценки произведения.
+        """
+        rng = self.rng
+        texts, dates = self.texts, self.dates
+        review_id = first_id
+        for title_id, count in zip(title_ranks, counts):
+            quality = rng.gauss(6.5, 1.5)
+            for author_id in rng.sample(user_ids, count):
+                score = min(10, max(1, round(rng.gauss(quality, 1.8))))
+                yield (review_id, title_id, author_id, rng.choice(texts),
+                       score, rng.choice(dates))
+                review_id += 1
+
+    def comment_rows(self, ids, review_ids, user_ids):
+        """Комментарии: чаще к отзывам на популярные произведения."""
+        rng = self.rng
+        texts, dates = self.texts, self.dates
+        for comment_id in ids:
+            review_id = review_ids[zipf_index(rng, len(review_ids))]
+            yield (comment_id, review_id, rng.choice(user_ids),
+                   rng.choice(texts), rng.choice(dates))
+
+    def generate(self, users, titles, genres, categories, reviews,
+                 comments, on_done=None):
+        """Создание данных всех таблиц в порядке зависимостей.
+
+        on_done(model, progress) вызывается после каждой таблицы.
+        Отзывов создается не больше, чем users * titles. Строки
+        вставляются без сигналов моделей, поэтому в конце
+        инвалидируется весь кэш API.
+        """
+        on_done = on_done or (lambda model, progress: None)
+
+        def ids(model, count):
+            first = self.first_id(model)
+            return range(first, first + count)
+
+        user_ids = ids(CustomUser, users)
+        on_done(CustomUser, self.insert(
+            CustomUser, ('id', 'username', 'email', 'role'),
+            self.user_rows(user_ids)
+        ))
+        category_ids = ids(Category, categories)
+        on_done(Category, self.insert(
+            Category, ('id', 'name', 'slug'),
+            self.slug_rows(category_ids, 'категория')
+        ))
+        genre_ids = ids(Genre, genres)
+        on_done(Genre, self.insert(
+            Genre, ('id', 'name', 'slug'),
+            self.slug_rows(genre_ids, 'жанр')
+        ))
+        title_ids = ids(Title, titles)
+        on_done(Title, self.insert(
+            Title, ('id', 'name', 'year', 'description', 'category_id'),
+            self.title_rows(title_ids, category_ids)
+        ))
+        on_done(GenreTitle, self.insert(
+            GenreTitle, ('title_id', 'genre_id'),
+            self.genre_title_rows(title_ids, genre_ids)
+        ))
+        title_ranks = list(title_ids)
+        self.rng.shuffle(title_ranks)
+        counts = zipf_counts(reviews, titles, cap=users)
+        review_ids = ids(Review, sum(counts))
+        on_done(Review, self.insert(
+            Review,
+            ('id', 'title_id', 'author_id', 'text', 'score', 'pub_date'),
+            self.review_rows(review_ids.start, title_ranks, user_ids,
+                             counts)
+        ))
+        comment_ids = ids(Comment, comments if review_ids else 0)
+        on_done(Comment, self.insert(
+            Comment, ('id', 'review_id', 'author_id', 'text', 'pub_date'),
+            self.comment_rows(comment_ids, review_ids, user_ids)
+        ))
+        invalidate()
@@ -0,0 +1,83 @@
+"""Режим быстрой загрузки данных в SQLite.
+
+На время импорта журнал транзакций переносится в память, отключается
+синхронная запись на диск, увеличивается кэш страниц, а неуникальные
+вторичные индексы загружаемых таблиц удаляются и после загрузки
+создаются заново одним проходом. Уникальные индексы остаются: они
+нужны для проверки данных. Исходные настройки и индексы
+восстанавливаются и при ошибке импорта; после успешного импорта
+выполняется ANALYZE. Для других СУБД режим ничего не делает.
+"""
+
+from contextlib import contextmanager
+
+from django.db import connection
+
+FAST_LOAD_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'cache_size': -128000,
+    'temp_store': 'MEMORY',
+}
+
+
+def _pragma(cursor, name, value=None):
+    """Чтение (value=None) или установка значения PRAGMA."""
+    if value is None:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+    cursor.execute(f'PRAGMA {name} = {value}')
+    return value
+
+
+def secondary_indexes(cursor, table):
+    """Неуникальные индексы таблицы, созданные CREATE INDEX: (имя, SQL)."""
+    quote_name = connection.ops.quote_name
+    cursor.execute(f'PRAGMA index_list({quote_name(table)})')
+    names = [name for _, name, unique, origin, *_ in cursor.fetchall()
+             if not unique and origin == 'c']
+    indexes = []
+    for name in names:
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = %s",
+            [name]
+        )
+        indexes.append((name, cursor.fetchone()[0]))
+    return indexes
+
+
+@contextmanager
+def sqlite_fast_load(models, write=None):
+    """Быстрая загрузка таблиц моделей models в SQLite.
+
+    Должна вызываться вне транзакции: режим журнала внутри транзакции
+    не меняется. Сбой ОС во время загрузки может повредить файл БД,
+    поэтому режим предназначен для первичного наполнения базы.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    write = write or (lambda message: None)
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        saved = {name: _pragma(cursor, name) for name in FAST_LOAD_PRAGMAS}
+        indexes = []
+        for model in models:
+            indexes.extend(secondary_indexes(cursor, model._meta.db_table))
+        for name, value in FAST_LOAD_PRAGMAS.items():
+            _pragma(cursor, name, value)
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {quote_name(name)}')
+    write(f'Быстрая загрузка: индексов удалено на время импорта: '
+          f'{len(indexes)}.')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+            for name, value in saved.items():
+                _pragma(cursor, name, value)
+        write(f'Быстрая загрузка: индексы восстановлены: {len(indexes)}.')
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
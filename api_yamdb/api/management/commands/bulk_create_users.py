@@ -0,0 +1,52 @@
+"""Создание пользовательской команды массового создания пользователей."""
+
+import csv
+
+from django.core.management.base import BaseCommand
+
+from api.provisioning import BULK_CREATE_BATCH_SIZE, provision_users
+
+OPTIONAL_FIELDS = ('first_name', 'last_name', 'bio', 'role', 'password')
+
+
+class Command(BaseCommand):
+    """Класс массового создания пользователей из CSV-файла."""
+
+    help = ('Создание пользователей из CSV-файла с колонками username, '
+            'email и необязательными first_name, last_name, bio, role, '
+            'password.')
+
+    def add_arguments(self, parser):
+        """Аргументы команды массового создания пользователей."""
+        parser.add_argument('csv_file', help='Путь к CSV-файлу.')
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Количество процессов для хэширования паролей.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BULK_CREATE_BATCH_SIZE,
+            help='Размер пачки bulk_create.'
+        )
+
+    def handle(self, *args, **options):
+        """Чтение CSV-файла и создание пользователей."""
+        with open(options['csv_file'], 'r', encoding='utf-8') as csv_file:
+            rows = []
+            for row in csv.DictReader(csv_file):
+                for field in OPTIONAL_FIELDS:
+                    if not row.get(field):
+                        row.pop(field, None)
+                rows.append(row)
+        report = provision_users(
+            rows, workers=options['workers'],
+            batch_size=options['batch_size']
+        )
+        for error in report['errors']:
+            self.stdout.write(self.style.ERROR(
+                f'Строка {error["row"] + 2}: {dict(error["errors"])}'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {report["created"]} из {len(rows)} '
+            f'за {report["elapsed"]} с '
+            f'({report["rows_per_second"]} пользователей/с).'
+        ))
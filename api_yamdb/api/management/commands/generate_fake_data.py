@@ -0,0 +1,61 @@
+"""Создание пользовательской команды генерации синтетических данных."""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from api.fake_data import BATCH_SIZE, FakeDataGenerator
+
+
+class Command(BaseCommand):
+    """Класс генерации синтетических данных для нагрузочных тестов."""
+
+    help = ('Генерация пользователей, произведений, жанров, категорий, '
+            'отзывов и комментариев с распределением популярности '
+            'по закону Ципфа.')
+
+    def add_arguments(self, parser):
+        """Аргументы команды генерации данных."""
+        for name, default in (('users', 1000), ('titles', 1000),
+                              ('genres', 30), ('categories', 5),
+                              ('reviews', 10000), ('comments', 20000)):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Количество создаваемых объектов ({name}).'
+            )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора: одинаковые seed '
+                 'и --start-date дают одинаковые данные в пустой БД.'
+        )
+        parser.add_argument(
+            '--start-date', type=date.fromisoformat, default=None,
+            help='Первый день периода дат отзывов и комментариев '
+                 '(ГГГГ-ММ-ДД); по умолчанию период заканчивается сегодня.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество строк в одной пачке INSERT.'
+        )
+
+    def report_table(self, model, progress):
+        """Вывод итогов генерации таблицы."""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Таблица БД {model.__name__}: {progress.summary()} '
+                f'за {progress.elapsed:.2f} с.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        """Генерация данных всех таблиц."""
+        generator = FakeDataGenerator(
+            seed=options['seed'], batch_size=options['batch_size'],
+            write=self.stdout.write, start_date=options['start_date']
+        )
+        generator.generate(
+            users=options['users'], titles=options['titles'],
+            genres=options['genres'], categories=options['categories'],
+            reviews=options['reviews'], comments=options['comments'],
+            on_done=self.report_table
+        )
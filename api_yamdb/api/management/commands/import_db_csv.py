@@ -1,11 +1,19 @@
 """Создание пользовательской команды импорта данных в БД из CSV-файлов."""
 
-import csv
 import os
-from pathlib import Path
+from contextlib import nullcontext
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
+from api.cache import invalidate
+from api.csv_import import (BATCH_SIZE,
+                            ImportCheckpoint,
+                            find_csv,
+                            import_csv_table,
+                            import_tables_parallel)
+from api.csv_check import check_csv_files
+from api.fast_load import sqlite_fast_load
+from api.csv_upsert import delete_missing_rows, upsert_csv_table
 from api_yamdb.settings import BASE_DIR
 from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
 from users.models import CustomUser
@@ -25,24 +33,172 @@ path_to_csv_directory = os.path.join(BASE_DIR, 'static/', 'data/')
 class Command(BaseCommand):
     """Класс импорта данных в БД из CSV-файлов."""
 
-    def handle(self, *args, **options):
-        """Функция фактической логики импорта данных в БД из CSV-файлов."""
+    help = 'Импорт данных в БД из CSV-файлов каталога static/data/.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды импорта данных."""
+        parser.add_argument(
+            '--data-dir', default=path_to_csv_directory,
+            help=('Каталог с CSV-файлами (по умолчанию static/data/); '
+                  'вместо файла можно положить его сжатую копию *.csv.gz.')
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество строк в одной пачке INSERT.'
+        )
+        parser.add_argument(
+            '--checkpoint', default=None,
+            help=('Файл контрольной точки: каждая пачка фиксируется '
+                  'отдельно, прерванный импорт продолжается с последней '
+                  'зафиксированной пачки.')
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=('Количество процессов: независимые таблицы загружаются '
+                  'параллельно, зависимые - после своих родителей. '
+                  'Для SQLite пачки фиксируются по одной.')
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help=('Перед импортом проверить все файлы (внешние ключи, '
+                  'уникальность, диапазоны значений) и не импортировать '
+                  'ничего, если найдены ошибки.')
+        )
+        parser.add_argument(
+            '--check-only', action='store_true',
+            help='Только проверить файлы, без импорта.'
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help=('Инкрементальный импорт: вставляются только новые '
+                  'строки, обновляются только изменившиеся с прошлого '
+                  'импорта (по хэшу строки).')
+        )
+        parser.add_argument(
+            '--delete', action='store_true',
+            help=('Вместе с --incremental: удалить строки, пропавшие '
+                  'из CSV-файлов с прошлого импорта.')
+        )
+        parser.add_argument(
+            '--keep-dates', action='store_true',
+            help=('Сохранить даты публикации из CSV-файлов (например, '
+                  'при повторном импорте выгрузки export_db); без него '
+                  'датой публикации становится время импорта.')
+        )
+        parser.add_argument(
+            '--fast-load', action='store_true',
+            help=('Быстрая загрузка в SQLite: на время импорта журнал '
+                  'в памяти, без синхронной записи на диск, неуникальные '
+                  'индексы пересоздаются после загрузки. Только для '
+                  'первичного наполнения базы.')
+        )
 
-        def csv_to_db(model, csv_file, csv_file_path):
-            """Чтение файлов csv и добавление данных из них в БД."""
-            with open(csv_file_path, 'r', encoding='utf-8') as data_csv_file:
-                reader = csv.DictReader(data_csv_file)
-                _, db_field, scv_field = CSV_MODELS_FIELDS[model]
-                for row in reader:
-                    if scv_field:
-                        row[db_field] = row.pop(scv_field)
-                    model.objects.create(**row)
+    def report_table(self, model, summary, elapsed):
+        """Вывод итогов импорта таблицы."""
+        csv_file = CSV_MODELS_FIELDS[model][0]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Данные из файла {csv_file} успешно импортированы'
+                f' в таблицу БД {model.__name__}:'
+                f' {summary} за {elapsed:.2f} с.'
+            )
+        )
+
+    def handle_incremental(self, tables, options):
+        """Инкрементальный импорт всех таблиц.
+
+        Удаление пропавших строк выполняется после загрузки всех таблиц,
+        начиная с зависимых.
+        """
+        stale_keys = {}
+        for model, csv_file_path, renames in tables:
+            progress, counts, stale_keys[model] = upsert_csv_table(
+                model, csv_file_path, renames,
+                batch_size=options['batch_size'], write=self.stdout.write,
+                keep_auto_now_add=options['keep_dates']
+            )
+            self.report_table(
+                model,
+                f'новых {counts["inserted"]}, изменено {counts["updated"]}, '
+                f'без изменений {counts["unchanged"]}, '
+                f'конфликтов {counts["conflicts"]}; {progress.summary()}',
+                progress.elapsed
+            )
+        if options['delete']:
+            for model, _, _ in reversed(tables):
+                deleted = delete_missing_rows(model, stale_keys[model])
                 self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Данные из файла {csv_file} успешно импортированы'
-                        f' в таблицу БД {model.__name__}.'
-                    )
+                    f'Удалено строк из таблицы БД {model.__name__}: {deleted}.'
                 )
-        for model, (csv_file, _, _) in CSV_MODELS_FIELDS.items():
-            csv_file_path = Path(path_to_csv_directory) / csv_file
-            csv_to_db(model, csv_file, csv_file_path)
+
+    def check_files(self, tables, options):
+        """Проверка файлов до импорта с выводом полного отчета."""
+        report = check_csv_files(tables, incremental=options['incremental'])
+        for line in report.lines():
+            self.stdout.write(self.style.ERROR(line))
+        if report:
+            raise CommandError(
+                f'Найдено ошибок в CSV-файлах: {len(report.errors)}. '
+                'Данные не импортированы.'
+            )
+        self.stdout.write(self.style.SUCCESS('Проверка CSV-файлов пройдена.'))
+
+    def import_tables(self, tables, checkpoint, options):
+        """Импорт всех таблиц выбранным способом."""
+        if options['incremental']:
+            self.handle_incremental(tables, options)
+        elif options['workers'] > 1:
+            import_tables_parallel(
+                tables, options['workers'],
+                batch_size=options['batch_size'],
+                checkpoint=checkpoint, on_done=self.report_table,
+                keep_auto_now_add=options['keep_dates']
+            )
+        else:
+            for model, csv_file_path, renames in tables:
+                progress = import_csv_table(
+                    model, csv_file_path, renames,
+                    batch_size=options['batch_size'],
+                    checkpoint=checkpoint,
+                    write=self.stdout.write,
+                    keep_auto_now_add=options['keep_dates']
+                )
+                self.report_table(model, progress.summary(), progress.elapsed)
+
+    def handle(self, *args, **options):
+        """Функция фактической логики импорта данных в БД из CSV-файлов."""
+        if options['incremental'] and (options['checkpoint']
+                                       or options['workers'] > 1):
+            raise CommandError(
+                'Инкрементальный импорт не использует --checkpoint и '
+                '--workers: его можно просто запустить повторно.'
+            )
+        if options['delete'] and not options['incremental']:
+            raise CommandError('--delete используется только с --incremental.')
+        if options['fast_load'] and options['workers'] > 1:
+            raise CommandError(
+                '--fast-load выполняется в одном процессе: SQLite все '
+                'равно записывает таблицы по очереди.'
+            )
+        checkpoint = ImportCheckpoint(options['checkpoint'])
+        tables = [
+            (model, find_csv(options['data_dir'], csv_file),
+             {scv_field: db_field} if scv_field else None)
+            for model, (csv_file, db_field, scv_field)
+            in CSV_MODELS_FIELDS.items()
+        ]
+        fast_load = (
+            sqlite_fast_load(CSV_MODELS_FIELDS, write=self.stdout.write)
+            if options['fast_load'] else nullcontext()
+        )
+        try:
+            if options['check'] or options['check_only']:
+                self.check_files(tables, options)
+            if options['check_only']:
+                return
+            with fast_load:
+                self.import_tables(tables, checkpoint, options)
+        except ValueError as error:
+            raise CommandError(error)
+        invalidate()
+        checkpoint.clear()
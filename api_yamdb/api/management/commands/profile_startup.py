@@ -0,0 +1,65 @@
+"""Создание пользовательской команды замера времени запуска."""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.startup import package_totals, profile_startup
+
+
+class Command(BaseCommand):
+    """Класс отчета о времени импорта модулей и запуска приложений."""
+
+    help = ('Замер времени запуска в новом процессе: django.setup(), '
+            'импорт моделей и ready() каждого приложения, загрузка '
+            'URLconf и время импорта модулей (python -X importtime).')
+
+    def add_arguments(self, parser):
+        """Аргументы команды замера."""
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Число самых медленных модулей и пакетов в отчете.'
+        )
+        parser.add_argument('--json', help='Файл для отчета в JSON.')
+
+    def write_table(self, title, rows):
+        """Вывод таблицы "имя - время в мс"."""
+        self.stdout.write(title)
+        for name, seconds in rows:
+            self.stdout.write(f'  {seconds * 1000:9.1f} мс  {name}')
+
+    def handle(self, *args, **options):
+        """Замер и вывод отчета."""
+        try:
+            report = profile_startup()
+        except RuntimeError as error:
+            raise CommandError(str(error))
+        top = options['top']
+        self.write_table('Этапы запуска:', report['phases'].items())
+        self.write_table('Приложения (импорт моделей + ready):', sorted(
+            ((label, sum(timings.values()))
+             for label, timings in report['apps'].items()),
+            key=lambda row: -row[1]
+        ))
+        self.write_table(
+            f'Пакеты по собственному времени импорта (топ {top}):',
+            list(package_totals(report['modules']).items())[:top]
+        )
+        self.write_table(
+            f'Модули по общему времени импорта (топ {top}):',
+            sorted(((name, cumulative)
+                    for name, _, cumulative in report['modules']),
+                   key=lambda row: -row[1])[:top]
+        )
+        for key, stage in (('deferred_modules_at_setup', 'django.setup()'),
+                           ('first_use_modules_at_urlconf',
+                            'загрузке URLconf')):
+            if report[key]:
+                self.stdout.write(self.style.WARNING(
+                    f'При {stage} импортированы модули, импорт которых '
+                    f'должен быть отложен: {", ".join(report[key])}'
+                ))
+        self.stdout.write(f'Всего модулей: {report["modules_count"]}.')
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2)
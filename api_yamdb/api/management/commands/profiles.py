@@ -0,0 +1,74 @@
+"""Создание пользовательской команды просмотра профилей запросов."""
+
+import io
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import CPROFILE, list_profiles
+
+
+class Command(BaseCommand):
+    """Класс списка и сводки сохраненных профилей запросов."""
+
+    help = ('Самые медленные сохраненные профили запросов; с --show - '
+            'сводка одного профиля, с --functions - самые затратные '
+            'функции каждого профиля из списка.')
+
+    def add_arguments(self, parser):
+        """Аргументы команды просмотра профилей."""
+        parser.add_argument('--route', help='Только профили маршрута.')
+        parser.add_argument('--top', type=int, default=10,
+                            help='Число профилей в списке.')
+        parser.add_argument('--show', help='Имя профиля для сводки.')
+        parser.add_argument(
+            '--functions', type=int, default=0,
+            help='Число самых затратных функций для каждого профиля.'
+        )
+        parser.add_argument(
+            '--sort', default='cumulative',
+            help='Сортировка функций (ключ pstats: cumulative, tottime).'
+        )
+        parser.add_argument('--limit', type=int, default=30,
+                            help='Число функций в сводке --show.')
+
+    def summary(self, meta, sort, limit):
+        """Текстовая сводка профиля."""
+        if meta['profiler'] != CPROFILE:
+            from pyinstrument.renderers import ConsoleRenderer
+            from pyinstrument.session import Session
+
+            return ConsoleRenderer(unicode=True, color=False).render(
+                Session.load(meta['file'])
+            )
+        stream = io.StringIO()
+        pstats.Stats(meta['file'], stream=stream).strip_dirs().sort_stats(
+            sort
+        ).print_stats(limit)
+        return stream.getvalue()
+
+    def handle(self, *args, **options):
+        """Вывод списка профилей или сводки одного из них."""
+        profiles = list_profiles()
+        if options['show']:
+            found = [meta for meta in profiles
+                     if meta['name'] == options['show']]
+            if not found:
+                raise CommandError(f'Профиль {options["show"]} не найден.')
+            self.stdout.write(self.summary(found[0], options['sort'],
+                                           options['limit']))
+            return
+        if options['route']:
+            profiles = [meta for meta in profiles
+                        if meta['route'] == options['route']]
+        profiles.sort(key=lambda meta: -meta['duration_ms'])
+        if not profiles:
+            self.stdout.write('Сохраненных профилей нет.')
+        for meta in profiles[:options['top']]:
+            self.stdout.write(
+                f'{meta["duration_ms"]:9.1f} мс  {meta["method"]} '
+                f'{meta["path"]} -> {meta["status"]}  {meta["name"]}'
+            )
+            if options['functions']:
+                self.stdout.write(self.summary(meta, options['sort'],
+                                               options['functions']))
@@ -0,0 +1,54 @@
+"""Создание пользовательской команды отчета о медленных запросах."""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.slow_queries import rank, read_log
+
+
+class Command(BaseCommand):
+    """Класс отчета по журналу медленных SQL-запросов."""
+
+    help = ('Запросы из журнала медленных запросов, сгруппированные '
+            'по тексту SQL и отсортированные по суммарному времени.')
+
+    def add_arguments(self, parser):
+        """Аргументы команды отчета."""
+        parser.add_argument(
+            '--file', default=settings.SLOW_QUERY_LOG['FILE'],
+            help='Файл журнала (по умолчанию SLOW_QUERY_LOG["FILE"]).'
+        )
+        parser.add_argument('--top', type=int, default=10,
+                            help='Число запросов в отчете.')
+        parser.add_argument('--plans', action='store_true',
+                            help='Выводить план самого медленного запуска.')
+        parser.add_argument('--json', help='Файл для отчета в JSON.')
+
+    def handle(self, *args, **options):
+        """Чтение журнала и вывод отчета."""
+        records = list(read_log(options['file']))
+        if not records:
+            self.stdout.write('Медленных запросов не найдено.')
+            return
+        groups = rank(records)[:options['top']]
+        suppressed = sum(record.get('suppressed') or 0 for record in records)
+        self.stdout.write(
+            f'Записей: {len(records)}, пропущено из-за ограничения '
+            f'частоты: {suppressed}.'
+        )
+        for position, group in enumerate(groups, 1):
+            self.stdout.write(
+                f'{position}. всего {group["total_ms"]:.1f} мс, '
+                f'запусков {group["count"]}, среднее '
+                f'{group["avg_ms"]:.1f} мс, максимум '
+                f'{group["max_ms"]:.1f} мс; {", ".join(group["views"])}'
+            )
+            self.stdout.write(f'   {group["fingerprint"]}')
+            if options['plans'] and group['plan']:
+                for line in group['plan']:
+                    self.stdout.write(f'     {line}')
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as output:
+                json.dump(groups, output, indent=2, ensure_ascii=False)
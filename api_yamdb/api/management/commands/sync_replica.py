@@ -0,0 +1,68 @@
+"""Создание пользовательской команды копирования БД SQLite в реплику."""
+
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.cache import invalidate
+from api.db_router import PRIMARY_DATABASE
+
+
+class Command(BaseCommand):
+    """Класс копирования основной базы SQLite в файл реплики."""
+
+    help = ('Копирование основной базы SQLite в файл реплики '
+            '(DB_REPLICA_NAME) средствами SQLite backup API; '
+            'с --interval копирование повторяется периодически.')
+
+    def add_arguments(self, parser):
+        """Аргументы команды копирования."""
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Период копирования в секундах (0 - скопировать один раз).'
+        )
+
+    def copy(self):
+        """Копирование основной базы в реплику; возвращает время в с.
+
+        Кэш API содержит данные из реплики, поэтому после копирования
+        он инвалидируется.
+        """
+        started = time.perf_counter()
+        source = connections[PRIMARY_DATABASE]
+        source.ensure_connection()
+        replica_name = connections[settings.REPLICA_DATABASE].settings_dict[
+            'NAME'
+        ]
+        target = sqlite3.connect(replica_name, timeout=30)
+        try:
+            source.connection.backup(target)
+        finally:
+            target.close()
+        invalidate()
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        """Однократное или периодическое копирование."""
+        if not settings.REPLICA_DATABASE:
+            raise CommandError(
+                'Реплика не настроена: задайте переменную окружения '
+                'DB_REPLICA_NAME.'
+            )
+        for alias in (PRIMARY_DATABASE, settings.REPLICA_DATABASE):
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(
+                    'Команда копирует только базы SQLite; реплику другой '
+                    'СУБД настройте средствами репликации этой СУБД.'
+                )
+        while True:
+            elapsed = self.copy()
+            self.stdout.write(self.style.SUCCESS(
+                f'Основная база скопирована в реплику за {elapsed:.2f} с.'
+            ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
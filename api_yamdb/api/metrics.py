@@ -0,0 +1,296 @@
+"""Метрики API в текстовом формате Prometheus.
+
+Каждый процесс (например, рабочий процесс gunicorn) хранит свои
+значения в отдельном файле каталога settings.METRICS['DIR'],
+отображенном в память: увеличение счетчика - запись восьми байт
+без системных вызовов. Эндпойнт /metrics читает файлы всех процессов
+и суммирует значения, поэтому метрики не зависят от того, какой
+процесс обработал запрос на выгрузку. Все значения - счетчики
+(гистограммы тоже хранятся счетчиками по корзинам), и файлы
+завершившихся процессов продолжают учитываться в суммах.
+
+Метрики:
+- api_requests_total{route, method, status} - число запросов;
+- api_request_duration_seconds{route, method} - гистограмма времени
+  обработки запроса;
+- api_db_queries_total{route}, api_db_query_duration_seconds_total{route} -
+  число SQL-запросов и время работы с БД;
+- api_cache_requests_total{namespace, result} - обращения к кэшу API
+  и api_cache_hit_ratio{namespace} - доля попаданий.
+
+route - имя URL: для viewset - basename и действие маршрутизатора DRF
+(titles-list, reviews-detail), unmatched - для несуществующих адресов.
+"""
+
+import glob
+import hmac
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+HEADER = struct.Struct('<Q')
+KEY_LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+INITIAL_SIZE = 1 << 16
+METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+
+REQUESTS = 'api_requests_total'
+DURATION = 'api_request_duration_seconds'
+DB_QUERIES = 'api_db_queries_total'
+DB_DURATION = 'api_db_query_duration_seconds_total'
+CACHE_REQUESTS = 'api_cache_requests_total'
+CACHE_HIT_RATIO = 'api_cache_hit_ratio'
+CACHE_HITS = ('local_hit', 'shared_hit')
+METRICS = {
+    REQUESTS: ('counter', 'Число запросов по маршрутам и статусам.'),
+    DURATION: ('histogram', 'Время обработки запроса, с.'),
+    DB_QUERIES: ('counter', 'Число SQL-запросов.'),
+    DB_DURATION: ('counter', 'Время выполнения SQL-запросов, с.'),
+    CACHE_REQUESTS: ('counter', 'Обращения к кэшу API по результату.'),
+    CACHE_HIT_RATIO: ('gauge', 'Доля попаданий в кэш API.'),
+}
+
+
+def _padded(length):
+    """Длина, выровненная на 8 байт."""
+    return (length + 7) & ~7
+
+
+class MmapValues:
+    """Значения метрик одного процесса в файле, отображенном в память.
+
+    Формат файла: 8 байт - занятый размер, затем записи
+    (длина ключа, ключ с выравниванием на 8 байт, значение double).
+    Размер в заголовке обновляется после записи, поэтому читатели
+    из других процессов видят только полностью записанные записи.
+    """
+
+    def __init__(self, path):
+        """Открытие файла процесса и чтение уже записанных ключей."""
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'a+b')
+        if os.fstat(self.file.fileno()).st_size < INITIAL_SIZE:
+            self.file.truncate(INITIAL_SIZE)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.positions = {}
+        self.used = HEADER.unpack_from(self.map, 0)[0] or HEADER.size
+        for key, _, position in read_records(self.map, self.used):
+            self.positions[key] = position
+
+    def inc(self, key, amount=1):
+        """Увеличение значения по ключу."""
+        with self.lock:
+            position = self.positions.get(key)
+            if position is None:
+                position = self._add(key)
+            VALUE.pack_into(self.map, position,
+                            VALUE.unpack_from(self.map, position)[0] + amount)
+
+    def _add(self, key):
+        """Новая запись с нулевым значением; возвращает позицию значения."""
+        encoded = key.encode('utf-8')
+        size = KEY_LENGTH.size + _padded(len(encoded)) + VALUE.size
+        if self.used + size > len(self.map):
+            self.map.close()
+            self.file.truncate(max(2 * os.fstat(self.file.fileno()).st_size,
+                                   self.used + size))
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        KEY_LENGTH.pack_into(self.map, self.used, len(encoded))
+        start = self.used + KEY_LENGTH.size
+        self.map[start:start + len(encoded)] = encoded
+        position = start + _padded(len(encoded))
+        VALUE.pack_into(self.map, position, 0.0)
+        self.used += size
+        HEADER.pack_into(self.map, 0, self.used)
+        self.positions[key] = position
+        return position
+
+
+def read_records(buffer, used):
+    """Записи файла метрик: (ключ, значение, позиция значения)."""
+    offset = HEADER.size
+    while offset < used:
+        length = KEY_LENGTH.unpack_from(buffer, offset)[0]
+        start = offset + KEY_LENGTH.size
+        key = bytes(buffer[start:start + length]).decode('utf-8')
+        position = start + _padded(length)
+        yield key, VALUE.unpack_from(buffer, position)[0], position
+        offset = position + VALUE.size
+
+
+_store = {'owner': None, 'values': None}
+_store_lock = threading.Lock()
+
+
+def store():
+    """Файл метрик текущего процесса.
+
+    Файл открывается заново после fork и при смене каталога.
+    """
+    directory = settings.METRICS['DIR']
+    owner = (os.getpid(), directory)
+    if _store['owner'] != owner:
+        with _store_lock:
+            if _store['owner'] != owner:
+                os.makedirs(directory, exist_ok=True)
+                _store['values'] = MmapValues(
+                    os.path.join(directory, f'{os.getpid()}.db')
+                )
+                _store['owner'] = owner
+    return _store['values']
+
+
+@lru_cache(maxsize=4096)
+def _encode_key(name, labels):
+    """Ключ значения в файле; кэшируется: набор маршрутов ограничен."""
+    return json.dumps([name, labels], ensure_ascii=False)
+
+
+def metric_key(name, **labels):
+    """Ключ значения: имя метрики и отсортированные метки."""
+    return _encode_key(name, tuple(sorted(labels.items())))
+
+
+def inc(name, amount=1, **labels):
+    """Увеличение счетчика name с метками labels."""
+    if settings.METRICS['ENABLED']:
+        store().inc(metric_key(name, **labels), amount)
+
+
+def observe_request(route, method, status, duration, timings):
+    """Учет обработанного запроса; timings - замеры api.timing."""
+    if method not in METHODS:
+        method = 'OTHER'
+    values = store()
+    values.inc(metric_key(REQUESTS, route=route, method=method,
+                          status=str(status)))
+    buckets = settings.METRICS['BUCKETS']
+    index = bisect_left(buckets, duration)
+    bound = str(buckets[index]) if index < len(buckets) else '+Inf'
+    values.inc(metric_key(DURATION + '_bucket', route=route,
+                          method=method, le=bound))
+    values.inc(metric_key(DURATION + '_sum', route=route, method=method),
+               duration)
+    values.inc(metric_key(DURATION + '_count', route=route, method=method))
+    if timings is not None:
+        values.inc(metric_key(DB_QUERIES, route=route), timings.queries)
+        values.inc(metric_key(DB_DURATION, route=route), timings.db)
+
+
+def collect(directory=None):
+    """Суммы значений метрик из файлов всех процессов."""
+    totals = {}
+    for path in glob.glob(os.path.join(directory or settings.METRICS['DIR'],
+                                       '*.db')):
+        with open(path, 'rb') as source:
+            content = source.read()
+        if len(content) < HEADER.size:
+            continue
+        used = min(HEADER.unpack_from(content, 0)[0], len(content))
+        for key, value, _ in read_records(content, used):
+            totals[key] = totals.get(key, 0.0) + value
+    samples = {}
+    for key, value in totals.items():
+        name, labels = json.loads(key)
+        samples.setdefault(name, {})[tuple(map(tuple, labels))] = value
+    return samples
+
+
+def _format_labels(labels):
+    """Метки в формате Prometheus."""
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"'
+                          for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    """Значение метрики: целые числа без дробной части."""
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _histogram_lines(samples):
+    """Строки гистограммы: корзины накопительно, сумма и число."""
+    bounds = [str(bound) for bound in settings.METRICS['BUCKETS']]
+    lines = []
+    for labels, count in sorted(samples.get(DURATION + '_count',
+                                            {}).items()):
+        buckets = samples.get(DURATION + '_bucket', {})
+        cumulative = 0
+        for bound in bounds + ['+Inf']:
+            cumulative += buckets.get(
+                tuple(sorted(labels + (('le', bound),))), 0
+            )
+            lines.append(
+                f'{DURATION}_bucket'
+                f'{_format_labels(labels + (("le", bound),))} '
+                f'{_format_value(cumulative)}'
+            )
+        total = samples.get(DURATION + '_sum', {}).get(labels, 0)
+        lines.append(f'{DURATION}_sum{_format_labels(labels)} '
+                     f'{_format_value(total)}')
+        lines.append(f'{DURATION}_count{_format_labels(labels)} '
+                     f'{_format_value(count)}')
+    return lines
+
+
+def cache_hit_ratios(samples):
+    """Доля попаданий в кэш по пространствам имен."""
+    hits, totals = {}, {}
+    for labels, value in samples.get(CACHE_REQUESTS, {}).items():
+        labels = dict(labels)
+        namespace = (('namespace', labels['namespace']),)
+        totals[namespace] = totals.get(namespace, 0) + value
+        if labels['result'] in CACHE_HITS:
+            hits[namespace] = hits.get(namespace, 0) + value
+    return {namespace: hits.get(namespace, 0) / total
+            for namespace, total in totals.items() if total}
+
+
+def render(samples):
+    """Метрики в текстовом формате Prometheus."""
+    samples = dict(samples)
+    samples[CACHE_HIT_RATIO] = cache_hit_ratios(samples)
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'histogram':
+            lines.extend(_histogram_lines(samples))
+            continue
+        for labels, value in sorted(samples.get(name, {}).items()):
+            lines.append(f'{name}{_format_labels(labels)} '
+                         f'{_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Выгрузка метрик всех процессов.
+
+    Если сбор метрик выключен (settings.METRICS['ENABLED']), эндпойнт
+    отвечает 404. Если задан settings.METRICS['TOKEN'], запрос должен
+    содержать заголовок Authorization: Bearer <токен>.
+    """
+    if not settings.METRICS['ENABLED']:
+        raise Http404
+    token = settings.METRICS['TOKEN']
+    if token and not hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', '').encode(),
+        f'Bearer {token}'.encode()
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
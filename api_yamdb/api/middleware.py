@@ -0,0 +1,426 @@
+"""Middleware приложения API.
+
+Middleware поддерживают и синхронный, и асинхронный режим: иначе
+Django при запуске через ASGI выполнял бы асинхронные представления
+синхронно через адаптер. Общая часть обоих режимов - в HybridMiddleware.
+"""
+
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
+
+from api.compression import accepted_encodings, compress, compress_stream
+from api.db_router import finish_routing, routing_state, start_routing
+from api.metrics import observe_request
+from api.profiling import (RequestProfile,
+                           is_requested_by_admin,
+                           is_sampled,
+                           profiler_kind,
+                           save_profile,
+                           should_profile)
+from api.query_budget import check_query_budget
+from api.timing import (current_timings,
+                        finish_timing,
+                        is_timing_visible,
+                        start_timing,
+                        view_name)
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+timing_logger = logging.getLogger('api.timing')
+
+
+class HybridMiddleware:
+    """Основа middleware для синхронного и асинхронного режима.
+
+    Подкласс переопределяет только обработчики: start - перед вызовом
+    следующего обработчика цепочки (возвращает состояние запроса),
+    finish - после него, в том числе при исключении, process_response -
+    для полученного ответа. astart и aprocess_response - их варианты
+    для асинхронного режима, по умолчанию вызывающие синхронные.
+    Если задан setting, middleware подключается только при
+    settings.<setting>['ENABLED'].
+    """
+
+    sync_capable = True
+    async_capable = True
+    setting = None
+
+    def __init__(self, get_response):
+        """Сохранение следующего обработчика цепочки."""
+        if self.setting and not getattr(settings, self.setting)['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        """Обработка запроса в синхронном режиме."""
+        if self.is_async:
+            return self.__acall__(request)
+        state = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = self.finish(request, state)
+        return self.process_response(request, response, state)
+
+    async def __acall__(self, request):
+        """Обработка запроса в асинхронном режиме."""
+        state = await self.astart(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = self.finish(request, state)
+        return await self.aprocess_response(request, response, state)
+
+    def start(self, request):
+        """Состояние запроса до вызова следующего обработчика."""
+        return None
+
+    async def astart(self, request):
+        """Асинхронный вариант start."""
+        return self.start(request)
+
+    def finish(self, request, state):
+        """Состояние запроса после вызова следующего обработчика."""
+        return state
+
+    def process_response(self, request, response, state):
+        """Обработка ответа."""
+        return response
+
+    async def aprocess_response(self, request, response, state):
+        """Асинхронный вариант process_response."""
+        return self.process_response(request, response, state)
+
+
+def start_request_timing():
+    """Начало замеров, если их не начала внешняя middleware."""
+    return None if current_timings() else start_timing()
+
+
+def finish_request_timing(token):
+    """Замеры запроса; начатые start_request_timing заканчиваются."""
+    timings = current_timings()
+    if token is not None:
+        finish_timing(token)
+    return timings
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """Чтение из реплики для GET/HEAD-запросов к отмеченным представлениям.
+
+    Представление отмечается атрибутом read_from_replica = True.
+    Клиент, изменивший данные, получает cookie, и его запросы
+    в течение settings.REPLICA_STICKY_SECONDS читают из основной базы:
+    реплика может еще не содержать его изменений.
+    """
+
+    def start(self, request):
+        """Отдельное состояние маршрутизации для запроса."""
+        return start_routing()
+
+    def finish(self, request, token):
+        """Состояние маршрутизации по окончании запроса."""
+        return finish_routing(token)
+
+    def process_response(self, request, response, state):
+        """Cookie чтения из основной базы для клиента, изменившего данные."""
+        if state.wrote and settings.REPLICA_DATABASE:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Отметка безопасного запроса к представлению для реплики."""
+        view_class = getattr(view_func, 'cls', None)
+        if (request.method in SAFE_METHODS
+                and getattr(view_class, 'read_from_replica', False)
+                and settings.REPLICA_STICKY_COOKIE not in request.COOKIES):
+            routing_state().use_replica = True
+
+
+class FullStackMiddleware(HybridMiddleware):
+    """Middleware settings.FULL_STACK_MIDDLEWARE для всех путей, кроме API.
+
+    API аутентифицирует только по JWT, поэтому сессии, CSRF, сообщения
+    и заголовок X-Frame-Options нужны лишь админке и страницам сайта.
+    Запросы с путями из settings.LEAN_MIDDLEWARE_PATHS проходят мимо
+    вложенной цепочки, остальные - через нее, включая process_view
+    и process_exception вложенных middleware.
+    """
+
+    def __init__(self, get_response):
+        """Сборка вложенной цепочки в порядке FULL_STACK_MIDDLEWARE."""
+        super().__init__(get_response)
+        self.lean_paths = tuple(settings.LEAN_MIDDLEWARE_PATHS)
+        self.view_hooks = []
+        self.exception_hooks = []
+        handler = get_response
+        for middleware_path in reversed(settings.FULL_STACK_MIDDLEWARE):
+            middleware = import_string(middleware_path)(handler)
+            if hasattr(middleware, 'process_view'):
+                self.view_hooks.insert(0, middleware.process_view)
+            if hasattr(middleware, 'process_exception'):
+                self.exception_hooks.append(middleware.process_exception)
+            handler = convert_exception_to_response(middleware)
+        self.full_stack = handler
+
+    def is_lean(self, request):
+        """Запрос к API, которому не нужна вложенная цепочка."""
+        return request.path_info.startswith(self.lean_paths)
+
+    def __call__(self, request):
+        """Обработка запроса короткой или полной цепочкой.
+
+        В асинхронном режиме обе цепочки возвращают корутину.
+        """
+        if self.is_lean(request):
+            return self.get_response(request)
+        return self.full_stack(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """process_view вложенных middleware для полной цепочки."""
+        if self.is_lean(request):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_exception(self, request, exception):
+        """process_exception вложенных middleware для полной цепочки."""
+        if self.is_lean(request):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие ответов с путями из settings.COMPRESSION['PATHS'].
+
+    Обычные ответы сжимаются, если они не меньше MIN_SIZE байт
+    и сжатие уменьшает их; потоковые - всегда и по мере отдачи.
+    Страницы сайта не сжимаются: в них есть CSRF-токены (атака BREACH).
+    """
+
+    def process_response(self, request, response):
+        """Сжатие ответа в кодировку, принимаемую клиентом."""
+        config = settings.COMPRESSION
+        if (not request.path_info.startswith(tuple(config['PATHS']))
+                or response.has_header('Content-Encoding')):
+            return response
+        if not response.streaming and len(response.content) < (
+                config['MIN_SIZE']):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encodings = accepted_encodings(request)
+        if not encodings:
+            return response
+        encoding = encodings[0]
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class ServerTimingMiddleware(HybridMiddleware):
+    """Заголовок Server-Timing с замерами обработки запроса.
+
+    В заголовке - число SQL-запросов и время работы с БД, время
+    представления, рендеринга ответа и всего запроса; без
+    settings.SERVER_TIMING['PUBLIC'] он виден только администраторам
+    и запросам с токеном (api.timing.is_timing_visible). При LOG
+    замеры пишутся в лог api.timing вместе с именем viewset
+    и действия. При выключенных замерах middleware не подключается.
+    """
+
+    setting = 'SERVER_TIMING'
+
+    def start(self, request):
+        """Отдельные замеры для запроса."""
+        return start_timing()
+
+    def finish(self, request, token):
+        """Замеры запроса."""
+        return finish_timing(token)
+
+    def process_response(self, request, response, timings):
+        """Замеры в заголовке, если он виден клиенту, и в логе."""
+        return self.add_timings(request, response, timings,
+                                is_timing_visible(request))
+
+    async def aprocess_response(self, request, response, timings):
+        """Асинхронный вариант: права клиента проверяются через БД."""
+        visible = settings.SERVER_TIMING['PUBLIC'] or (
+            await sync_to_async(is_timing_visible)(request)
+        )
+        return self.add_timings(request, response, timings, visible)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Начало отсчета времени представления."""
+        timings = current_timings()
+        if timings is not None:
+            timings.view_started(view_name(view_func, request))
+
+    def process_template_response(self, request, response):
+        """Конец работы представления и замер рендеринга ответа."""
+        timings = current_timings()
+        if timings is not None and not response.is_rendered:
+            timings.view_finished()
+            response.add_post_render_callback(
+                lambda rendered: timings.render_finished()
+            )
+        return response
+
+    @staticmethod
+    def add_timings(request, response, timings, visible):
+        """Заголовок Server-Timing и запись замеров в лог."""
+        total = timings.finish()
+        if visible:
+            response['Server-Timing'] = timings.header(total)
+        if settings.SERVER_TIMING['LOG']:
+            timing_logger.info(
+                '%s %s %s %s queries=%d db=%.2fms view=%.2fms '
+                'render=%.2fms total=%.2fms',
+                request.method, request.path, response.status_code,
+                timings.view_name or '-', timings.queries,
+                timings.db * 1000, (timings.view or 0) * 1000,
+                (timings.render or 0) * 1000, total * 1000
+            )
+        return response
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Учет запросов в метриках Prometheus (api.metrics).
+
+    Число SQL-запросов и время работы с БД берутся из замеров
+    api.timing; если ServerTimingMiddleware выключена, замеры
+    запроса начинает эта middleware.
+    """
+
+    setting = 'METRICS'
+
+    def start(self, request):
+        """Время начала запроса и, при необходимости, замеры."""
+        return time.perf_counter(), start_request_timing()
+
+    def finish(self, request, state):
+        """Время начала и замеры запроса."""
+        started, token = state
+        return started, finish_request_timing(token)
+
+    def process_response(self, request, response, state):
+        """Запись времени, статуса и числа SQL-запросов маршрута."""
+        started, timings = state
+        match = request.resolver_match
+        route = match.url_name if match and match.url_name else 'unmatched'
+        observe_request(route, request.method, response.status_code,
+                        time.perf_counter() - started, timings)
+        return response
+
+
+class QueryBudgetMiddleware(HybridMiddleware):
+    """Проверка числа SQL-запросов по бюджетам api.query_budget.
+
+    Для тестовых стендов: при выключенной проверке
+    (settings.QUERY_BUDGET['ENABLED']) middleware не подключается.
+    Число запросов берется из замеров api.timing; если замеры
+    не начаты другими middleware, их начинает эта.
+    """
+
+    setting = 'QUERY_BUDGET'
+
+    def start(self, request):
+        """Замеры запроса, если их не начали другие middleware."""
+        return start_request_timing()
+
+    def finish(self, request, token):
+        """Замеры запроса."""
+        return finish_request_timing(token)
+
+    def process_response(self, request, response, timings):
+        """Сравнение числа SQL-запросов с бюджетом маршрута."""
+        match = request.resolver_match
+        if match and match.url_name:
+            check_query_budget(match.url_name, request.method,
+                               timings.queries)
+        return response
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """Профилирование запросов по заголовку администратора или выборке.
+
+    При выключенном профилировании (settings.PROFILING['ENABLED'])
+    middleware не подключается. Имя сохраненного профиля возвращается
+    в заголовке X-Profile-Id.
+    """
+
+    setting = 'PROFILING'
+
+    @staticmethod
+    def start_profile(requested):
+        """Начатый профиль запроса или None, если он не профилируется."""
+        if not requested:
+            return None
+        return RequestProfile(profiler_kind()).__enter__()
+
+    def start(self, request):
+        """Профиль запроса по выборке или по заголовку."""
+        return self.start_profile(should_profile(request))
+
+    async def astart(self, request):
+        """Асинхронный вариант: права клиента проверяются через БД."""
+        return self.start_profile(is_sampled() or (
+            settings.PROFILING['HEADER'] in request.META
+            and await sync_to_async(is_requested_by_admin)(request)
+        ))
+
+    def finish(self, request, profile):
+        """Окончание профилирования."""
+        if profile is not None:
+            profile.__exit__(None, None, None)
+        return profile
+
+    def process_response(self, request, response, profile):
+        """Сохранение профиля и его имя в заголовке X-Profile-Id."""
+        if profile is not None:
+            response['X-Profile-Id'] = save_profile(profile, request,
+                                                    response)
+        return response
+
+    async def aprocess_response(self, request, response, profile):
+        """Асинхронный вариант: профиль сохраняется в потоке."""
+        if profile is not None:
+            response['X-Profile-Id'] = await sync_to_async(save_profile)(
+                profile, request, response
+            )
+        return response
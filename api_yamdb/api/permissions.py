@@ -3,6 +3,37 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 
+def _cached_role_check(request, cache_key, check):
+    """Проверка роли пользователя с запоминанием результата на время запроса.
+
+    Права проверяются несколькими пермишенами (и на уровне запроса,
+    и на уровне объекта), поэтому решение сохраняется в самом запросе.
+    """
+    role_cache = getattr(request, '_role_cache', None)
+    if role_cache is None:
+        role_cache = request._role_cache = {}
+    if cache_key not in role_cache:
+        user = request.user
+        role_cache[cache_key] = bool(user.is_authenticated and check(user))
+    return role_cache[cache_key]
+
+
+def is_admin_or_superuser(request):
+    """Пользователь запроса - администратор или суперюзер Django."""
+    return _cached_role_check(
+        request, 'admin_or_superuser',
+        lambda user: user.is_admin or user.is_superuser
+    )
+
+
+def is_admin_or_moderator(request):
+    """Пользователь запроса - администратор или модератор."""
+    return _cached_role_check(
+        request, 'admin_or_moderator',
+        lambda user: user.is_moderator or user.is_admin
+    )
+
+
 class AdminOrReadOnlyPermission(BasePermission):
     """Разрешения на доступ к произведениям, категориям и жанрам.
 
@@ -14,8 +45,7 @@ class AdminOrReadOnlyPermission(BasePermission):
         """Разрешения на уровне запроса к произведениям,категориям и жанрам."""
         if request.method in SAFE_METHODS:
             return True
-        return (request.user.is_authenticated
-                and (request.user.is_admin or request.user.is_superuser))
+        return is_admin_or_superuser(request)
 
 
 class AdminOnlyPermission(BasePermission):
@@ -27,8 +57,7 @@ class AdminOnlyPermission(BasePermission):
 
     def has_permission(self, request, view):
         """Разрешения на уровне запроса к данным пользователей."""
-        return (request.user.is_authenticated
-                and (request.user.is_admin or request.user.is_superuser))
+        return is_admin_or_superuser(request)
 
 
 class AuthorAdminModeratorOrReadOnlyPermission(BasePermission):
@@ -41,12 +70,14 @@ class AuthorAdminModeratorOrReadOnlyPermission(BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        """Разрешения на уровне объекта к отзывам и комментариям."""
+        """Разрешения на уровне объекта к отзывам и комментариям.
+
+        Автор сравнивается по author_id, без загрузки объекта автора из БД.
+        """
         if request.method in SAFE_METHODS:
             return True
-        return (obj.author == request.user
-                or request.user.is_moderator
-                or request.user.is_admin)
+        return (obj.author_id == request.user.id
+                or is_admin_or_moderator(request))
 
 
 # class RewiewValidatePermission(BasePermission):
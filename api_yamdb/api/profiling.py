@@ -0,0 +1,193 @@
+"""Профилирование отдельных запросов по требованию.
+
+Запрос профилируется, если в нем есть заголовок
+settings.PROFILING['HEADER'] и JWT-токен администратора, или если он
+попал в случайную выборку с долей SAMPLE_RATE. Профиль снимается
+cProfile или, если PROFILER = 'pyinstrument' и пакет установлен,
+семплирующим профилировщиком pyinstrument. Результат сохраняется
+в каталог DIR под именем из времени и маршрута запроса, рядом -
+описание запроса в JSON; хранятся последние MAX_FILES профилей.
+Команда profiles выводит самые медленные профили и их сводку.
+
+При запуске через ASGI представления чтения работают в потоках пула;
+cProfile профилирует только свой поток, поэтому работа в пуле
+профилируется отдельно (profile_call) и добавляется к профилю запроса.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:  # pyinstrument - необязательная зависимость
+    SamplingProfiler = None
+
+CPROFILE = 'cprofile'
+PYINSTRUMENT = 'pyinstrument'
+SUFFIXES = {CPROFILE: '.prof', PYINSTRUMENT: '.pyisession'}
+META_SUFFIX = '.json'
+
+_active = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Профиль одного запроса."""
+
+    def __init__(self, kind):
+        """Профилировщик выбранного вида; дополнительные - для пула."""
+        self.kind = kind
+        self.profiler = (SamplingProfiler() if kind == PYINSTRUMENT
+                         else cProfile.Profile())
+        self.extra = []
+        self.started = None
+        self.duration = None
+
+    def __enter__(self):
+        """Начало профилирования."""
+        self.token = _active.set(self)
+        self.started = time.perf_counter()
+        if self.kind == PYINSTRUMENT:
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Окончание профилирования."""
+        if self.kind == PYINSTRUMENT:
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+        self.duration = time.perf_counter() - self.started
+        _active.reset(self.token)
+
+    def save(self, path):
+        """Сохранение профиля в файл."""
+        if self.kind == PYINSTRUMENT:
+            self.profiler.last_session.save(path)
+            return
+        stats = pstats.Stats(self.profiler)
+        for profiler in self.extra:
+            stats.add(profiler)
+        stats.dump_stats(path)
+
+
+def profiler_kind():
+    """Вид профилировщика: pyinstrument, только если он установлен."""
+    if settings.PROFILING['PROFILER'] == PYINSTRUMENT and SamplingProfiler:
+        return PYINSTRUMENT
+    return CPROFILE
+
+
+def profile_call(func, *args, **kwargs):
+    """Вызов func с профилированием, если запрос профилируется.
+
+    Нужен для кода запроса, который выполняется в другом потоке.
+    """
+    profile = _active.get()
+    if profile is None or profile.kind != CPROFILE:
+        return func(*args, **kwargs)
+    profiler = cProfile.Profile()
+    profile.extra.append(profiler)
+    return profiler.runcall(func, *args, **kwargs)
+
+
+def is_requested_by_admin(request):
+    """Заголовок профилирования с действительным токеном администратора."""
+    if settings.PROFILING['HEADER'] not in request.META:
+        return False
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    if result is None:
+        return False
+    user = result[0]
+    return bool(user.is_admin or user.is_superuser)
+
+
+def is_sampled():
+    """Попадание запроса в случайную выборку SAMPLE_RATE."""
+    rate = settings.PROFILING['SAMPLE_RATE']
+    return rate > 0 and random.random() < rate
+
+
+def should_profile(request):
+    """Профилировать ли запрос: по выборке или по заголовку."""
+    return is_sampled() or is_requested_by_admin(request)
+
+
+def route_name(request):
+    """Имя маршрута запроса для имени файла профиля."""
+    match = request.resolver_match
+    return match.url_name if match and match.url_name else 'unmatched'
+
+
+def save_profile(profile, request, response):
+    """Сохранение профиля и описания запроса; возвращает имя профиля."""
+    directory = settings.PROFILING['DIR']
+    os.makedirs(directory, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime('%Y%m%dT%H%M%S', time.localtime(now))
+    name = (f'{stamp}.{int(now * 1000) % 1000:03d}'
+            f'_{route_name(request)}_{request.method}_{os.getpid()}')
+    profile.save(os.path.join(directory, name + SUFFIXES[profile.kind]))
+    meta = {
+        'name': name,
+        'profiler': profile.kind,
+        'route': route_name(request),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'duration_ms': round(profile.duration * 1000, 3),
+        'time': stamp,
+    }
+    with open(os.path.join(directory, name + META_SUFFIX), 'w',
+              encoding='utf-8') as output:
+        json.dump(meta, output, ensure_ascii=False)
+    prune(directory, settings.PROFILING['MAX_FILES'])
+    return name
+
+
+def list_profiles(directory=None):
+    """Описания сохраненных профилей."""
+    directory = directory or settings.PROFILING['DIR']
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for filename in os.listdir(directory):
+        if not filename.endswith(META_SUFFIX):
+            continue
+        with open(os.path.join(directory, filename),
+                  encoding='utf-8') as source:
+            meta = json.load(source)
+        meta['file'] = os.path.join(directory,
+                                    meta['name'] + SUFFIXES[meta['profiler']])
+        profiles.append(meta)
+    return profiles
+
+
+def prune(directory, max_files):
+    """Удаление самых старых профилей сверх max_files.
+
+    Имена профилей начинаются со времени, поэтому сортировка имен
+    файлов - сортировка по времени.
+    """
+    names = sorted(filename[:-len(META_SUFFIX)]
+                   for filename in os.listdir(directory)
+                   if filename.endswith(META_SUFFIX))
+    for name in names[:max(len(names) - max_files, 0)]:
+        for suffix in (*SUFFIXES.values(), META_SUFFIX):
+            path = os.path.join(directory, name + suffix)
+            if os.path.exists(path):
+                os.remove(path)
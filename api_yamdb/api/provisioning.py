@@ -0,0 +1,95 @@
+"""Массовое создание пользователей для эндпойнта и management command."""
+
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from api.serializers import BulkUserSerializer
+from api.utils import chunks
+from users.hashing import hash_passwords
+from users.models import CustomUser
+
+BULK_CREATE_BATCH_SIZE = 500
+
+
+def _existing_values(field, values):
+    """Значения поля field из values, уже занятые в БД."""
+    existing = set()
+    for chunk in chunks(values):
+        existing.update(CustomUser.objects.filter(
+            **{f'{field}__in': chunk}
+        ).values_list(field, flat=True))
+    return existing
+
+
+def _check_uniqueness(valid_rows, errors):
+    """Проверка уникальности username и email по всей пачке сразу.
+
+    Повтор внутри пачки - ошибка у всех строк, кроме первой;
+    совпадение с существующим пользователем - ошибка строки.
+    """
+    messages = {
+        'username': 'Пользователь с таким именем уже существует.',
+        'email': 'Пользователь с такой почтой уже существует.',
+    }
+    for field, message in messages.items():
+        taken = _existing_values(
+            field, {data[field] for _, data in valid_rows}
+        )
+        seen = set()
+        for index, data in valid_rows:
+            value = data[field]
+            if value in taken or value in seen:
+                errors.setdefault(index, {})[field] = [message]
+            seen.add(value)
+    return [(index, data) for index, data in valid_rows
+            if index not in errors]
+
+
+def provision_users(rows, workers=None, batch_size=BULK_CREATE_BATCH_SIZE):
+    """Валидация, хэширование паролей и вставка пачки пользователей.
+
+    Пароли хэшируются в пуле процессов, пользователи вставляются
+    через bulk_create в одной транзакции. Возвращается отчет
+    с количеством созданных пользователей, ошибками по номерам строк
+    и пропускной способностью (созданных пользователей в секунду).
+    """
+    started = time.perf_counter()
+    workers = workers or getattr(settings, 'BULK_USERS_HASH_WORKERS', None)
+    errors = {}
+    valid_rows = []
+    for index, row in enumerate(rows):
+        serializer = BulkUserSerializer(data=row)
+        if serializer.is_valid():
+            valid_rows.append((index, dict(serializer.validated_data)))
+        else:
+            errors[index] = serializer.errors
+    valid_rows = _check_uniqueness(valid_rows, errors)
+
+    passwords = [data.pop('password', None) for _, data in valid_rows]
+    users = [
+        CustomUser(password=encoded, **data)
+        for (_, data), encoded in zip(valid_rows,
+                                      hash_passwords(passwords, workers))
+    ]
+    created = 0
+    try:
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users, batch_size=batch_size)
+        created = len(users)
+    except IntegrityError:
+        for index, _ in valid_rows:
+            errors[index] = {'non_field_errors': [
+                'Произошла ошибка при создании пользователя.'
+                'Пожалуйста, проверьте введенные данные и попробуйте снова'
+            ]}
+
+    elapsed = time.perf_counter() - started
+    return {
+        'created': created,
+        'errors': [{'row': index, 'errors': row_errors}
+                   for index, row_errors in sorted(errors.items())],
+        'elapsed': round(elapsed, 3),
+        'rows_per_second': round(created / elapsed, 1) if elapsed else None,
+    }
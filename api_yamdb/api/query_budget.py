@@ -0,0 +1,93 @@
+"""Бюджеты SQL-запросов эндпойнтов API.
+
+QUERY_BUDGETS - наибольшее число SQL-запросов на один запрос к маршруту
+(имя маршрута, метод) для пользователя с JWT-токеном (один запрос -
+загрузка пользователя). Бюджет не зависит от размера страницы: если
+сериализатор снова начнет загружать связанные объекты по одному (N+1),
+число запросов вырастет вместе со страницей и превысит бюджет.
+
+Бюджеты проверяют тесты (tests/test_24_query_budget.py), а при
+settings.QUERY_BUDGET['ENABLED'] - и QueryBudgetMiddleware на каждом
+запросе: превышение пишется в лог api.query_budget, а при RAISE
+вызывает исключение QueryBudgetExceeded (для тестовых стендов).
+Маршруты без бюджета не проверяются; у массового создания
+пользователей (users-bulk-create-users) число запросов зависит
+от числа строк.
+"""
+
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger('api.query_budget')
+
+QUERY_BUDGETS = {
+    # Число объектов, страница, жанры страницы (prefetch_related).
+    ('titles-list', 'GET'): 4,
+    # Категория, жанры (SlugListField), запись произведения и жанров.
+    ('titles-list', 'POST'): 9,
+    # Произведение с категорией и его жанры.
+    ('titles-detail', 'GET'): 3,
+    ('titles-detail', 'PUT'): 10,
+    ('titles-detail', 'PATCH'): 10,
+    # Каскадное удаление - по запросу на связанную модель, не на объект.
+    ('titles-detail', 'DELETE'): 11,
+    ('genres-list', 'GET'): 3,
+    ('genres-list', 'POST'): 3,
+    ('genres-detail', 'DELETE'): 6,
+    ('categories-list', 'GET'): 3,
+    ('categories-list', 'POST'): 3,
+    ('categories-detail', 'DELETE'): 6,
+    # Произведение, число отзывов, страница отзывов с авторами.
+    ('reviews-list', 'GET'): 4,
+    ('reviews-list', 'POST'): 4,
+    ('reviews-detail', 'GET'): 3,
+    ('reviews-detail', 'PUT'): 4,
+    ('reviews-detail', 'PATCH'): 4,
+    ('reviews-detail', 'DELETE'): 7,
+    ('comments-list', 'GET'): 4,
+    ('comments-list', 'POST'): 3,
+    ('comments-detail', 'GET'): 3,
+    ('comments-detail', 'PUT'): 4,
+    ('comments-detail', 'PATCH'): 4,
+    ('comments-detail', 'DELETE'): 5,
+    ('users-list', 'GET'): 3,
+    ('users-list', 'POST'): 4,
+    ('users-detail', 'GET'): 2,
+    ('users-detail', 'PATCH'): 3,
+    ('users-detail', 'DELETE'): 12,
+    ('users-get-current-user-info', 'GET'): 2,
+    ('users-get-current-user-info', 'PATCH'): 2,
+    ('signup', 'POST'): 4,
+    ('get_token', 'POST'): 2,
+}
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос выполнил больше SQL-запросов, чем бюджет маршрута."""
+
+
+def query_budget(route, method):
+    """Бюджет маршрута и метода или None; HEAD - как GET."""
+    if method == 'HEAD':
+        method = 'GET'
+    return QUERY_BUDGETS.get((route, method))
+
+
+def exceeded_budget(route, method, queries):
+    """Сообщение о превышении бюджета или None."""
+    budget = query_budget(route, method)
+    if budget is None or queries <= budget:
+        return None
+    return (f'{method} {route}: {queries} SQL-запросов '
+            f'при бюджете {budget}')
+
+
+def check_query_budget(route, method, queries):
+    """Запись превышения бюджета в лог или, при RAISE, исключение."""
+    message = exceeded_budget(route, method, queries)
+    if message is None:
+        return
+    if settings.QUERY_BUDGET['RAISE']:
+        raise QueryBudgetExceeded(message)
+    logger.warning('Превышен бюджет запросов: %s', message)
@@ -1,8 +1,10 @@
 """Сериализаторы для приложения API."""
 
+from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.utils import IntegrityError
-from rest_framework.relations import SlugRelatedField
+from rest_framework.relations import ManyRelatedField, SlugRelatedField
 from rest_framework.serializers import (CharField,
                                         EmailField,
                                         IntegerField,
@@ -14,6 +16,34 @@ from users.models import CustomUser
 from users.validators import validate_username
 
 
+class SlugListField(ManyRelatedField):
+    """Список slug связанных объектов, загружаемых одним запросом.
+
+    ManyRelatedField ищет объекты по одному на каждый slug.
+    """
+
+    def to_internal_value(self, data):
+        """Объекты по списку slug в порядке списка."""
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        if not all(isinstance(slug, str) for slug in data):
+            child.fail('invalid')
+        objects = {
+            getattr(obj, child.slug_field): obj
+            for obj in child.get_queryset().filter(
+                **{f'{child.slug_field}__in': data}
+            )
+        }
+        for slug in data:
+            if slug not in objects:
+                child.fail('does_not_exist', slug_name=child.slug_field,
+                           value=slug)
+        return [objects[slug] for slug in data]
+
+
 class UserSerializer(ModelSerializer):
     """Сериализатор создания и редактирования пользователей."""
 
@@ -37,6 +67,42 @@ class UserMeEditSerializer(UserSerializer):
     role = CharField(read_only=True)
 
 
+class BulkUserSerializer(UserSerializer):
+    """Сериализатор строки массового создания пользователей.
+
+    Уникальность username и email проверяется сразу для всей пачки
+    (см. api.provisioning), поэтому построчные запросы к БД отключены.
+    Пароль проверяется валидаторами settings.AUTH_PASSWORD_VALIDATORS.
+    """
+
+    username = CharField(
+        validators=[
+            UnicodeUsernameValidator(),
+            validate_username
+        ],
+        max_length=150,
+    )
+    email = EmailField(max_length=254)
+    password = CharField(write_only=True, required=False, max_length=128)
+
+    class Meta(UserSerializer.Meta):
+        """Определение полей сериализатора массового создания."""
+
+        fields = UserSerializer.Meta.fields + ('password',)
+
+    def validate(self, attrs):
+        """Проверка пароля с учетом остальных данных пользователя."""
+        password = attrs.get('password')
+        if password is not None:
+            user = CustomUser(**{name: value for name, value in attrs.items()
+                                 if name != 'password'})
+            try:
+                validate_password(password, user=user)
+            except DjangoValidationError as error:
+                raise ValidationError({'password': list(error.messages)})
+        return attrs
+
+
 class SignUpSerializer(ModelSerializer):
     """Сериализатор регистрации пользователей."""
 
@@ -155,10 +221,10 @@ class TitleSerializer(ModelSerializer):
         slug_field='slug',
         queryset=Category.objects.all()
     )
-    genre = SlugRelatedField(
+    genre = SlugListField(child_relation=SlugRelatedField(
         slug_field='slug',
-        queryset=Genre.objects.all(), many=True
-    )
+        queryset=Genre.objects.all()
+    ))
     rating = IntegerField(read_only=True,)
 
     class Meta:
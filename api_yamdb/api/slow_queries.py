@@ -0,0 +1,211 @@
+"""Журнал медленных SQL-запросов.
+
+Обертка SlowQueryLog подключается к каждому соединению с БД (как
+замеры api.timing) и записывает в лог api.slow_queries запросы,
+выполнявшиеся дольше settings.SLOW_QUERY_LOG['THRESHOLD_MS']: SQL,
+параметры (без PARAMS - только их типы), длительность,
+представление и место вызова в коде проекта, а для SELECT - план
+запроса (EXPLAIN QUERY PLAN в SQLite, EXPLAIN в PostgreSQL). План
+получается отдельным курсором, в обход оберток соединения, а внутри
+транзакции - в точке сохранения: ошибка EXPLAIN в PostgreSQL иначе
+прервала бы транзакцию запроса. Пачки executemany (массовые вставки) не
+записываются. Число записей ограничено (RATE в секунду с запасом
+BURST): лишние записи не пишутся, их число попадает в следующую
+запись. Лог пишется в файл строками JSON (SlowQueryFormatter),
+команда slow_queries ранжирует запросы по суммарному времени.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import transaction
+
+from api.timing import current_timings
+
+logger = logging.getLogger('api.slow_queries')
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+MAX_PARAM_LENGTH = 200
+EXPLAIN_PREFIXES = {'sqlite': 'EXPLAIN QUERY PLAN ',
+                    'postgresql': 'EXPLAIN '}
+# Обертки выполнения запросов и представлений: место вызова ищется
+# за их пределами.
+SKIPPED_FRAMES = tuple(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    for filename in ('slow_queries.py', 'timing.py', 'profiling.py',
+                     'cache.py', 'tiered_cache.py', 'async_views.py',
+                     'middleware.py')
+)
+
+
+def fingerprint(sql):
+    """SQL без различий в длине списков IN (...) для группировки."""
+    return IN_LIST_RE.sub('IN (...)', sql)
+
+
+def project_caller():
+    """Место вызова в коде проекта: 'файл:строка функция'."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if (frame.filename.startswith(base_dir)
+                and frame.filename not in SKIPPED_FRAMES):
+            filename = os.path.relpath(frame.filename, base_dir)
+            return f'{filename}:{frame.lineno} {frame.name}'
+    return None
+
+
+def explain(connection, sql, params):
+    """Строки плана запроса или None, если план получить нельзя."""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None or not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    savepoint = (transaction.atomic(using=connection.alias)
+                 if connection.in_atomic_block else nullcontext())
+    try:
+        with savepoint:
+            cursor = connection.create_cursor()
+            try:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+    except Exception as error:
+        return [f'EXPLAIN не выполнен: {error}']
+    if connection.vendor == 'sqlite':
+        return [row[3] for row in rows]
+    return [row[0] for row in rows]
+
+
+class SlowQueryLog:
+    """Обертка выполнения SQL, записывающая медленные запросы."""
+
+    def __init__(self, options=None):
+        """Настройки из settings.SLOW_QUERY_LOG или из options."""
+        options = dict(settings.SLOW_QUERY_LOG, **(options or {}))
+        self.threshold = options['THRESHOLD_MS'] / 1000
+        self.rate = options['RATE']
+        self.burst = options['BURST']
+        self.params = options['PARAMS']
+        self.tokens = self.burst
+        self.refilled = time.monotonic()
+        self.suppressed = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Выполнение запроса и запись в лог, если он медленный."""
+        if many:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        if duration >= self.threshold:
+            self.report(sql, params, duration, context)
+        return result
+
+    def allow(self):
+        """Разрешение записи по алгоритму маркерного ведра.
+
+        Возвращает число пропущенных до нее записей или None, если
+        запись пропускается.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens
+                              + (now - self.refilled) * self.rate)
+            self.refilled = now
+            if self.tokens < 1:
+                self.suppressed += 1
+                return None
+            self.tokens -= 1
+            suppressed, self.suppressed = self.suppressed, 0
+            return suppressed
+
+    def report(self, sql, params, duration, context):
+        """Запись медленного запроса в лог."""
+        suppressed = self.allow()
+        if suppressed is None:
+            return
+        timings = current_timings()
+        record = {
+            'sql': sql,
+            'fingerprint': fingerprint(sql),
+            'params': [
+                repr(param)[:MAX_PARAM_LENGTH] if self.params
+                else type(param).__name__ for param in params or ()
+            ],
+            'duration_ms': round(duration * 1000, 3),
+            'database': context['connection'].alias,
+            'view': timings.view_name if timings is not None else None,
+            'caller': project_caller(),
+            'plan': explain(context['connection'], sql, params),
+            'suppressed': suppressed,
+        }
+        logger.warning('Медленный запрос %.1f мс (%s): %s',
+                       record['duration_ms'],
+                       record['view'] or record['caller'],
+                       sql[:MAX_PARAM_LENGTH], extra={'slow_query': record})
+
+
+slow_query_log = SlowQueryLog()
+
+
+def install_slow_query_log(sender, connection, **kwargs):
+    """Подключение журнала медленных запросов к новому соединению."""
+    if slow_query_log not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_log)
+
+
+class SlowQueryFormatter(logging.Formatter):
+    """Запись лога медленных запросов одной строкой JSON."""
+
+    def format(self, record):
+        """Данные запроса с временем записи."""
+        data = getattr(record, 'slow_query', None)
+        if data is None:
+            data = {'message': record.getMessage()}
+        return json.dumps(dict(data, time=self.formatTime(record)),
+                          ensure_ascii=False)
+
+
+def read_log(path):
+    """Записи лога медленных запросов из файла и его ротированных копий."""
+    paths = [path] + [f'{path}.{index}' for index in range(1, 100)]
+    for log_path in paths:
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, encoding='utf-8') as source:
+            for line in source:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if 'fingerprint' in record:
+                    yield record
+
+
+def rank(records):
+    """Группы запросов по fingerprint по убыванию суммарного времени."""
+    groups = {}
+    for record in records:
+        group = groups.setdefault(record['fingerprint'], {
+            'fingerprint': record['fingerprint'], 'count': 0,
+            'total_ms': 0.0, 'max_ms': 0.0, 'views': set(), 'plan': None,
+        })
+        group['count'] += 1
+        group['total_ms'] += record['duration_ms']
+        if record['duration_ms'] >= group['max_ms']:
+            group['max_ms'] = record['duration_ms']
+            group['plan'] = record.get('plan')
+        group['views'].add(record.get('view') or record.get('caller') or '-')
+    result = sorted(groups.values(), key=lambda group: -group['total_ms'])
+    for group in result:
+        group['avg_ms'] = group['total_ms'] / group['count']
+        group['views'] = sorted(group['views'])
+    return result
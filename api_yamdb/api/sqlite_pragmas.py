@@ -0,0 +1,20 @@
+"""Настройка соединений с SQLite при их открытии.
+
+Значения PRAGMA берутся из settings.SQLITE_PRAGMAS и применяются
+к каждому новому соединению (сигнал connection_created). Режим WAL
+позволяет читать базу данных во время записи, а busy_timeout
+заставляет писателя подождать освобождения блокировки вместо
+немедленной ошибки "database is locked".
+"""
+
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Применение settings.SQLITE_PRAGMAS к новому соединению с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None) or {}
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
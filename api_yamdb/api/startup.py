@@ -0,0 +1,149 @@
+"""Измерение времени запуска процесса Django.
+
+Запуск измеряется в отдельном интерпретаторе: в текущем процессе все
+модули уже импортированы. Дочерний процесс (probe) выполняет по шагам
+django.setup(), создание WSGI-приложения и загрузку корневого URLconf
+(ее Django откладывает до первого запроса), замеряет импорт моделей
+и ready() каждого приложения и печатает результат в JSON. Время
+импорта каждого модуля берется из вывода python -X importtime.
+
+Модуль импортирует Django только внутри probe(), чтобы не искажать
+замеры.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Модули, которые не должны импортироваться при django.setup(): они
+# нужны только для обработки запросов (регистрации админки - только
+# для ее URL) и импортируются вместе с URLconf.
+DEFERRED_MODULES = (
+    'rest_framework.serializers',
+    'reviews.admin',
+    'users.admin',
+)
+# Модули, которые не должны импортироваться и вместе с URLconf:
+# их импортирует код конкретного эндпойнта при первом вызове.
+FIRST_USE_MODULES = (
+    'api.provisioning',
+    'concurrent.futures.process',
+)
+PROBE_CODE = 'from api.startup import probe; probe()'
+
+
+def _instrument_apps(timings):
+    """Замер import_models() и ready() каждого приложения."""
+    from django.apps import AppConfig
+
+    import_models = AppConfig.import_models
+
+    def timed_import_models(app_config):
+        started = time.perf_counter()
+        import_models(app_config)
+        timings[app_config.label] = {
+            'models': time.perf_counter() - started
+        }
+        ready = app_config.ready
+
+        def timed_ready():
+            started = time.perf_counter()
+            ready()
+            timings[app_config.label]['ready'] = (
+                time.perf_counter() - started
+            )
+
+        app_config.ready = timed_ready
+
+    AppConfig.import_models = timed_import_models
+
+
+def probe():
+    """Замеры запуска в текущем (новом) процессе; результат - в stdout."""
+    started = time.perf_counter()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    apps_timings = {}
+    _instrument_apps(apps_timings)
+    import django
+
+    phases = {}
+    django.setup()
+    phases['django_setup'] = time.perf_counter() - started
+    setup_modules = [name for name in DEFERRED_MODULES
+                     if name in sys.modules]
+
+    from django.core.wsgi import get_wsgi_application
+
+    phase_started = time.perf_counter()
+    get_wsgi_application()
+    phases['wsgi_application'] = time.perf_counter() - phase_started
+
+    from django.urls import get_resolver
+
+    phase_started = time.perf_counter()
+    get_resolver().url_patterns
+    phases['urlconf'] = time.perf_counter() - phase_started
+    phases['total'] = time.perf_counter() - started
+    json.dump({'phases': phases, 'apps': apps_timings,
+               'deferred_modules_at_setup': setup_modules,
+               'first_use_modules_at_urlconf': [
+                   name for name in FIRST_USE_MODULES if name in sys.modules
+               ],
+               'modules_count': len(sys.modules)}, sys.stdout)
+
+
+def parse_importtime(output):
+    """Строки вывода -X importtime: (модуль, собственное, общее время в с).
+
+    Модули возвращаются в порядке завершения их импорта.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue
+        modules.append((name.strip(), int(own) / 1e6,
+                        int(cumulative) / 1e6))
+    return modules
+
+
+def package_totals(modules):
+    """Суммарное собственное время импорта модулей каждого пакета."""
+    totals = {}
+    for name, own, _ in modules:
+        package = name.split('.')[0]
+        totals[package] = totals.get(package, 0) + own
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def profile_startup(importtime=True, python=None):
+    """Запуск probe() в новом интерпретаторе и разбор результатов.
+
+    importtime=False отключает -X importtime: он замедляет импорт,
+    и общее время запуска без него точнее.
+    """
+    from django.conf import settings
+
+    command = [python or sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, (str(settings.BASE_DIR), env.get('PYTHONPATH')))
+    )
+    result = subprocess.run(
+        command + ['-c', PROBE_CODE], cwd=settings.BASE_DIR, env=env,
+        capture_output=True, text=True, check=False
+    )
+    if result.returncode:
+        raise RuntimeError(
+            f'Процесс замера завершился с кодом {result.returncode}:\n'
+            f'{result.stderr[-2000:]}'
+        )
+    report = json.loads(result.stdout)
+    report['modules'] = parse_importtime(result.stderr)
+    return report
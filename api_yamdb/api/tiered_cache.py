@@ -0,0 +1,217 @@
+"""Двухуровневый кэш: LRU в памяти процесса перед общим кэшем Django.
+
+Первый уровень - LRU-кэш в памяти процесса, второй - общий для
+процессов кэш Django (settings.API_CACHE['BACKEND_ALIAS'], например
+файловый или в таблице SQLite). Ключи разделены по пространствам
+имен; каждое пространство имеет версию во втором уровне,
+и инвалидация - это увеличение версии: старые записи становятся
+недоступны и вытесняются по времени жизни. Версия кэшируется
+в процессе на VERSION_TIMEOUT секунд, поэтому другие процессы видят
+инвалидацию с такой задержкой, а процесс, изменивший данные, - сразу.
+Значение вычисляет только один поток процесса и (через блокировку
+во втором уровне) только один процесс, остальные ждут результата.
+Счетчики обращений процесса доступны через stats(), суммы по всем
+процессам - в метриках api.metrics.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from api.metrics import CACHE_REQUESTS, inc
+
+KEY_PREFIX = 'api'
+LOCK_STRIPES = 64
+WAIT_INTERVAL = 0.02
+MISSING = object()
+
+
+class LRUCache:
+    """Кэш в памяти процесса с вытеснением давно неиспользованных записей."""
+
+    def __init__(self, max_entries):
+        """Пустой кэш не больше чем на max_entries записей."""
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Значение по ключу или MISSING, если его нет или оно устарело."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        """Запись значения на timeout секунд с вытеснением старых записей."""
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Удаление всех записей."""
+        with self.lock:
+            self.entries.clear()
+
+
+class TieredCache:
+    """Кэш процесса перед общим кэшем с версиями пространств имен."""
+
+    def __init__(self, options=None):
+        """Настройки из settings.API_CACHE или из options."""
+        options = dict(settings.API_CACHE, **(options or {}))
+        self.enabled = options['ENABLED']
+        self.timeout = options['TIMEOUT']
+        self.local_timeout = options['LOCAL_TIMEOUT']
+        self.version_timeout = options['VERSION_TIMEOUT']
+        self.lock_timeout = options['LOCK_TIMEOUT']
+        self.alias = options['BACKEND_ALIAS']
+        self.local = LRUCache(options['LOCAL_MAX_ENTRIES'])
+        self.versions = {}
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.counters = dict.fromkeys(
+            ('local_hits', 'shared_hits', 'misses', 'sets',
+             'stampede_waits', 'invalidations'), 0
+        )
+
+    @property
+    def shared(self):
+        """Общий кэш второго уровня."""
+        return caches[self.alias]
+
+    @staticmethod
+    def make_key(namespace, key):
+        """Ключ записи: пространство имен и хэш произвольного ключа."""
+        digest = hashlib.blake2b(str(key).encode('utf-8'),
+                                 digest_size=16).hexdigest()
+        return f'{KEY_PREFIX}:{namespace}:{digest}'
+
+    def version(self, namespace):
+        """Текущая версия пространства имен (с кэшированием в процессе)."""
+        now = time.monotonic()
+        cached = self.versions.get(namespace)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        version_key = f'{KEY_PREFIX}:{namespace}:version'
+        version = self.shared.get(version_key)
+        if version is None:
+            self.shared.add(version_key, 1, timeout=None)
+            version = self.shared.get(version_key, 1)
+        self.versions[namespace] = (now + self.version_timeout, version)
+        return version
+
+    def lookup(self, namespace, key):
+        """Значение и уровень, где оно найдено (local, shared или miss)."""
+        full_key = self.make_key(namespace, key)
+        version = self.version(namespace)
+        value = self.local.get((full_key, version))
+        if value is not MISSING:
+            return value, 'local'
+        value = self.shared.get(full_key, MISSING, version=version)
+        if value is not MISSING:
+            self.local.set((full_key, version), value,
+                           min(self.local_timeout, self.timeout))
+            return value, 'shared'
+        return MISSING, 'miss'
+
+    def get(self, namespace, key):
+        """Значение из кэша процесса, затем из общего кэша, или MISSING.
+
+        Обращение учитывается в счетчиках и метриках.
+        """
+        value, level = self.lookup(namespace, key)
+        if level == 'miss':
+            self.counters['misses'] += 1
+            inc(CACHE_REQUESTS, namespace=namespace, result='miss')
+        else:
+            self.counters[f'{level}_hits'] += 1
+            inc(CACHE_REQUESTS, namespace=namespace, result=f'{level}_hit')
+        return value
+
+    def set(self, namespace, key, value, timeout=None, version=None):
+        """Запись значения в оба уровня кэша.
+
+        version - версия, прочитанная до вычисления значения: если
+        за время вычисления пространство инвалидировали, значение
+        запишется в уже устаревшую версию.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        full_key = self.make_key(namespace, key)
+        if version is None:
+            version = self.version(namespace)
+        self.shared.set(full_key, value, timeout, version=version)
+        self.local.set((full_key, version), value,
+                       min(self.local_timeout, timeout))
+        self.counters['sets'] += 1
+
+    def _wait_for(self, namespace, key):
+        """Ожидание значения, которое вычисляет другой процесс."""
+        self.counters['stampede_waits'] += 1
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            value = self.lookup(namespace, key)[0]
+            if value is not MISSING:
+                return value
+        return MISSING
+
+    def get_or_set(self, namespace, key, compute, timeout=None):
+        """Значение из кэша или результат compute(), сохраненный в кэш.
+
+        При промахе значение вычисляет один поток процесса; между
+        процессами право вычисления получает тот, кто первым записал
+        блокировку в общий кэш, остальные ждут до LOCK_TIMEOUT секунд.
+        """
+        value = self.get(namespace, key)
+        if value is not MISSING:
+            return value
+        full_key = self.make_key(namespace, key)
+        with self.locks[hash(full_key) % LOCK_STRIPES]:
+            value = self.lookup(namespace, key)[0]
+            if value is not MISSING:
+                return value
+            lock_key = f'{full_key}:lock'
+            if not self.shared.add(lock_key, 1, timeout=self.lock_timeout):
+                value = self._wait_for(namespace, key)
+                if value is not MISSING:
+                    return value
+            version = self.version(namespace)
+            try:
+                value = compute()
+                self.set(namespace, key, value, timeout, version)
+            finally:
+                self.shared.delete(lock_key)
+        return value
+
+    def invalidate(self, *namespaces):
+        """Инвалидация пространств имен увеличением их версий."""
+        for namespace in namespaces:
+            version_key = f'{KEY_PREFIX}:{namespace}:version'
+            try:
+                version = self.shared.incr(version_key)
+            except ValueError:
+                self.shared.add(version_key, 1, timeout=None)
+                version = self.shared.incr(version_key)
+            self.versions[namespace] = (
+                time.monotonic() + self.version_timeout, version
+            )
+            self.counters['invalidations'] += 1
+
+    def stats(self):
+        """Счетчики попаданий, промахов и вытеснений кэша процесса."""
+        return dict(self.counters, local_evictions=self.local.evictions,
+                    local_entries=len(self.local.entries))
@@ -0,0 +1,139 @@
+"""Замеры времени обработки запроса для заголовка Server-Timing.
+
+Для каждого запроса ServerTimingMiddleware собирает число SQL-запросов
+и время работы с БД, время представления и рендеринга ответа.
+Запросы к БД считает обертка record_query из connection.execute_wrapper;
+она подключается к каждому соединению при его создании, потому что
+при запуске через ASGI представления читают из БД в потоках пула,
+у которых свои соединения. Замеры текущего запроса хранятся
+в contextvars и видны и в этих потоках.
+
+Заголовок раскрывает устройство запросов к БД, поэтому без
+settings.SERVER_TIMING['PUBLIC'] он добавляется только для
+администраторов и запросов с общим токеном (is_timing_visible);
+запись в лог от этого не зависит.
+"""
+
+import hmac
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+class RequestTimings:
+    """Замеры одного запроса; время - в секундах."""
+
+    __slots__ = ('started', 'mark', 'queries', 'db', 'view', 'render',
+                 'view_name')
+
+    def __init__(self):
+        """Начало отсчета времени запроса."""
+        self.started = time.perf_counter()
+        self.mark = None
+        self.queries = 0
+        self.db = 0.0
+        self.view = None
+        self.render = None
+        self.view_name = None
+
+    def view_started(self, view_name):
+        """Начало работы представления."""
+        self.view_name = view_name
+        self.mark = time.perf_counter()
+
+    def view_finished(self):
+        """Представление вернуло ответ; дальше - рендеринг."""
+        now = time.perf_counter()
+        self.view = now - self.mark
+        self.mark = now
+
+    def render_finished(self):
+        """Ответ отрендерен."""
+        self.render = time.perf_counter() - self.mark
+
+    def finish(self):
+        """Завершение замеров; возвращает общее время запроса."""
+        now = time.perf_counter()
+        if self.view is None and self.mark is not None:
+            self.view = now - self.mark
+        return now - self.started
+
+    def header(self, total):
+        """Значение заголовка Server-Timing (время - в мс)."""
+        metrics = [
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"'
+        ]
+        for name in ('view', 'render'):
+            value = getattr(self, name)
+            if value is not None:
+                metrics.append(f'{name};dur={value * 1000:.2f}')
+        metrics.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+_timings = ContextVar('request_timings', default=None)
+
+
+def start_timing():
+    """Новые замеры для запроса; возвращает токен."""
+    return _timings.set(RequestTimings())
+
+
+def finish_timing(token):
+    """Восстановление состояния, бывшего до запроса; возвращает замеры."""
+    timings = _timings.get()
+    _timings.reset(token)
+    return timings
+
+
+def current_timings():
+    """Замеры текущего запроса или None."""
+    return _timings.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """Обертка выполнения SQL: число запросов и время работы с БД."""
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - started
+        timings.queries += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """Подключение record_query к новому соединению с БД."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def is_timing_visible(request):
+    """Показывать ли клиенту заголовок Server-Timing.
+
+    Пользователя запроса к API устанавливает DRF после аутентификации
+    по JWT, поэтому проверка выполняется после обработки запроса.
+    """
+    config = settings.SERVER_TIMING
+    if config['PUBLIC']:
+        return True
+    token = request.META.get(config['HEADER'], '')
+    if config['TOKEN'] and token and hmac.compare_digest(
+            token.encode(), config['TOKEN'].encode()):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated
+                and (user.is_superuser or getattr(user, 'is_admin', False)))
+
+
+def view_name(view_func, request):
+    """Имя представления: viewset.action для DRF, иначе имя функции."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__qualname__', repr(view_func))
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
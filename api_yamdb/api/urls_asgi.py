@@ -0,0 +1,13 @@
+"""Эндпойнты приложения API для ASGI с асинхронным чтением."""
+
+from django.urls import include, path
+
+from api import urls
+from api.async_views import async_patterns
+
+app_name = urls.app_name
+
+urlpatterns = [
+    path('v1/', include(async_patterns(urls.router_version_1.urls))),
+    path('v1/auth/', include((urls.auth_urls, 'auth'))),
+]
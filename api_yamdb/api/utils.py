@@ -0,0 +1,11 @@
+"""Вспомогательные функции приложения API."""
+
+# Ограничение на число параметров в одном запросе IN (...) для SQLite.
+LOOKUP_CHUNK_SIZE = 500
+
+
+def chunks(values, size=LOOKUP_CHUNK_SIZE):
+    """Разбиение значений на списки для запросов IN (...)."""
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
@@ -1,8 +1,9 @@
 """Представления для приложения API."""
 
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import EmailMessage
-from django.db.models import Avg
+from django.db.models import Avg, FloatField, OuterRef, Subquery
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
@@ -20,6 +21,13 @@ from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework_simplejwt.tokens import AccessToken
 
+from api.cache import (CATEGORIES,
+                       COMMENTS,
+                       GENRES,
+                       REVIEWS,
+                       TITLES,
+                       CachedListMixin,
+                       CachedRetrieveMixin)
 from api.filters import TitleFilter
 from api.permissions import (AdminOnlyPermission,
                              AdminOrReadOnlyPermission,
@@ -63,6 +71,36 @@ class UsersViewSet(ModelViewSet):
         serializer.save()
         return Response(serializer.data)
 
+    @action(methods=['POST'],
+            detail=False,
+            url_path='bulk')
+    def bulk_create_users(self, request):
+        """Массовое создание пользователей администратором.
+
+        Принимает список пользователей (пароль необязателен), возвращает
+        отчет с ошибками по номерам строк и пропускной способностью.
+        Модуль создания пользователей с пулом процессов импортируется
+        при первом вызове, а не при загрузке URLconf.
+        """
+        from api.provisioning import provision_users
+
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {'error': 'Ожидается непустой список пользователей.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(rows) > settings.BULK_USERS_MAX_ROWS:
+            return Response(
+                {'error': 'Слишком много пользователей в одном запросе: '
+                          f'максимум {settings.BULK_USERS_MAX_ROWS}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        report = provision_users(rows)
+        if not report['created']:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED)
+
 
 class APISignup(APIView):
     """Представление для регистрации пользователей."""
@@ -125,10 +163,21 @@ class APIGetToken(APIView):
                         status=status.HTTP_400_BAD_REQUEST)
 
 
-class TitleViewSet(ModelViewSet):
+class TitleViewSet(CachedListMixin, CachedRetrieveMixin, ModelViewSet):
     """Представление для произведений."""
 
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    queryset = Title.objects.annotate(
+        rating=Subquery(
+            Review.objects.filter(title=OuterRef('pk')).values(
+                'title'
+            ).annotate(rating=Avg('score')).values('rating'),
+            output_field=FloatField()
+        )
+    ).select_related('category').prefetch_related('genre').order_by(
+        'name', 'id'
+    )
+    read_from_replica = True
+    cache_namespace = TITLES
     serializer_class = TitleSerializer
     permission_classes = (AdminOrReadOnlyPermission,)
     pagination_class = LimitOffsetPagination
@@ -143,7 +192,8 @@ class TitleViewSet(ModelViewSet):
         return TitleSerializer
 
 
-class CategoryGenreViewSet(ListModelMixin,
+class CategoryGenreViewSet(CachedListMixin,
+                           ListModelMixin,
                            CreateModelMixin,
                            DestroyModelMixin,
                            GenericViewSet):
@@ -151,6 +201,7 @@ class CategoryGenreViewSet(ListModelMixin,
 
     permission_classes = (AdminOrReadOnlyPermission,)
     lookup_field = 'slug'
+    read_from_replica = True
     pagination_class = LimitOffsetPagination
     filter_backends = (SearchFilter,)
     search_fields = ('name',)
@@ -161,6 +212,7 @@ class CategoryViewSet(CategoryGenreViewSet):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_namespace = CATEGORIES
 
 
 class GenreViewSet(CategoryGenreViewSet):
@@ -168,12 +220,15 @@ class GenreViewSet(CategoryGenreViewSet):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_namespace = GENRES
 
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(CachedListMixin, CachedRetrieveMixin, ModelViewSet):
     """Представление для отзывов на произведения."""
 
     serializer_class = ReviewSerializer
+    read_from_replica = True
+    cache_namespace = REVIEWS
     permission_classes = (AuthorAdminModeratorOrReadOnlyPermission,
                           IsAuthenticatedOrReadOnly)
     pagination_class = LimitOffsetPagination
@@ -185,7 +240,7 @@ class ReviewViewSet(ModelViewSet):
     def get_queryset(self):
         """Получение списка отзывов на выбранное произведение."""
         title = self._get_title()
-        return title.reviews.all()
+        return title.reviews.select_related('author')
 
     def perform_create(self, serializer):
         """Создание отзыва на выбранное произведение."""
@@ -194,10 +249,12 @@ class ReviewViewSet(ModelViewSet):
         serializer.save(author=user, title=title)
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(CachedListMixin, CachedRetrieveMixin, ModelViewSet):
     """Представление для комментариев к отзывам."""
 
     serializer_class = CommentSerializer
+    read_from_replica = True
+    cache_namespace = COMMENTS
     permission_classes = (AuthorAdminModeratorOrReadOnlyPermission,
                           IsAuthenticatedOrReadOnly,)
     pagination_class = LimitOffsetPagination
@@ -209,7 +266,7 @@ class CommentViewSet(ModelViewSet):
     def get_queryset(self):
         """Получение списка комментариев на выбранный отзыв."""
         review = self._get_review()
-        return review.comments.all()
+        return review.comments.select_related('author')
 
     def perform_create(self, serializer):
         """Создание комментария на выбранный отзыв."""
@@ -1,9 +1,10 @@
-"""Интерфейс асинхронного серверного шлюза."""
+"""Интерфейс асинхронного шлюза веб-сервера."""
 
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'api_yamdb.urls_asgi')
 
 application = get_asgi_application()
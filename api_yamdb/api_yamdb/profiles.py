@@ -0,0 +1,179 @@
+"""Профили настроек проекта, выбираемые переменными окружения.
+
+Профиль задается переменной DJANGO_PROFILE: dev (по умолчанию) или
+production. В production по умолчанию выключен DEBUG, соединения
+с БД переиспользуются (CONN_MAX_AGE), а кэш хранится в файлах;
+секретный ключ и допустимые хосты обязательно задаются явно.
+Противоречивая конфигурация останавливает запуск с перечнем ошибок.
+"""
+
+import importlib.util
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+DEV = 'dev'
+PRODUCTION = 'production'
+PROFILES = (DEV, PRODUCTION)
+POSTGRESQL_ENGINE = 'django.db.backends.postgresql'
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'database': 'django.core.cache.backends.db.DatabaseCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def env_bool(name, default):
+    """Логическое значение переменной окружения."""
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ImproperlyConfigured(
+        f'Переменная окружения {name}: ожидается одно из значений '
+        f'{", ".join(TRUE_VALUES + FALSE_VALUES)}, получено "{value}".'
+    )
+
+
+def env_list(name, default=()):
+    """Список значений переменной окружения через запятую."""
+    value = os.getenv(name)
+    if not value:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def database_config(base_dir):
+    """Настройки БД по умолчанию: SQLite или PostgreSQL (DB_ENGINE)."""
+    engine = os.getenv('DB_ENGINE', SQLITE_ENGINE)
+    if engine == SQLITE_ENGINE:
+        return {
+            'ENGINE': engine,
+            'NAME': os.getenv('DB_NAME',
+                              os.path.join(base_dir, 'db.sqlite3')),
+        }
+    return {
+        'ENGINE': engine,
+        'NAME': os.getenv('DB_NAME', ''),
+        'USER': os.getenv('POSTGRES_USER', ''),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+    }
+
+
+def cache_config(profile, base_dir):
+    """Настройки кэша (DJANGO_CACHE_BACKEND, DJANGO_CACHE_LOCATION)."""
+    backend = os.getenv('DJANGO_CACHE_BACKEND',
+                        'file' if profile == PRODUCTION else 'locmem')
+    location = os.getenv('DJANGO_CACHE_LOCATION')
+    if backend == 'file' and not location:
+        location = os.path.join(base_dir, 'cache')
+    if backend == 'database' and not location:
+        location = 'api_cache'
+    config = {'BACKEND': CACHE_BACKENDS.get(backend, backend)}
+    if location:
+        config['LOCATION'] = location
+    return {'default': config}
+
+
+def _check_database(database):
+    """Ошибки настроек БД."""
+    if database['ENGINE'] == SQLITE_ENGINE:
+        return []
+    if database['ENGINE'] != POSTGRESQL_ENGINE:
+        return [f'DB_ENGINE: неподдерживаемая СУБД "{database["ENGINE"]}".']
+    errors = []
+    missing = [name for name, key in (('DB_NAME', 'NAME'),
+                                      ('POSTGRES_USER', 'USER'),
+                                      ('DB_HOST', 'HOST'))
+               if not database[key]]
+    if missing:
+        errors.append('PostgreSQL: не заданы переменные окружения '
+                      f'{", ".join(missing)}.')
+    if importlib.util.find_spec('psycopg2') is None:
+        errors.append('PostgreSQL: не установлен пакет psycopg2.')
+    return errors
+
+
+def _check_cache(cache):
+    """Ошибки настроек кэша."""
+    backend = cache['BACKEND']
+    if backend not in CACHE_BACKENDS.values():
+        return [f'DJANGO_CACHE_BACKEND: неизвестный кэш "{backend}", '
+                f'допустимые значения: {", ".join(CACHE_BACKENDS)}.']
+    if backend == CACHE_BACKENDS['memcached']:
+        errors = []
+        if not cache.get('LOCATION'):
+            errors.append('memcached: не задан DJANGO_CACHE_LOCATION.')
+        if importlib.util.find_spec('pymemcache') is None:
+            errors.append('memcached: не установлен пакет pymemcache.')
+        return errors
+    return []
+
+
+def _check_production(settings):
+    """Ошибки настроек, обязательных для профиля production."""
+    errors = []
+    if settings['DEBUG']:
+        errors.append('В профиле production DEBUG должен быть выключен.')
+    if not settings['SECRET_KEY_FROM_ENV']:
+        errors.append('В профиле production не задан DJANGO_SECRET_KEY.')
+    if not settings['ALLOWED_HOSTS'] or '*' in settings['ALLOWED_HOSTS']:
+        errors.append('В профиле production в DJANGO_ALLOWED_HOSTS нужно '
+                      'перечислить допустимые хосты.')
+    if settings['CACHES']['default']['BACKEND'] in (
+            CACHE_BACKENDS['locmem'], CACHE_BACKENDS['dummy']):
+        errors.append('В профиле production кэш должен быть общим для '
+                      'процессов: используйте file, database или memcached.')
+    if settings['SERVER_TIMING']['PUBLIC']:
+        errors.append('В профиле production заголовок Server-Timing '
+                      'раскрывал бы клиентам число SQL-запросов и время '
+                      'работы с БД: выключите SERVER_TIMING_PUBLIC '
+                      '(заголовок останется доступен администраторам '
+                      'и по SERVER_TIMING_TOKEN).')
+    if settings['METRICS']['ENABLED'] and not settings['METRICS']['TOKEN']:
+        errors.append('В профиле production эндпойнт /metrics доступен '
+                      'только с токеном: задайте METRICS_TOKEN или '
+                      'выключите METRICS_ENABLED.')
+    if settings['QUERY_BUDGET']['RAISE']:
+        errors.append('В профиле production превышение бюджета запросов '
+                      'не должно вызывать ошибку: выключите '
+                      'QUERY_BUDGET_RAISE.')
+    return errors
+
+
+def check_profile(settings):
+    """Проверка согласованности настроек профиля.
+
+    settings - словарь настроек (globals() модуля settings).
+    Возвращает список ошибок; пустой список - настройки согласованы.
+    """
+    errors = []
+    profile = settings['PROFILE']
+    if profile not in PROFILES:
+        errors.append(f'DJANGO_PROFILE: неизвестный профиль "{profile}", '
+                      f'допустимые значения: {", ".join(PROFILES)}.')
+    errors.extend(_check_database(settings['DATABASES']['default']))
+    errors.extend(_check_cache(settings['CACHES']['default']))
+    if profile == PRODUCTION:
+        errors.extend(_check_production(settings))
+    return errors
+
+
+def validate_profile(settings):
+    """Остановка запуска при несогласованных настройках профиля."""
+    errors = check_profile(settings)
+    if errors:
+        raise ImproperlyConfigured(
+            'Несогласованные настройки профиля '
+            f'{settings["PROFILE"]}:\n' + '\n'.join(errors)
+        )
@@ -3,19 +3,34 @@
 import os
 from datetime import timedelta
 
+from api_yamdb.profiles import (PRODUCTION,
+                                cache_config,
+                                database_config,
+                                env_bool,
+                                env_list,
+                                validate_profile)
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-SECRET_KEY = 'p&l%385148kslhtyn^##a1)ilz@4zqj=rq&agdol^##zgl9(vs'
+PROFILE = os.getenv('DJANGO_PROFILE', 'dev')
+
+SECRET_KEY_FROM_ENV = bool(os.getenv('DJANGO_SECRET_KEY'))
+
+SECRET_KEY = os.getenv(
+    'DJANGO_SECRET_KEY', 'p&l%385148kslhtyn^##a1)ilz@4zqj=rq&agdol^##zgl9(vs'
+)
 
-DEBUG = True
+DEBUG = env_bool('DJANGO_DEBUG', PROFILE != PRODUCTION)
 
-ALLOWED_HOSTS = ['*']
+ALLOWED_HOSTS = env_list(
+    'DJANGO_ALLOWED_HOSTS', () if PROFILE == PRODUCTION else ('*',)
+)
 
 INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'api.apps.ApiConfig',
     'reviews.apps.ReviewsConfig',
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -27,16 +42,34 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
+    'api.middleware.FullStackMiddleware',
+]
+
+# Middleware админки и страниц сайта; запросы к API (JWT, без сессий)
+# с путями из LEAN_MIDDLEWARE_PATHS их не проходят.
+FULL_STACK_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+LEAN_MIDDLEWARE_PATHS = ('/api/', '/static/', '/metrics')
 
-ROOT_URLCONF = 'api_yamdb.urls'
+# Middleware сессий, аутентификации и сообщений подключены через
+# FullStackMiddleware, которую проверки админки не распознают.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+# asgi.py подключает api_yamdb.urls_asgi с асинхронными представлениями.
+ROOT_URLCONF = os.getenv('DJANGO_ROOT_URLCONF', 'api_yamdb.urls')
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
@@ -58,11 +91,48 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+ASGI_APPLICATION = 'api_yamdb.asgi.application'
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    'default': dict(
+        database_config(BASE_DIR),
+        CONN_MAX_AGE=int(os.getenv(
+            'DJANGO_CONN_MAX_AGE', 60 if PROFILE == PRODUCTION else 0
+        )),
+    )
+}
+
+# Реплика для чтения (например, периодически копируемый файл SQLite,
+# см. команду sync_replica); без DB_REPLICA_NAME все идет в default.
+REPLICA_DATABASE = 'replica' if os.getenv('DB_REPLICA_NAME') else None
+
+if REPLICA_DATABASE:
+    DATABASES[REPLICA_DATABASE] = dict(
+        DATABASES['default'],
+        NAME=os.getenv('DB_REPLICA_NAME'),
+        TEST={'MIRROR': 'default'},
+    )
+    if os.getenv('DB_REPLICA_HOST'):
+        DATABASES[REPLICA_DATABASE]['HOST'] = os.getenv('DB_REPLICA_HOST')
+
+DATABASE_ROUTERS = ['api.db_router.ReplicaRouter']
+
+REPLICA_STICKY_COOKIE = 'use_primary_db'
+
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+
+CACHES = cache_config(PROFILE, BASE_DIR)
+
+# Двухуровневый кэш ответов API (api.cache, api.tiered_cache): LRU
+# в памяти процесса перед общим кэшем CACHES[BACKEND_ALIAS].
+API_CACHE = {
+    'ENABLED': env_bool('API_CACHE_ENABLED', True),
+    'BACKEND_ALIAS': 'default',
+    'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', 300)),
+    'LOCAL_MAX_ENTRIES': int(os.getenv('API_CACHE_LOCAL_MAX_ENTRIES', 1000)),
+    'LOCAL_TIMEOUT': 30,
+    'VERSION_TIMEOUT': 1,
+    'LOCK_TIMEOUT': 10,
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -95,6 +165,22 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static/'),)
 
+STATIC_ROOT = os.getenv('DJANGO_STATIC_ROOT',
+                        os.path.join(BASE_DIR, 'static_root'))
+
+# collectstatic сохраняет рядом с крупными файлами их сжатые копии.
+STATICFILES_STORAGE = 'api.compression.PrecompressedStaticFilesStorage'
+
+COMPRESSION = {
+    'PATHS': ('/api/',),
+    'MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', 1024)),
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'STATIC_EXTENSIONS': ('.yaml', '.json', '.js', '.css', '.html', '.svg',
+                          '.txt', '.csv'),
+    'STATIC_MAX_AGE': 365 * 24 * 60 * 60,
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -129,3 +215,106 @@ EMAIL_USE_SSL = False
 AUTH_USER_MODEL = 'users.CustomUser'
 
 LENGH_OF_TEXT = 30
+
+BULK_USERS_MAX_ROWS = 5000
+
+BULK_USERS_HASH_WORKERS = int(os.getenv('BULK_USERS_HASH_WORKERS', 0)) or None
+
+# Применяются к каждому соединению с SQLite (api.sqlite_pragmas);
+# пустое значение SQLITE_JOURNAL_MODE оставляет режим журнала как есть.
+SQLITE_PRAGMAS = {
+    name: value for name, value in (
+        ('journal_mode', os.getenv('SQLITE_JOURNAL_MODE', 'WAL')),
+        ('busy_timeout', int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))),
+        ('mmap_size', int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 ** 2))),
+        ('cache_size', int(os.getenv('SQLITE_CACHE_SIZE', -20000))),
+        ('synchronous', os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')),
+    ) if value != ''
+}
+
+# Замеры запроса (api.timing): число SQL-запросов и время работы с БД,
+# представления и рендеринга. LOG - запись замеров в лог api.timing;
+# PUBLIC - заголовок Server-Timing в каждом ответе, иначе - только
+# для администраторов и запросов с заголовком X-Server-Timing,
+# равным TOKEN. В профиле production заголовок по умолчанию закрыт.
+SERVER_TIMING = {
+    'ENABLED': env_bool('SERVER_TIMING_ENABLED', True),
+    'LOG': env_bool('SERVER_TIMING_LOG', False),
+    'PUBLIC': env_bool('SERVER_TIMING_PUBLIC', PROFILE != PRODUCTION),
+    'TOKEN': os.getenv('SERVER_TIMING_TOKEN', ''),
+    'HEADER': 'HTTP_X_SERVER_TIMING',
+}
+
+# Метрики Prometheus (api.metrics) на /metrics: файлы процессов
+# в DIR, TOKEN - необязательный токен для выгрузки, BUCKETS - границы
+# корзин гистограммы времени запроса в секундах. В профиле production
+# метрики по умолчанию выключены и включаются только вместе с TOKEN.
+METRICS = {
+    'ENABLED': env_bool('METRICS_ENABLED', PROFILE != PRODUCTION),
+    'DIR': os.getenv('METRICS_DIR', os.path.join(BASE_DIR, '.metrics')),
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                10.0),
+}
+
+# Журнал медленных SQL-запросов (api.slow_queries): запросы дольше
+# THRESHOLD_MS пишутся в FILE строками JSON, не больше RATE записей
+# в секунду (с запасом BURST); отчет - команда slow_queries. PARAMS -
+# писать значения параметров запросов (иначе только их типы).
+SLOW_QUERY_LOG = {
+    'ENABLED': env_bool('SLOW_QUERY_LOG_ENABLED', PROFILE != PRODUCTION),
+    'PARAMS': env_bool('SLOW_QUERY_LOG_PARAMS', PROFILE != PRODUCTION),
+    'THRESHOLD_MS': float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100)),
+    'RATE': float(os.getenv('SLOW_QUERY_LOG_RATE', 5)),
+    'BURST': int(os.getenv('SLOW_QUERY_LOG_BURST', 20)),
+    'FILE': os.getenv('SLOW_QUERY_LOG_FILE',
+                      os.path.join(BASE_DIR, 'slow_queries.log')),
+}
+
+# Профилирование запросов (api.profiling): по заголовку X-Profile
+# с JWT-токеном администратора или случайной доли SAMPLE_RATE запросов;
+# PROFILER - cprofile или pyinstrument (если установлен).
+PROFILING = {
+    'ENABLED': env_bool('PROFILING_ENABLED', False),
+    'HEADER': 'HTTP_X_PROFILE',
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', 0)),
+    'PROFILER': os.getenv('PROFILING_PROFILER', 'cprofile'),
+    'DIR': os.getenv('PROFILING_DIR', os.path.join(BASE_DIR, '.profiles')),
+    'MAX_FILES': int(os.getenv('PROFILING_MAX_FILES', 200)),
+}
+
+# Проверка бюджетов SQL-запросов эндпойнтов (api.query_budget) на
+# каждом запросе - для тестовых стендов: превышение пишется в лог,
+# при RAISE - вызывает исключение (ответ 500).
+QUERY_BUDGET = {
+    'ENABLED': env_bool('QUERY_BUDGET_ENABLED', False),
+    'RAISE': env_bool('QUERY_BUDGET_RAISE', False),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+        'slow_query': {'()': 'api.slow_queries.SlowQueryFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+        'slow_queries_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG['FILE'],
+            'maxBytes': 10 * 1024 ** 2,
+            'backupCount': 3,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'slow_query',
+        },
+    },
+    'loggers': {
+        'api': {'handlers': ['console'], 'level': 'INFO'},
+        'api.slow_queries': {'handlers': ['slow_queries_file'],
+                             'level': 'WARNING', 'propagate': False},
+    },
+}
+
+validate_profile(globals())
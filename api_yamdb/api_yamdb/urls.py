@@ -3,17 +3,32 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+from django.utils.functional import lazy
 from django.views.generic import TemplateView
 
+from api.compression import serve_static, versioned_static_url
+from api.metrics import metrics_view
+
+# Модули admin.py приложений загружаются вместе с URLconf, а не
+# при django.setup() (INSTALLED_APPS содержит SimpleAdminConfig).
+admin.autodiscover()
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path(
         'redoc/',
-        TemplateView.as_view(template_name='redoc.html'),
+        TemplateView.as_view(
+            template_name='redoc.html',
+            extra_context={'spec_url': lazy(versioned_static_url, str)(
+                'redoc.yaml'
+            )}
+        ),
         name='redoc'
     ),
     path('api/', include('api.urls', namespace='api')),
+    re_path(r'^static/(?P<path>.+)$', serve_static, name='static'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,12 @@
+"""Эндпойнты проекта для ASGI: API с асинхронными представлениями чтения."""
+
+from django.urls import include, path
+
+from api_yamdb import urls
+
+urlpatterns = [
+    path('api/', include('api.urls_asgi', namespace='api')),
+] + [
+    pattern for pattern in urls.urlpatterns
+    if getattr(pattern, 'namespace', None) != 'api'
+]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-19 04:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=100, verbose_name='Таблица')),
+                ('row_key', models.CharField(max_length=64, verbose_name='Первичный ключ строки')),
+                ('row_hash', models.CharField(max_length=32, verbose_name='Хэш строки')),
+            ],
+            options={
+                'verbose_name': 'Импортированная строка',
+                'verbose_name_plural': 'Импортированные строки',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importedrow',
+            constraint=models.UniqueConstraint(fields=('table', 'row_key'), name='unique_imported_row'),
+        ),
+    ]
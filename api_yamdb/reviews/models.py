@@ -27,6 +27,7 @@ class Category(models.Model):
         """Определение порядка объек-в Category по умолчанию и имени модели."""
 
         ordering = ('name',)
+        indexes = [models.Index(fields=['name'], name='category_name_idx')]
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
 
@@ -54,6 +55,7 @@ class Genre(models.Model):
         """Определение порядка объектов Genre по умолчанию и имени модели."""
 
         ordering = ('name',)
+        indexes = [models.Index(fields=['name'], name='genre_name_idx')]
         verbose_name = 'Жанр'
         verbose_name_plural = 'Жанры'
 
@@ -99,9 +101,19 @@ class Title(models.Model):
     )
 
     class Meta:
-        """Определение порядка объектов Title по умолчанию и имени модели."""
+        """Определение порядка объектов Title по умолчанию и имени модели.
+
+        Индексы: сортировка по названию и фильтры по году и категории
+        с той же сортировкой.
+        """
 
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['name'], name='title_name_idx'),
+            models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+            models.Index(fields=['category', 'name'],
+                         name='title_category_name_idx'),
+        ]
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
@@ -123,9 +135,16 @@ class GenreTitle(models.Model):
     )
 
     class Meta:
-        """Опред-ние порядка объек-в Title/Genre по умолч-ю и имени модели."""
+        """Опред-ние порядка объек-в Title/Genre по умолч-ю и имени модели.
+
+        Индекс (жанр, произведение) - для фильтра произведений по жанру.
+        """
 
         ordering = ('id',)
+        indexes = [
+            models.Index(fields=['genre', 'title'],
+                         name='genretitle_genre_title_idx'),
+        ]
         verbose_name = 'Произведение/Жанр'
         verbose_name_plural = 'Произведения/Жанры'
 
@@ -170,10 +189,15 @@ class Review(models.Model):
     class Meta:
         """Определение порядка объектов Review по умолчанию и имени модели.
 
-        Определение уникальности связки 'author_of_review' - 'title'.
+        Определение уникальности связки 'author_of_review' - 'title'
+        и индекса отзывов произведения по дате.
         """
 
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['title', '-pub_date'],
+                         name='review_title_pub_date_idx'),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         constraints = [
@@ -217,9 +241,50 @@ class Comment(models.Model):
         """Определение порядка объектов Review по умолчанию и имени модели."""
 
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['review', '-pub_date'],
+                         name='comment_review_pub_date_idx'),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         """Строк. представление объекта Comment по перв. 30 символам текста."""
         return self.text[:settings.LENGH_OF_TEXT]
+
+
+class ImportedRow(models.Model):
+    """Модель для хэшей строк, загруженных инкрементальным импортом CSV.
+
+    По хэшу определяется, изменилась ли строка выгрузки с прошлого
+    импорта (см. api.csv_upsert).
+    """
+
+    table = models.CharField(
+        'Таблица',
+        max_length=100
+    )
+    row_key = models.CharField(
+        'Первичный ключ строки',
+        max_length=64
+    )
+    row_hash = models.CharField(
+        'Хэш строки',
+        max_length=32
+    )
+
+    class Meta:
+        """Определение имени модели и уникальности связки таблица-ключ."""
+
+        verbose_name = 'Импортированная строка'
+        verbose_name_plural = 'Импортированные строки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['table', 'row_key'],
+                name='unique_imported_row'
+            )
+        ]
+
+    def __str__(self):
+        """Строковое представление объекта ImportedRow по таблице и ключу."""
+        return f'{self.table} - {self.row_key}'
@@ -0,0 +1,93 @@
+"""Параллельное хэширование паролей пользователей.
+
+Модуль намеренно не импортирует модели: функции из него передаются
+в дочерние процессы пула и должны импортироваться без готового реестра
+приложений Django.
+
+Пул процессов общий для всех вызовов в процессе и создается при первом
+вызове. Процессы пула запускаются через spawn, а не fork: хэширование
+вызывается и из запроса к API, а fork многопоточного процесса сервера
+может унаследовать захваченные другими потоками блокировки.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.contrib.auth.hashers import make_password
+
+# Меньше этого количества паролей запуск пула процессов не окупается.
+PARALLEL_HASHING_THRESHOLD = 16
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def default_workers():
+    """Количество процессов пула по умолчанию - по числу ядер."""
+    return os.cpu_count() or 1
+
+
+def get_pool(workers):
+    """Общий пул процессов хэширования с workers процессами."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def reset_pool(pool):
+    """Отказ от сломанного пула: следующий вызов создаст новый."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def hash_in_pool(raw_passwords, workers):
+    """Хэширование паролей в общем пуле процессов.
+
+    Если процесс пула аварийно завершился, пул пересоздается
+    при следующем вызове, а пароли хэшируются в текущем процессе.
+    """
+    pool = get_pool(workers)
+    chunksize = max(1, len(raw_passwords) // (workers * 4))
+    try:
+        return list(pool.map(make_password, raw_passwords,
+                             chunksize=chunksize))
+    except BrokenProcessPool:
+        reset_pool(pool)
+        return [make_password(password) for password in raw_passwords]
+
+
+def hash_passwords(passwords, workers=None):
+    """Хэширование списка паролей с сохранением порядка.
+
+    Для пустых паролей (None) возвращается непригодный для входа хэш,
+    как у пользователей, созданных без пароля.
+    """
+    workers = workers or default_workers()
+    to_hash = [(index, password) for index, password in enumerate(passwords)
+               if password is not None]
+    hashed = [make_password(None) for _ in passwords]
+    if not to_hash:
+        return hashed
+    raw_passwords = [password for _, password in to_hash]
+    if workers == 1 or len(raw_passwords) < PARALLEL_HASHING_THRESHOLD:
+        results = map(make_password, raw_passwords)
+    else:
+        results = hash_in_pool(raw_passwords, workers)
+    for (index, _), encoded in zip(to_hash, results):
+        hashed[index] = encoded
+    return hashed
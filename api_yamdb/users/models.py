@@ -57,6 +57,17 @@ class CustomUser(AbstractUser):
         """Строковое представление объекта CustomUser по username."""
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Объект из БД с сохранением загруженных значений полей.
+
+        По ним при сохранении определяется, изменились ли данные,
+        попадающие в кэшированные ответы API (api.cache).
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     @property
     def is_admin(self):
         """Определение роли администратора."""
@@ -0,0 +1,169 @@
+"""Бенчмарк пропускной способности эндпойнтов чтения: WSGI и ASGI.
+
+Запросы выполняются внутри процесса, без сети: для WSGI -
+синхронным тестовым клиентом Django в пуле из --wsgi-workers потоков
+(как у многопоточного WSGI-сервера), для ASGI - асинхронным клиентом
+с --concurrency одновременных запросов в одном цикле событий
+и пулом из --asgi-threads потоков для работы с БД. Параметр
+--db-latency добавляет задержку к каждому SQL-запросу и моделирует
+медленную БД. Кэш API отключен, чтобы измерять работу представлений.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import setup_django
+
+URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/{title_id}/',
+    '/api/v1/genres/',
+    '/api/v1/categories/',
+    '/api/v1/titles/{title_id}/reviews/',
+)
+
+
+def summary(latencies, elapsed):
+    """Запросы в секунду и перцентили задержки в мс."""
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(quantiles[49] * 1000, 1),
+        'p95_ms': round(quantiles[94] * 1000, 1),
+        'p99_ms': round(quantiles[98] * 1000, 1),
+    }
+
+
+def use_urlconf(urlconf):
+    """Переключение корневого URLconf между прогонами."""
+    from django.conf import settings
+    from django.urls import clear_url_caches, set_urlconf
+
+    settings.ROOT_URLCONF = urlconf
+    clear_url_caches()
+    set_urlconf(None)
+
+
+def run_wsgi(urls, options):
+    """Прогон через синхронный клиент в пуле потоков."""
+    from django.test import Client
+
+    use_urlconf('api_yamdb.urls')
+
+    def request(url):
+        started = time.perf_counter()
+        response = Client().get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(options.wsgi_workers) as pool:
+        latencies = list(pool.map(request, urls))
+    return summary(latencies, time.perf_counter() - started)
+
+
+def run_asgi(urls, options):
+    """Прогон через асинхронный клиент с ограничением одновременности."""
+    from django.test import AsyncClient
+
+    use_urlconf('api_yamdb.urls_asgi')
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(options.asgi_threads))
+        semaphore = asyncio.Semaphore(options.concurrency)
+
+        async def request(url):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await AsyncClient().get(url)
+                assert response.status_code == 200, (
+                    url, response.status_code
+                )
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(request(url) for url in urls))
+        return summary(latencies, time.perf_counter() - started)
+
+    return asyncio.run(main())
+
+
+def add_db_latency(latency):
+    """Задержка каждого SQL-запроса во всех соединениях."""
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install, weak=False)
+
+
+def main():
+    """Подготовка данных и прогоны WSGI и ASGI."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--wsgi-workers', type=int, default=4)
+    parser.add_argument('--asgi-threads', type=int, default=4)
+    parser.add_argument('--db-latency', type=float, default=0.0,
+                        help='Задержка SQL-запроса в мс.')
+    parser.add_argument('--json', help='Файл для результатов в JSON.')
+    options = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_DEBUG', 'false')
+    os.environ.setdefault('DJANGO_ALLOWED_HOSTS', 'testserver')
+    os.environ['API_CACHE_ENABLED'] = 'false'
+    workdir = tempfile.mkdtemp(prefix='asgi_vs_wsgi_')
+    try:
+        setup_django(os.path.join(workdir, 'db.sqlite3'))
+        from django.conf import settings
+
+        # Как в профиле production: соединения потоков переиспользуются
+        # в обоих вариантах, а не открываются заново на каждый запрос.
+        settings.DATABASES['default']['CONN_MAX_AGE'] = 60
+        from django.core.management import call_command
+        from django.db import connections
+
+        from reviews.models import Title
+
+        call_command('migrate', verbosity=0)
+        call_command('generate_fake_data', users=500, titles=200,
+                     reviews=5000, comments=0, seed=1,
+                     stdout=open(os.devnull, 'w'))
+        title_ids = list(Title.objects.values_list('id', flat=True))
+        connections.close_all()
+        if options.db_latency:
+            add_db_latency(options.db_latency / 1000)
+        urls = [
+            URLS[number % len(URLS)].format(
+                title_id=title_ids[number % len(title_ids)]
+            )
+            for number in range(options.requests)
+        ]
+        results = {'wsgi': run_wsgi(urls, options),
+                   'asgi': run_asgi(urls, options)}
+        for name, result in results.items():
+            print(name, result)
+        if options.json:
+            with open(options.json, 'w', encoding='utf-8') as output:
+                json.dump(results, output, indent=2)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
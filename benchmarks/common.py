@@ -0,0 +1,30 @@
+"""Общая подготовка окружения Django для бенчмарков.
+
+Бенчмарки запускаются из корня репозитория, например:
+    python benchmarks/sqlite_concurrency.py
+"""
+
+import os
+import sys
+
+PROJECT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api_yamdb'
+)
+
+
+def setup_django(db_path=None, **overrides):
+    """Настройка Django; db_path - отдельный файл БД для бенчмарка.
+
+    overrides - значения настроек, заменяемые до django.setup().
+    """
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    from django.conf import settings
+
+    if db_path is not None:
+        settings.DATABASES['default']['NAME'] = db_path
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
@@ -0,0 +1,306 @@
+"""Бенчмарк эндпойнтов API на данных разного объема.
+
+Для каждого размера (--sizes) создается отдельная БД, заполняется
+командой generate_fake_data, и каждый эндпойнт из api/urls.py
+вызывается через тестовый клиент Django со всеми middleware:
+сначала прогрев, затем замеры в несколько раундов. Для эндпойнта
+записываются перцентили задержки (p50, p90, p99), число SQL-запросов
+на запрос и пик выделенной памяти за запрос (tracemalloc). Кэш API
+по умолчанию выключен, чтобы замерялась работа представлений.
+
+Результаты можно сохранить (--json) и сравнить с базовыми
+(--baseline, например benchmarks/baselines/endpoints.json): если
+медиана задержки или пик памяти выросли больше допустимого или
+SQL-запросов стало больше, бенчмарк завершается с кодом 1. Задержки
+зависят от машины и ее загрузки, поэтому допуск по умолчанию широкий,
+а базовые значения стоит снимать на той же машине, где выполняется
+сравнение; число запросов и память от машины не зависят.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import quote
+
+from common import setup_django
+
+SIZES = {
+    'small': dict(users=100, titles=200, genres=10, categories=5,
+                  reviews=2000, comments=1000),
+    'medium': dict(users=1000, titles=2000, genres=20, categories=10,
+                   reviews=20000, comments=10000),
+    'large': dict(users=10000, titles=20000, genres=40, categories=15,
+                  reviews=200000, comments=100000),
+}
+WARMUP = 5
+CONFIRMATION_CODE = 'benchmark-code'
+
+
+def percentile(values, fraction):
+    """Перцентиль отсортированного списка (ближайший ранг)."""
+    index = max(0, min(len(values) - 1,
+                       round(fraction * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def seed(size, seed_value):
+    """Новая БД с данными размера size; возвращает параметры эндпойнтов."""
+    from django.core.management import call_command
+    from django.db.models import Count
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from reviews.models import Category, Genre, Review, Title
+    from users.models import CustomUser
+
+    call_command('migrate', verbosity=0)
+    call_command('generate_fake_data', seed=seed_value,
+                 stdout=open(os.devnull, 'w'), **SIZES[size])
+    admin = CustomUser.objects.create(
+        username='benchmark_admin', email='benchmark_admin@example.com',
+        role=CustomUser.ADMIN, confirmation_code=CONFIRMATION_CODE
+    )
+    title = Title.objects.annotate(
+        reviews_count=Count('reviews')
+    ).order_by('-reviews_count', 'id').first()
+    review = Review.objects.annotate(
+        comments_count=Count('comments')
+    ).order_by('-comments_count', 'id').first()
+    return {
+        'title': title.id,
+        'year': title.year,
+        'name': title.name,
+        'genre': Genre.objects.order_by('id').first().slug,
+        'category': Category.objects.order_by('id').first().slug,
+        'review_title': review.title_id,
+        'review': review.id,
+        'comment': review.comments.order_by('id').first().id,
+        'username': CustomUser.objects.exclude(
+            pk=admin.pk
+        ).order_by('id').first().username,
+        'admin': admin.username,
+        'token': str(AccessToken.for_user(admin)),
+    }
+
+
+def endpoints(params):
+    """Эндпойнты: имя -> (метод, адрес, функция тела запроса или None)."""
+    title, review = params['title'], params['review']
+    reviews = f'/api/v1/titles/{params["review_title"]}/reviews'
+    counter = iter(range(10 ** 9))
+
+    def signup_body():
+        number = next(counter)
+        return {'username': f'benchmark_{number}',
+                'email': f'benchmark_{number}@example.com'}
+
+    return {
+        'titles-list': ('get', '/api/v1/titles/', None),
+        'titles-detail': ('get', f'/api/v1/titles/{title}/', None),
+        'titles-filter-genre': (
+            'get', f'/api/v1/titles/?genre={params["genre"]}', None
+        ),
+        'titles-filter-category': (
+            'get', f'/api/v1/titles/?category={params["category"]}', None
+        ),
+        'titles-filter-year': (
+            'get', f'/api/v1/titles/?year={params["year"]}', None
+        ),
+        'titles-search-name': (
+            'get', f'/api/v1/titles/?name={quote(params["name"])}', None
+        ),
+        'genres-list': ('get', '/api/v1/genres/', None),
+        'categories-list': ('get', '/api/v1/categories/', None),
+        'reviews-list': ('get', f'/api/v1/titles/{title}/reviews/', None),
+        'reviews-detail': ('get', f'{reviews}/{review}/', None),
+        'comments-list': ('get', f'{reviews}/{review}/comments/', None),
+        'comments-detail': (
+            'get', f'{reviews}/{review}/comments/{params["comment"]}/', None
+        ),
+        'users-list': ('get', '/api/v1/users/', None),
+        'users-detail': ('get', f'/api/v1/users/{params["username"]}/',
+                         None),
+        'users-me': ('get', '/api/v1/users/me/', None),
+        'signup': ('post', '/api/v1/auth/signup/', signup_body),
+        'token': ('post', '/api/v1/auth/token/', lambda: {
+            'username': params['admin'],
+            'confirmation_code': CONFIRMATION_CODE,
+        }),
+    }
+
+
+def make_call(client, method, url, body):
+    """Функция одного запроса к эндпойнту с проверкой статуса."""
+    def call():
+        kwargs = {}
+        if body is not None:
+            kwargs = {'data': json.dumps(body()),
+                      'content_type': 'application/json'}
+        response = getattr(client, method)(url, **kwargs)
+        assert response.status_code < 400, (url, response.status_code)
+        return response
+
+    return call
+
+
+def profile_call(call):
+    """Прогрев, число SQL-запросов и пик памяти одного запроса."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(WARMUP):
+        call()
+    with CaptureQueriesContext(connection) as queries:
+        call()
+    # Журнал запросов очищается в начале следующего запроса.
+    query_count = len(queries.captured_queries)
+    tracemalloc.start()
+    try:
+        call()
+        alloc_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'queries': query_count,
+            'alloc_peak_kb': round(alloc_peak / 1024, 1)}
+
+
+def time_call(call, requests):
+    """Отсортированные задержки requests запросов в мс."""
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)
+
+
+def run_size(size, options, workdir):
+    """Замеры всех эндпойнтов на данных одного размера.
+
+    Задержки замеряются в --rounds раундов по всем эндпойнтам;
+    для эндпойнта берется раунд с наименьшей медианой, чтобы
+    кратковременная фоновая нагрузка не искажала результат.
+    """
+    from django.conf import settings
+    from django.db import connections
+    from django.test import Client
+
+    connections['default'].close()
+    settings.DATABASES['default']['NAME'] = os.path.join(
+        workdir, f'{size}.sqlite3'
+    )
+    params = seed(size, options.seed)
+    client = Client(HTTP_AUTHORIZATION=f'Bearer {params["token"]}')
+    calls = {name: make_call(client, method, url, body)
+             for name, (method, url, body) in endpoints(params).items()
+             if not options.only or name in options.only}
+    results = {name: profile_call(call) for name, call in calls.items()}
+    best = {}
+    for _ in range(options.rounds):
+        for name, call in calls.items():
+            timings = time_call(call, options.requests)
+            if name not in best or (statistics.median(timings)
+                                    < statistics.median(best[name])):
+                best[name] = timings
+    for name, result in results.items():
+        timings = best[name]
+        result.update({
+            'p50_ms': round(statistics.median(timings), 3),
+            'p90_ms': round(percentile(timings, 0.9), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+        })
+        print(f'{size:6} {name:24} p50 {result["p50_ms"]:8.2f} мс  '
+              f'p90 {result["p90_ms"]:8.2f} мс  '
+              f'p99 {result["p99_ms"]:8.2f} мс  '
+              f'SQL {result["queries"]:3}  '
+              f'память {result["alloc_peak_kb"]:8.1f} КБ')
+    return results
+
+
+def compare(results, baseline, options):
+    """Регрессии относительно базовых значений."""
+    regressions = []
+    limits = (('p50_ms', options.max_latency_regression),
+              ('alloc_peak_kb', options.max_alloc_regression))
+    for size, size_results in results.items():
+        for name, result in size_results.items():
+            expected = baseline.get(size, {}).get(name)
+            if expected is None:
+                continue
+            for metric, limit in limits:
+                if result[metric] > expected[metric] * (1 + limit):
+                    regressions.append(
+                        f'{size} {name}: {metric} {result[metric]} '
+                        f'при базовом {expected[metric]}'
+                    )
+            if result['queries'] > (expected['queries']
+                                    + options.max_query_increase):
+                regressions.append(
+                    f'{size} {name}: SQL-запросов {result["queries"]} '
+                    f'при базовых {expected["queries"]}'
+                )
+    return regressions
+
+
+def main():
+    """Запуск бенчмарка, сравнение с базовыми значениями и отчет."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='small,medium',
+                        help=f'Размеры данных через запятую: '
+                             f'{", ".join(SIZES)}.')
+    parser.add_argument('--requests', type=int, default=30,
+                        help='Число замеров на эндпойнт в раунде.')
+    parser.add_argument('--rounds', type=int, default=3,
+                        help='Число раундов замеров.')
+    parser.add_argument('--only', nargs='*',
+                        help='Только эндпойнты с этими именами.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--cache', action='store_true',
+                        help='Не выключать кэш API.')
+    parser.add_argument('--json', help='Файл для результатов в JSON.')
+    parser.add_argument('--baseline', help='JSON с базовыми значениями.')
+    parser.add_argument('--max-latency-regression', type=float, default=1.0,
+                        help='Допустимый рост p50 (1.0 = 100%%).')
+    parser.add_argument('--max-alloc-regression', type=float, default=0.25,
+                        help='Допустимый рост пика памяти (0.25 = 25%%).')
+    parser.add_argument('--max-query-increase', type=int, default=0,
+                        help='Допустимый рост числа SQL-запросов.')
+    options = parser.parse_args()
+    sizes = [size.strip() for size in options.sizes.split(',')]
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        parser.error(f'неизвестные размеры: {", ".join(sorted(unknown))}')
+
+    workdir = tempfile.mkdtemp(prefix='endpoints_')
+    os.environ.setdefault('DJANGO_DEBUG', 'false')
+    os.environ.setdefault('DJANGO_ALLOWED_HOSTS', 'testserver')
+    os.environ['API_CACHE_ENABLED'] = str(options.cache).lower()
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['SLOW_QUERY_LOG_ENABLED'] = 'false'
+    try:
+        setup_django(
+            os.path.join(workdir, 'db.sqlite3'),
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+        )
+        results = {size: run_size(size, options, workdir) for size in sizes}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2)
+    if not options.baseline:
+        return 0
+    with open(options.baseline, encoding='utf-8') as baseline_file:
+        regressions = compare(results, json.load(baseline_file), options)
+    for regression in regressions:
+        print(f'Регрессия: {regression}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Микробенчмарк стоимости цепочки middleware на один запрос.
+
+Сравниваются полная цепочка (все middleware для всех путей, как
+было до FullStackMiddleware) и текущая settings.MIDDLEWARE, в которой
+запросы к /api/ не проходят через сессии, CSRF, аутентификацию
+Django, сообщения и X-Frame-Options. Запросы выполняются обработчиком
+Django напрямую, без сети; ответы API берутся из кэша, чтобы время
+работы представления не заслоняло разницу.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from common import setup_django
+
+FULL_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+URLS = ('/api/v1/categories/', '/api/v1/genres/', '/admin/login/')
+
+
+def make_handler(middleware):
+    """Обработчик запросов с заданной цепочкой middleware."""
+    from django.conf import settings
+    from django.core.handlers.base import BaseHandler
+
+    settings.MIDDLEWARE = middleware
+    handler = BaseHandler()
+    handler.load_middleware()
+    return handler
+
+
+def measure(handlers, url, requests, rounds):
+    """Лучшее время запроса в мкс для каждого обработчика.
+
+    Прогоны обработчиков чередуются, чтобы фоновая нагрузка
+    одинаково влияла на все варианты.
+    """
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    timings = {name: [] for name in handlers}
+    for _ in range(rounds):
+        for name, handler in handlers.items():
+            started = time.perf_counter()
+            for _ in range(requests):
+                response = handler.get_response(factory.get(url))
+                assert response.status_code == 200, (
+                    url, response.status_code
+                )
+            timings[name].append((time.perf_counter() - started) / requests)
+    return {name: round(min(values) * 1e6, 1)
+            for name, values in timings.items()}
+
+
+def main():
+    """Запуск бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--json', help='Файл для результатов в JSON.')
+    options = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_DEBUG', 'false')
+    os.environ.setdefault('DJANGO_ALLOWED_HOSTS', 'testserver')
+    workdir = tempfile.mkdtemp(prefix='middleware_chain_')
+    try:
+        setup_django(os.path.join(workdir, 'db.sqlite3'))
+        from django.conf import settings
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        call_command('generate_fake_data', users=10, titles=10, genres=5,
+                     categories=5, reviews=0, comments=0, seed=1,
+                     stdout=open(os.devnull, 'w'))
+        lean_middleware = list(settings.MIDDLEWARE)
+        handlers = {'full': make_handler(FULL_MIDDLEWARE),
+                    'lean': make_handler(lean_middleware)}
+        results = {}
+        for url in URLS:
+            results[url] = measure(handlers, url, options.requests,
+                                   options.rounds)
+            full, lean = results[url]['full'], results[url]['lean']
+            print(f'{url}: полная цепочка {full} мкс, '
+                  f'текущая {lean} мкс, разница {round(full - lean, 1)} мкс')
+        if options.json:
+            with open(options.json, 'w', encoding='utf-8') as output:
+                json.dump(results, output, indent=2)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Бенчмарк чтения каталога во время записи отзывов в SQLite.
+
+Одна и та же база данных нагружается дважды: со стандартными
+настройками SQLite и с settings.SQLITE_PRAGMAS (WAL, busy_timeout,
+mmap_size, cache_size, synchronous=NORMAL). Процессы-читатели
+выполняют запросы списка произведений с рейтингом и отзывов
+произведения, процессы-писатели в это время добавляют комментарии
+короткими транзакциями. Выводятся чтения и записи в секунду
+и количество ошибок "database is locked".
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from common import setup_django
+
+
+def reader(deadline, title_ids, results):
+    """Чтение каталога до deadline."""
+    from django.db import OperationalError
+    from django.db.models import Avg
+
+    from reviews.models import Review, Title
+
+    reads = locked = 0
+    position = 0
+    while time.time() < deadline:
+        title_id = title_ids[position % len(title_ids)]
+        position += 1
+        try:
+            list(Title.objects.annotate(rating=Avg('reviews__score'))
+                 .order_by('name')[:10])
+            list(Review.objects.filter(title_id=title_id)
+                 .select_related('author')[:10])
+            reads += 1
+        except OperationalError:
+            locked += 1
+    results.put(('read', reads, locked))
+
+
+def writer(deadline, review_ids, user_id, results):
+    """Добавление комментариев по одному в транзакции до deadline."""
+    from django.db import OperationalError, transaction
+
+    from reviews.models import Comment
+
+    writes = locked = 0
+    position = 0
+    while time.time() < deadline:
+        review_id = review_ids[position % len(review_ids)]
+        position += 1
+        try:
+            with transaction.atomic():
+                Comment.objects.create(review_id=review_id,
+                                       author_id=user_id, text='Нагрузка')
+            writes += 1
+        except OperationalError:
+            locked += 1
+    results.put(('write', writes, locked))
+
+
+def run(db_path, pragmas, options):
+    """Один прогон нагрузки; возвращает показатели в секунду."""
+    from django.conf import settings
+    from django.db import connections
+
+    from reviews.models import Review
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.SQLITE_PRAGMAS = pragmas
+    connections.close_all()
+    del connections['default']
+    review_ids = list(Review.objects.values_list('id', flat=True)[:1000])
+    title_ids = list(Review.objects.values_list('title_id', flat=True)
+                     .distinct()[:1000])
+    user_id = Review.objects.values_list('author_id', flat=True).first()
+    with connections['default'].cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+    connections.close_all()
+
+    results = multiprocessing.Queue()
+    deadline = time.time() + options.duration
+    processes = [
+        multiprocessing.Process(target=reader,
+                                args=(deadline, title_ids, results))
+        for _ in range(options.readers)
+    ] + [
+        multiprocessing.Process(target=writer,
+                                args=(deadline, review_ids, user_id, results))
+        for _ in range(options.writers)
+    ]
+    for process in processes:
+        process.start()
+    totals = {'read': [0, 0], 'write': [0, 0]}
+    for _ in processes:
+        kind, count, locked = results.get()
+        totals[kind][0] += count
+        totals[kind][1] += locked
+    for process in processes:
+        process.join()
+    return {
+        'journal_mode': journal_mode,
+        'reads_per_second': round(totals['read'][0] / options.duration, 1),
+        'writes_per_second': round(totals['write'][0] / options.duration, 1),
+        'locked_errors': totals['read'][1] + totals['write'][1],
+    }
+
+
+def prepare_database(db_path, options):
+    """Создание базы данных с синтетическими данными."""
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    call_command('generate_fake_data', users=options.users,
+                 titles=options.titles, reviews=options.reviews,
+                 comments=0, seed=1, stdout=open(os.devnull, 'w'))
+
+
+def main():
+    """Запуск бенчмарка со стандартными и настроенными PRAGMA."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--titles', type=int, default=500)
+    parser.add_argument('--reviews', type=int, default=50000)
+    parser.add_argument('--json', help='Файл для результатов в JSON.')
+    options = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='sqlite_concurrency_')
+    base_path = os.path.join(workdir, 'base.sqlite3')
+    setup_django(base_path)
+    from django.conf import settings
+    from django.db import connections
+
+    tuned_pragmas = dict(settings.SQLITE_PRAGMAS)
+    settings.SQLITE_PRAGMAS = {}
+    try:
+        prepare_database(base_path, options)
+        connections.close_all()
+        results = {}
+        for name, pragmas in (('default', {}), ('tuned', tuned_pragmas)):
+            db_path = os.path.join(workdir, f'{name}.sqlite3')
+            shutil.copyfile(base_path, db_path)
+            results[name] = run(db_path, pragmas, options)
+            print(name, results[name])
+        if options.json:
+            with open(options.json, 'w', encoding='utf-8') as output:
+                json.dump(results, output, indent=2)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
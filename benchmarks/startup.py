@@ -0,0 +1,65 @@
+"""Бенчмарк времени запуска процесса Django.
+
+Каждый прогон - новый интерпретатор (см. api.startup): django.setup(),
+создание WSGI-приложения и загрузка URLconf. Медианы этапов можно
+сохранить (--json) и сравнить с сохраненными ранее (--baseline):
+если этап стал медленнее больше чем на --max-regression, бенчмарк
+завершается с кодом 1.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+
+from common import setup_django
+
+
+def main():
+    """Прогоны, сравнение с базовыми значениями и отчет."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--baseline', help='JSON с базовыми медианами.')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Допустимое замедление этапа (0.2 = 20%%).')
+    parser.add_argument('--json', help='Файл для медиан в JSON.')
+    options = parser.parse_args()
+
+    setup_django()
+    from api.startup import profile_startup
+
+    reports = [profile_startup(importtime=False)
+               for _ in range(options.runs)]
+    medians = {
+        phase: round(statistics.median(
+            report['phases'][phase] for report in reports
+        ) * 1000, 1)
+        for phase in reports[0]['phases']
+    }
+    for phase, milliseconds in medians.items():
+        print(f'{phase}: {milliseconds} мс')
+    deferred = reports[0]['deferred_modules_at_setup'] + reports[0][
+        'first_use_modules_at_urlconf'
+    ]
+    if deferred:
+        print(f'Импорт не отложен: {", ".join(deferred)}')
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as output:
+            json.dump(medians, output, indent=2)
+    if not options.baseline:
+        return 1 if deferred else 0
+    with open(options.baseline, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = [
+        f'{phase}: {medians[phase]} мс при базовых {expected} мс'
+        for phase, expected in baseline.items()
+        if phase in medians
+        and medians[phase] > expected * (1 + options.max_regression)
+    ]
+    for regression in regressions:
+        print(f'Замедление запуска: {regression}')
+    return 1 if regressions or deferred else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
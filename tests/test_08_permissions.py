@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews
+
+USERS_TABLE_SELECT = 'FROM "users_customuser" WHERE'
+
+
+def count_user_selects(queries):
+    return sum(
+        1 for query in queries
+        if query['sql'].startswith('SELECT')
+        and USERS_TABLE_SELECT in query['sql']
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08PermissionQueries:
+
+    def test_01_review_patch_by_author_without_author_fetch(
+            self, admin_client, admin, user_client, user):
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(url, data={'text': 'new text'})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что PATCH-запрос автора к '
+            '`/api/v1/titles/{title_id}/reviews/{review_id}/` возвращает '
+            'ответ со статусом 200.'
+        )
+        assert response.json().get('author') == user.username
+        assert count_user_selects(context.captured_queries) == 1, (
+            'Проверьте, что при PATCH-запросе автора отзыва пользователь '
+            'загружается из БД только при аутентификации: права доступа '
+            'должны сравнивать `author_id`, а автор для ответа - '
+            'подгружаться вместе с отзывом.'
+        )
+
+    def test_02_review_patch_by_moderator_without_author_fetch(
+            self, admin_client, admin, user_client, user, moderator_client):
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+
+        with CaptureQueriesContext(connection) as context:
+            response = moderator_client.patch(url, data={'score': 7})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что PATCH-запрос модератора к '
+            '`/api/v1/titles/{title_id}/reviews/{review_id}/` возвращает '
+            'ответ со статусом 200.'
+        )
+        assert count_user_selects(context.captured_queries) == 1, (
+            'Проверьте, что при PATCH-запросе модератора автор отзыва '
+            'не загружается из БД отдельным запросом.'
+        )
+
+    def test_03_review_patch_by_other_user_forbidden(
+            self, admin_client, admin, user_client, user, moderator,
+            moderator_client):
+        reviews, titles = create_reviews(
+            admin_client, {moderator: moderator_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+
+        response = user_client.patch(url, data={'text': 'new text'})
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что PATCH-запрос пользователя к чужому отзыву '
+            'возвращает ответ со статусом 403.'
+        )
@@ -0,0 +1,131 @@
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+
+BULK_URL = '/api/v1/users/bulk/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09UsersBulkAPI:
+
+    def test_01_bulk_not_admin(self, user_client, moderator_client):
+        data = [{'username': 'newuser', 'email': 'newuser@yamdb.fake'}]
+        response = APIClient().post(BULK_URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что POST-запрос неавторизованного пользователя к '
+            f'`{BULK_URL}` возвращает ответ со статусом 401.'
+        )
+        for role_client in (user_client, moderator_client):
+            response = role_client.post(BULK_URL, data=data, format='json')
+            assert response.status_code == HTTPStatus.FORBIDDEN, (
+                f'Проверьте, что POST-запрос пользователя без прав '
+                f'администратора к `{BULK_URL}` возвращает ответ со '
+                'статусом 403.'
+            )
+
+    def test_02_bulk_create(self, admin_client, admin, django_user_model):
+        data = [
+            {'username': 'first', 'email': 'first@yamdb.fake',
+             'password': 'Secret-123', 'role': 'moderator'},
+            {'username': 'second', 'email': 'second@yamdb.fake',
+             'bio': 'bio'},
+        ]
+        response = admin_client.post(BULK_URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{BULK_URL}` с '
+            'корректными данными возвращает ответ со статусом 201.'
+        )
+        report = response.json()
+        assert report['created'] == 2
+        assert report['errors'] == []
+        assert 'rows_per_second' in report
+
+        first = django_user_model.objects.get(username='first')
+        assert first.role == 'moderator'
+        assert first.check_password('Secret-123'), (
+            'Проверьте, что пароль пользователя сохраняется в виде хэша.'
+        )
+        second = django_user_model.objects.get(username='second')
+        assert not second.has_usable_password()
+
+    def test_03_bulk_row_errors(self, admin_client, admin, django_user_model):
+        data = [
+            {'username': 'valid', 'email': 'valid@yamdb.fake'},
+            {'username': 'valid', 'email': 'other@yamdb.fake'},
+            {'username': admin.username, 'email': 'third@yamdb.fake'},
+            {'username': 'me', 'email': 'me@yamdb.fake'},
+            {'username': 'nomail'},
+        ]
+        response = admin_client.post(BULK_URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        report = response.json()
+        assert report['created'] == 1
+        assert [error['row'] for error in report['errors']] == [1, 2, 3, 4], (
+            'Проверьте, что отчет о массовом создании пользователей '
+            'содержит ошибки по номерам строк.'
+        )
+        assert 'username' in report['errors'][0]['errors']
+        assert 'email' in report['errors'][3]['errors']
+        assert django_user_model.objects.filter(username='valid').count() == 1
+        assert report['rows_per_second'] * report['elapsed'] < 3, (
+            'Проверьте, что пропускная способность считается по созданным '
+            'пользователям, а не по всем строкам.'
+        )
+
+    def test_04_bulk_invalid_payload(self, admin_client):
+        response = admin_client.post(
+            BULK_URL, data={'username': 'single'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = admin_client.post(
+            BULK_URL, data=[{'username': 'me', 'email': 'me@yamdb.fake'}],
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_05_hashing_pool_reused(self, admin_client, django_user_model,
+                                    settings):
+        from users import hashing
+
+        settings.BULK_USERS_HASH_WORKERS = 2
+        for batch in range(2):
+            data = [{'username': f'pool{batch}_{index}',
+                     'email': f'pool{batch}_{index}@yamdb.fake',
+                     'password': f'Secret-{index}'}
+                    for index in range(hashing.PARALLEL_HASHING_THRESHOLD)]
+            response = admin_client.post(BULK_URL, data=data, format='json')
+            assert response.status_code == HTTPStatus.CREATED
+            if batch == 0:
+                pool = hashing.get_pool(2)
+        assert hashing.get_pool(2) is pool, (
+            'Проверьте, что пул процессов хэширования паролей создается '
+            'один раз, а не при каждом запросе.'
+        )
+        assert pool._mp_context.get_start_method() == 'spawn', (
+            'Проверьте, что процессы пула запускаются через spawn: fork '
+            'многопоточного сервера может зависнуть.'
+        )
+        user = django_user_model.objects.get(username='pool1_3')
+        assert user.check_password('Secret-3')
+
+    def test_06_bulk_weak_password(self, admin_client, django_user_model):
+        data = [
+            {'username': 'weak', 'email': 'weak@yamdb.fake',
+             'password': '12345678'},
+            {'username': 'similar', 'email': 'similar@yamdb.fake',
+             'password': 'similar1'},
+            {'username': 'strong', 'email': 'strong@yamdb.fake',
+             'password': 'Secret-123'},
+        ]
+        response = admin_client.post(BULK_URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        report = response.json()
+        assert [error['row'] for error in report['errors']] == [0, 1], (
+            'Проверьте, что пароли массово создаваемых пользователей '
+            'проверяются валидаторами `AUTH_PASSWORD_VALIDATORS`.'
+        )
+        assert 'password' in report['errors'][0]['errors']
+        assert list(django_user_model.objects.filter(
+            username__in=('weak', 'similar', 'strong')
+        ).values_list('username', flat=True)) == ['strong']
@@ -0,0 +1,456 @@
+import csv
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.conftest import MANAGE_PATH
+
+DATA_DIR = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def csv_rows(csv_file):
+    with open(os.path.join(DATA_DIR, csv_file), encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def import_db_csv(*args):
+    out = StringIO()
+    call_command('import_db_csv', *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ImportDbCsv:
+
+    def test_01_import_all_tables(self):
+        from api.management.commands.import_db_csv import CSV_MODELS_FIELDS
+
+        output = import_db_csv()
+        for model, (csv_file, _, _) in CSV_MODELS_FIELDS.items():
+            assert model.objects.count() == len(csv_rows(csv_file)), (
+                f'Проверьте, что команда `import_db_csv` импортирует все '
+                f'строки файла {csv_file} в таблицу {model.__name__}.'
+            )
+            assert csv_file in output
+
+    def test_02_import_batch_size(self):
+        from reviews.models import Review
+
+        import_db_csv('--batch-size', '7')
+        expected = {
+            int(row['id']): (int(row['title_id']), int(row['author']),
+                             int(row['score']))
+            for row in csv_rows('review.csv')
+        }
+        imported = {
+            review_id: (title_id, author_id, score)
+            for review_id, title_id, author_id, score
+            in Review.objects.values_list('id', 'title_id', 'author_id',
+                                          'score')
+        }
+        assert imported == expected, (
+            'Проверьте, что импорт пачками сохраняет данные из CSV-файла '
+            'без изменений.'
+        )
+
+    def test_03_import_resume_from_checkpoint(self, tmp_path, monkeypatch):
+        from api.csv_import import TableInsert
+        from reviews.models import Review
+
+        checkpoint = tmp_path / 'checkpoint.json'
+        original_insert = TableInsert.insert
+        calls = []
+
+        def failing_insert(self, rows):
+            if self.sql.startswith('INSERT INTO "reviews_review"'):
+                calls.append(len(rows))
+                if len(calls) == 3:
+                    raise RuntimeError('Импорт прерван')
+            return original_insert(self, rows)
+
+        monkeypatch.setattr(TableInsert, 'insert', failing_insert)
+        with pytest.raises(RuntimeError):
+            import_db_csv('--batch-size', '10', '--checkpoint',
+                          str(checkpoint))
+        assert Review.objects.count() == 20, (
+            'Проверьте, что при импорте с контрольной точкой каждая пачка '
+            'фиксируется отдельно.'
+        )
+        assert checkpoint.exists()
+
+        monkeypatch.setattr(TableInsert, 'insert', original_insert)
+        import_db_csv('--batch-size', '10', '--checkpoint', str(checkpoint))
+        assert sorted(Review.objects.values_list('id', flat=True)) == sorted(
+            int(row['id']) for row in csv_rows('review.csv')
+        ), (
+            'Проверьте, что прерванный импорт продолжается с последней '
+            'зафиксированной пачки без потерь и повторов.'
+        )
+        assert not checkpoint.exists()
+
+    def test_04_import_dependency_graph(self):
+        from api.csv_import import table_dependencies
+        from api.management.commands.import_db_csv import CSV_MODELS_FIELDS
+        from reviews.models import (Category, Comment, Genre, GenreTitle,
+                                    Review, Title)
+        from users.models import CustomUser
+
+        dependencies = table_dependencies(CSV_MODELS_FIELDS)
+        assert dependencies == {
+            CustomUser: set(),
+            Category: set(),
+            Genre: set(),
+            Title: {Category},
+            GenreTitle: {Title, Genre},
+            Review: {Title, CustomUser},
+            Comment: {Review, CustomUser},
+        }, (
+            'Проверьте, что граф зависимостей таблиц для импорта строится '
+            'по внешним ключам моделей.'
+        )
+
+    def test_05_incremental_import(self, tmp_path):
+        import shutil
+
+        from reviews.models import Category, Comment, Genre
+
+        data_dir = tmp_path / 'data'
+        shutil.copytree(DATA_DIR, data_dir)
+        import_db_csv()
+        output = import_db_csv('--incremental', '--data-dir', str(data_dir))
+        assert Genre.objects.count() == len(csv_rows('genre.csv')), (
+            'Проверьте, что инкрементальный импорт поверх уже загруженных '
+            'данных не дублирует строки.'
+        )
+        assert 'без изменений 0' in output
+
+        rows = csv_rows('category.csv')
+        rows[0]['name'] = 'Измененная категория'
+        rows.append({'id': '100', 'name': 'Новая', 'slug': 'new-category'})
+        with open(data_dir / 'category.csv', 'w', encoding='utf-8',
+                  newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=('id', 'name', 'slug'))
+            writer.writeheader()
+            writer.writerows(rows)
+        comments = csv_rows('comments.csv')
+        with open(data_dir / 'comments.csv', 'w', encoding='utf-8',
+                  newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=comments[0].keys())
+            writer.writeheader()
+            writer.writerows(comments[1:])
+
+        output = import_db_csv('--incremental', '--delete',
+                               '--data-dir', str(data_dir))
+        assert (f'новых 1, изменено 1, без изменений {len(rows) - 2}'
+                in output), (
+            'Проверьте, что инкрементальный импорт вставляет только новые '
+            'и обновляет только измененные строки.'
+        )
+        assert Category.objects.get(pk=rows[0]['id']).name == (
+            'Измененная категория'
+        )
+        assert Category.objects.filter(slug='new-category').exists()
+        assert not Comment.objects.filter(pk=comments[0]['id']).exists(), (
+            'Проверьте, что с параметром `--delete` удаляются строки, '
+            'пропавшие из CSV-файла.'
+        )
+        assert Comment.objects.count() == len(comments) - 1
+
+    def test_06_export_and_reimport(self, tmp_path):
+        import gzip
+        import json
+
+        from api.management.commands.import_db_csv import CSV_MODELS_FIELDS
+        from reviews.models import Comment, Review
+
+        import_db_csv()
+        expected_comments = list(Comment.objects.order_by('pk').values_list(
+            'id', 'review_id', 'author_id', 'text', 'pub_date'))
+        expected = list(Review.objects.order_by('pk').values_list(
+            'id', 'title_id', 'author_id', 'text', 'score',
+            'pub_date'))
+        call_command('export_db', str(tmp_path / 'csv'), '--gzip',
+                     stdout=StringIO())
+        call_command('export_db', str(tmp_path / 'json'),
+                     '--format', 'ndjson', stdout=StringIO())
+
+        with gzip.open(tmp_path / 'csv' / 'users.csv.gz', 'rt',
+                       encoding='utf-8') as f:
+            header = next(csv.reader(f))
+        assert 'password' not in header, (
+            'Проверьте, что команда `export_db` не выгружает пароли '
+            'пользователей.'
+        )
+        with open(tmp_path / 'json' / 'review.ndjson',
+                  encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == len(expected)
+        assert lines[0]['author'] == expected[0][2]
+        assert lines[0]['pub_date'] == expected[0][5].isoformat(), (
+            'Проверьте, что в NDJSON даты выгружаются в ISO 8601, как в CSV.'
+        )
+
+        for model in reversed(list(CSV_MODELS_FIELDS)):
+            model.objects.all().delete()
+        import_db_csv('--data-dir', str(tmp_path / 'csv'), '--keep-dates')
+        assert list(Review.objects.order_by('pk').values_list(
+            'id', 'title_id', 'author_id', 'text', 'score',
+            'pub_date')) == expected, (
+            'Проверьте, что выгрузка `export_db` в CSV повторно '
+            'импортируется командой `import_db_csv` без изменений.'
+        )
+        assert list(Comment.objects.order_by('pk').values_list(
+            'id', 'review_id', 'author_id', 'text', 'pub_date'
+        )) == expected_comments, (
+            'Проверьте, что при повторном импорте выгрузки сохраняются '
+            'даты публикации комментариев.'
+        )
+
+    def test_07_check_reports_all_errors(self, tmp_path):
+        import shutil
+
+        from django.core.management.base import CommandError
+
+        from api.management.commands.import_db_csv import CSV_MODELS_FIELDS
+
+        data_dir = tmp_path / 'data'
+        shutil.copytree(DATA_DIR, data_dir)
+        reviews = csv_rows('review.csv')
+        reviews[0]['score'] = '11'
+        reviews[1]['author'] = '999'
+        reviews.append(dict(reviews[2], id='9999'))
+        with open(data_dir / 'review.csv', 'w', encoding='utf-8',
+                  newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=reviews[0].keys())
+            writer.writeheader()
+            writer.writerows(reviews)
+
+        out = StringIO()
+        with pytest.raises(CommandError, match='Найдено ошибок в CSV-файлах: 3'):
+            call_command('import_db_csv', '--check',
+                         '--data-dir', str(data_dir), stdout=out)
+        report = out.getvalue()
+        assert 'score: 11' in report
+        assert 'author: нет объекта CustomUser с ключом 999' in report
+        assert 'author+title: повтор значения' in report, (
+            'Проверьте, что проверка `--check` находит повторы отзыва '
+            'одного автора на одно произведение.'
+        )
+        for model in CSV_MODELS_FIELDS:
+            assert not model.objects.exists(), (
+                'Проверьте, что при ошибках в CSV-файлах команда '
+                '`import_db_csv --check` ничего не записывает в БД.'
+            )
+        assert 'Проверка CSV-файлов пройдена' in import_db_csv('--check')
+
+    def test_08_fast_load_restores_indexes(self, monkeypatch):
+        from django.db import connection
+
+        from api.csv_import import TableInsert
+        from api.management.commands.import_db_csv import CSV_MODELS_FIELDS
+        from reviews.models import Review
+
+        def indexes():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'index'"
+                )
+                return sorted(cursor.fetchall(), key=str)
+
+        def synchronous():
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous')
+                return cursor.fetchone()[0]
+
+        expected_indexes, expected_synchronous = indexes(), synchronous()
+        original_insert = TableInsert.insert
+
+        def failing_insert(self, rows):
+            if self.sql.startswith('INSERT INTO "reviews_review"'):
+                raise RuntimeError('Импорт прерван')
+            return original_insert(self, rows)
+
+        monkeypatch.setattr(TableInsert, 'insert', failing_insert)
+        with pytest.raises(RuntimeError):
+            import_db_csv('--fast-load')
+        assert indexes() == expected_indexes, (
+            'Проверьте, что при ошибке импорта с `--fast-load` удаленные '
+            'индексы создаются заново.'
+        )
+        assert synchronous() == expected_synchronous
+
+        monkeypatch.setattr(TableInsert, 'insert', original_insert)
+        for model in reversed(list(CSV_MODELS_FIELDS)):
+            model.objects.all().delete()
+        output = import_db_csv('--fast-load')
+        assert Review.objects.count() == len(csv_rows('review.csv'))
+        assert 'индексов удалено на время импорта: 0' not in output
+        assert 'индексы восстановлены' in output
+        assert indexes() == expected_indexes, (
+            'Проверьте, что после импорта с `--fast-load` индексы '
+            'восстановлены.'
+        )
+        assert synchronous() == expected_synchronous
+
+    def test_09_check_composite_unique_against_db(self, tmp_path):
+        import shutil
+
+        from django.core.management.base import CommandError
+
+        from reviews.models import Review
+
+        data_dir = tmp_path / 'data'
+        shutil.copytree(DATA_DIR, data_dir)
+        import_db_csv()
+        reviews = csv_rows('review.csv')
+        duplicate = dict(reviews[0], id='9999')
+        with open(data_dir / 'review.csv', 'w', encoding='utf-8',
+                  newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=reviews[0].keys())
+            writer.writeheader()
+            writer.writerows(reviews[1:] + [duplicate])
+
+        out = StringIO()
+        with pytest.raises(CommandError, match='Найдено ошибок в CSV-файлах: 1'):
+            call_command('import_db_csv', '--incremental', '--check',
+                         '--data-dir', str(data_dir), stdout=out)
+        assert 'author+title: значение' in out.getvalue(), (
+            'Проверьте, что проверка `--check` находит отзыв, повторяющий '
+            'в БД отзыв того же автора на то же произведение.'
+        )
+        assert not Review.objects.filter(pk=9999).exists()
+
+    def test_10_parallel_import_into_file_db(self, tmp_path):
+        import sqlite3
+        import subprocess
+        import sys
+
+        from api.management.commands.import_db_csv import CSV_MODELS_FIELDS
+
+        environ = dict(os.environ, DB_ENGINE='django.db.backends.sqlite3',
+                       DB_NAME=str(tmp_path / 'db.sqlite3'),
+                       SLOW_QUERY_LOG_ENABLED='false')
+        for command in (['migrate', '--verbosity', '0'],
+                        ['import_db_csv', '--workers', '2',
+                         '--batch-size', '50']):
+            result = subprocess.run(
+                [sys.executable, 'manage.py', *command], cwd=MANAGE_PATH,
+                env=environ, capture_output=True, text=True
+            )
+            assert result.returncode == 0, result.stderr
+        for csv_file, _, _ in CSV_MODELS_FIELDS.values():
+            assert csv_file in result.stdout
+        with sqlite3.connect(tmp_path / 'db.sqlite3') as db:
+            for model, (csv_file, _, _) in CSV_MODELS_FIELDS.items():
+                count = db.execute(
+                    f'SELECT COUNT(*) FROM {model._meta.db_table}'
+                ).fetchone()[0]
+                assert count == len(csv_rows(csv_file)), (
+                    'Проверьте, что импорт с `--workers 2` загружает все '
+                    f'строки файла {csv_file}.'
+                )
+            assert db.execute('PRAGMA foreign_key_check').fetchall() == [], (
+                'Проверьте, что при параллельном импорте все внешние ключи '
+                'ссылаются на существующие строки.'
+            )
+
+    def test_11_incremental_reinserts_deleted_rows(self):
+        from reviews.models import Comment
+
+        import_db_csv('--incremental')
+        comment_id = Comment.objects.order_by('pk').first().pk
+        Comment.objects.filter(pk=comment_id).delete()
+        output = import_db_csv('--incremental')
+        assert Comment.objects.filter(pk=comment_id).exists(), (
+            'Проверьте, что инкрементальный импорт заново вставляет строку, '
+            'удаленную из таблицы после прошлого импорта.'
+        )
+        assert Comment.objects.count() == len(csv_rows('comments.csv'))
+        assert 'новых 1, изменено 0' in output
+
+    def test_12_default_import_sets_pub_date_to_import_time(self):
+        from django.utils import timezone
+
+        from reviews.models import Comment, Review
+
+        started = timezone.now()
+        import_db_csv()
+        for model in (Review, Comment):
+            assert not model.objects.filter(pub_date__lt=started).exists(), (
+                'Проверьте, что без `--keep-dates` датой публикации '
+                f'{model.__name__} становится время импорта, как при '
+                '`objects.create`.'
+            )
+
+    def test_13_resume_after_crash_before_checkpoint_save(self, tmp_path,
+                                                          monkeypatch):
+        from api.csv_import import ImportCheckpoint
+        from reviews.models import Review
+
+        checkpoint = tmp_path / 'checkpoint.json'
+        original_save = ImportCheckpoint.save
+        calls = []
+
+        def failing_save(self, table, *args, **kwargs):
+            if table == 'reviews.Review':
+                calls.append(table)
+                if len(calls) == 2:
+                    raise RuntimeError('Импорт прерван')
+            return original_save(self, table, *args, **kwargs)
+
+        monkeypatch.setattr(ImportCheckpoint, 'save', failing_save)
+        with pytest.raises(RuntimeError):
+            import_db_csv('--batch-size', '10', '--checkpoint',
+                          str(checkpoint))
+        assert Review.objects.count() == 20
+
+        monkeypatch.setattr(ImportCheckpoint, 'save', original_save)
+        import_db_csv('--batch-size', '10', '--checkpoint', str(checkpoint))
+        assert sorted(Review.objects.values_list('id', flat=True)) == sorted(
+            int(row['id']) for row in csv_rows('review.csv')
+        ), (
+            'Проверьте, что импорт, прерванный между фиксацией пачки '
+            'и записью контрольной точки, продолжается без ошибок '
+            'и повторов.'
+        )
+
+    def test_14_incremental_skips_unique_conflicts(self, tmp_path):
+        import shutil
+
+        from reviews.models import Category
+
+        data_dir = tmp_path / 'data'
+        shutil.copytree(DATA_DIR, data_dir)
+        import_db_csv('--incremental', '--data-dir', str(data_dir))
+        rows = csv_rows('category.csv')
+        rows += [{'id': '100', 'name': 'Дубль', 'slug': rows[0]['slug']},
+                 {'id': '101', 'name': 'Новая', 'slug': 'new-category'}]
+
+        def write_categories():
+            with open(data_dir / 'category.csv', 'w', encoding='utf-8',
+                      newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=('id', 'name', 'slug'))
+                writer.writeheader()
+                writer.writerows(rows)
+
+        write_categories()
+        output = import_db_csv('--incremental', '--data-dir', str(data_dir))
+        assert 'новых 1, изменено 0' in output
+        assert 'конфликтов 1' in output and rows[0]['slug'] in output, (
+            'Проверьте, что инкрементальный импорт пропускает строки, '
+            'уникальные значения которых уже заняты другими строками, '
+            'и сообщает о них.'
+        )
+        assert not Category.objects.filter(pk=100).exists()
+        assert Category.objects.filter(slug='new-category').exists()
+
+        rows[-2]['slug'] = 'fixed-category'
+        write_categories()
+        output = import_db_csv('--incremental', '--data-dir', str(data_dir))
+        assert 'новых 1, изменено 0' in output
+        assert Category.objects.get(pk=100).slug == 'fixed-category', (
+            'Проверьте, что пропущенная из-за конфликта строка '
+            'импортируется после исправления CSV-файла.'
+        )
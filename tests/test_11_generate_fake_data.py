@@ -0,0 +1,67 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def generate_fake_data(*args):
+    out = StringIO()
+    call_command('generate_fake_data', '--users', '50', '--titles', '40',
+                 '--genres', '8', '--categories', '3', '--reviews', '600',
+                 '--comments', '300', *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11GenerateFakeData:
+
+    def test_01_generate_counts_and_skew(self):
+        from django.db.models import Count
+
+        from reviews.models import Comment, GenreTitle, Review, Title
+        from users.models import CustomUser
+
+        generate_fake_data('--seed', '1')
+        assert CustomUser.objects.count() == 50
+        assert Title.objects.count() == 40
+        assert Review.objects.count() == 600, (
+            'Проверьте, что команда `generate_fake_data` создает заданное '
+            'количество отзывов.'
+        )
+        assert Comment.objects.count() == 300
+        per_title = sorted(
+            Title.objects.annotate(reviews_count=Count('reviews'))
+            .values_list('reviews_count', flat=True), reverse=True
+        )
+        assert per_title[0] >= 5 * per_title[len(per_title) // 2], (
+            'Проверьте, что популярность произведений распределена '
+            'неравномерно (по закону Ципфа).'
+        )
+        assert GenreTitle.objects.values('title').annotate(
+            genres=Count('genre')).filter(genres__gt=1).exists(), (
+            'Проверьте, что у части произведений несколько жанров.'
+        )
+        assert not Review.objects.filter(score__lt=1).exists()
+        assert not Review.objects.filter(score__gt=10).exists()
+
+    def test_02_generate_is_deterministic(self):
+        from api.management.commands.import_db_csv import CSV_MODELS_FIELDS
+        from reviews.models import Review
+
+        fields = ('id', 'title_id', 'author_id', 'text', 'score',
+                  'pub_date')
+        generate_fake_data('--seed', '7', '--batch-size', '100',
+                           '--start-date', '2020-01-01')
+        first = list(Review.objects.order_by('pk').values_list(*fields))
+        for model in reversed(list(CSV_MODELS_FIELDS)):
+            model.objects.all().delete()
+        generate_fake_data('--seed', '7', '--start-date', '2020-01-01')
+        assert list(Review.objects.order_by('pk').values_list(*fields)) == (
+            first
+        ), (
+            'Проверьте, что команда `generate_fake_data` с одинаковыми '
+            '`--seed` и `--start-date` создает одинаковые данные.'
+        )
+        assert min(row[-1] for row in first).year == 2020, (
+            'Проверьте, что даты отзывов начинаются с `--start-date`.'
+        )
@@ -0,0 +1,130 @@
+import pytest
+
+
+def pragma(name):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12Database:
+
+    def test_01_sqlite_pragmas_applied(self):
+        from django.conf import settings
+
+        assert pragma('busy_timeout') == (
+            settings.SQLITE_PRAGMAS['busy_timeout']
+        ), (
+            'Проверьте, что к каждому соединению с SQLite применяются '
+            'настройки `SQLITE_PRAGMAS`.'
+        )
+        assert pragma('cache_size') == settings.SQLITE_PRAGMAS['cache_size']
+        assert pragma('synchronous') == 1, (
+            'Проверьте, что соединения с SQLite используют '
+            '`synchronous=NORMAL`.'
+        )
+
+    def test_02_sqlite_pragmas_from_settings(self, settings):
+        from django.db import connection
+
+        from api.sqlite_pragmas import apply_sqlite_pragmas
+
+        default_pragmas = settings.SQLITE_PRAGMAS
+        settings.SQLITE_PRAGMAS = {'busy_timeout': 1234}
+        apply_sqlite_pragmas(None, connection)
+        assert pragma('busy_timeout') == 1234, (
+            'Проверьте, что PRAGMA для SQLite берутся из настроек '
+            '`SQLITE_PRAGMAS`.'
+        )
+        settings.SQLITE_PRAGMAS = default_pragmas
+        apply_sqlite_pragmas(None, connection)
+
+    def test_03_replica_router_sticks_to_primary(self, settings, rf):
+        from django.http import HttpResponse
+
+        from api.db_router import ReplicaRouter
+        from api.middleware import ReplicaRoutingMiddleware
+        from api.views import CategoryViewSet, UsersViewSet
+
+        settings.REPLICA_DATABASE = 'replica'
+        router = ReplicaRouter()
+        routed = []
+
+        def handle(request, view_class):
+            view = view_class.as_view({'get': 'list', 'post': 'create'})
+
+            def get_response(request):
+                middleware.process_view(request, view, (), {})
+                routed.append(router.db_for_read(None))
+                if request.method == 'POST':
+                    router.db_for_write(None)
+                    routed.append(router.db_for_read(None))
+                return HttpResponse()
+
+            middleware = ReplicaRoutingMiddleware(get_response)
+            return middleware(request)
+
+        handle(rf.get('/api/v1/categories/'), CategoryViewSet)
+        assert routed == ['replica'], (
+            'Проверьте, что GET-запросы к каталогу читают из реплики.'
+        )
+        routed.clear()
+        handle(rf.get('/api/v1/users/'), UsersViewSet)
+        response = handle(rf.post('/api/v1/categories/'), CategoryViewSet)
+        assert routed == [None, None, None], (
+            'Проверьте, что остальные запросы и запросы после записи '
+            'читают из основной базы.'
+        )
+        assert settings.REPLICA_STICKY_COOKIE in response.cookies
+        routed.clear()
+        request = rf.get('/api/v1/categories/')
+        request.COOKIES[settings.REPLICA_STICKY_COOKIE] = '1'
+        handle(request, CategoryViewSet)
+        assert routed == [None], (
+            'Проверьте, что после записи клиент некоторое время читает '
+            'из основной базы.'
+        )
+        assert router.db_for_read(None) is None
+
+    def test_04_replica_with_two_sqlite_files(self, tmp_path):
+        import json
+        import os
+        import subprocess
+        import sys
+
+        from tests.conftest import MANAGE_PATH
+
+        script = '\n'.join((
+            'import json, os, django',
+            'django.setup()',
+            'from django.core.management import call_command',
+            'from django.test import Client',
+            'from reviews.models import Category',
+            'call_command("migrate", verbosity=0)',
+            'call_command("sync_replica", stdout=open(os.devnull, "w"))',
+            'Category.objects.create(name="Новая", slug="new")',
+            'url = "/api/v1/categories/"',
+            'counts = [Client().get(url).json()["count"]]',
+            'client = Client()',
+            'client.cookies["use_primary_db"] = "1"',
+            'counts.append(client.get(url).json()["count"])',
+            'call_command("sync_replica", stdout=open(os.devnull, "w"))',
+            'counts.append(Client().get(url).json()["count"])',
+            'print(json.dumps(counts))',
+        ))
+        env = dict(os.environ,
+                   DJANGO_SETTINGS_MODULE='api_yamdb.settings',
+                   DB_NAME=str(tmp_path / 'primary.sqlite3'),
+                   DB_REPLICA_NAME=str(tmp_path / 'replica.sqlite3'))
+        result = subprocess.run([sys.executable, '-c', script],
+                                cwd=MANAGE_PATH, env=env,
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout.splitlines()[-1]) == [0, 1, 1], (
+            'Проверьте, что каталог читается из реплики, которая '
+            'обновляется командой `sync_replica`, а клиент с cookie '
+            'после записи читает из основной базы.'
+        )
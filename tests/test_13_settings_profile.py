@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tests.conftest import MANAGE_PATH
+
+
+def load_settings(output='s.DEBUG, s.DATABASES["default"]["CONN_MAX_AGE"], '
+                         's.CACHES["default"]["BACKEND"]', **env):
+    environ = {name: value for name, value in os.environ.items()
+               if not name.startswith(('DJANGO_', 'DB_', 'POSTGRES_'))}
+    environ.update(env)
+    return subprocess.run(
+        [sys.executable, '-c',
+         f'from api_yamdb import settings as s; print({output})'],
+        cwd=MANAGE_PATH, env=environ, capture_output=True, text=True
+    )
+
+
+class Test13SettingsProfile:
+
+    def test_01_production_profile(self):
+        result = load_settings(DJANGO_PROFILE='production',
+                               DJANGO_SECRET_KEY='secret',
+                               DJANGO_ALLOWED_HOSTS='example.com')
+        assert result.returncode == 0, result.stderr
+        debug, conn_max_age, backend = result.stdout.split()
+        assert debug == 'False', (
+            'Проверьте, что в профиле production DEBUG выключен.'
+        )
+        assert int(conn_max_age) > 0, (
+            'Проверьте, что в профиле production соединения с БД '
+            'переиспользуются (`CONN_MAX_AGE`).'
+        )
+        assert backend.endswith('FileBasedCache')
+
+    @pytest.mark.parametrize('env, message', [
+        ({'DJANGO_PROFILE': 'production'}, 'DJANGO_SECRET_KEY'),
+        ({'DJANGO_PROFILE': 'production', 'DJANGO_SECRET_KEY': 'secret',
+          'DJANGO_ALLOWED_HOSTS': 'example.com', 'DJANGO_DEBUG': 'true'},
+         'DEBUG должен быть выключен'),
+        ({'DJANGO_PROFILE': 'production', 'DJANGO_SECRET_KEY': 'secret',
+          'DJANGO_ALLOWED_HOSTS': 'example.com', 'METRICS_ENABLED': 'true',
+          'METRICS_TOKEN': ''}, 'METRICS_TOKEN'),
+        ({'DJANGO_PROFILE': 'production', 'DJANGO_SECRET_KEY': 'secret',
+          'DJANGO_ALLOWED_HOSTS': 'example.com',
+          'SERVER_TIMING_PUBLIC': 'true'}, 'SERVER_TIMING_PUBLIC'),
+        ({'DJANGO_PROFILE': 'staging'}, 'неизвестный профиль'),
+        ({'DB_ENGINE': 'django.db.backends.postgresql'}, 'POSTGRES_USER'),
+    ])
+    def test_02_inconsistent_profile_fails_fast(self, env, message):
+        result = load_settings(**env)
+        assert result.returncode != 0, (
+            'Проверьте, что при несогласованных настройках профиля '
+            'проект не запускается.'
+        )
+        assert 'ImproperlyConfigured' in result.stderr
+        assert message in result.stderr
+
+    def test_03_production_server_timing_log_only(self):
+        result = load_settings('s.SERVER_TIMING["ENABLED"], '
+                               's.SERVER_TIMING["LOG"], '
+                               's.SERVER_TIMING["PUBLIC"]',
+                               DJANGO_PROFILE='production',
+                               DJANGO_SECRET_KEY='secret',
+                               DJANGO_ALLOWED_HOSTS='example.com',
+                               SERVER_TIMING_LOG='true',
+                               SERVER_TIMING_TOKEN='token')
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.split() == ['True', 'True', 'False'], (
+            'Проверьте, что в профиле production замеры запросов '
+            'включены и пишутся в лог, а заголовок `Server-Timing` '
+            'закрыт для клиентов.'
+        )
+
+    def test_04_production_slow_query_log_off(self):
+        result = load_settings('s.SLOW_QUERY_LOG["ENABLED"], '
+                               's.SLOW_QUERY_LOG["PARAMS"]',
+                               DJANGO_PROFILE='production',
+                               DJANGO_SECRET_KEY='secret',
+                               DJANGO_ALLOWED_HOSTS='example.com')
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.split() == ['False', 'False'], (
+            'Проверьте, что в профиле production журнал медленных '
+            'запросов по умолчанию выключен и не пишет значения '
+            'параметров.'
+        )
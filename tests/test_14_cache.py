@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Cache:
+
+    def test_01_lru_eviction_and_counters(self):
+        from api.tiered_cache import MISSING, TieredCache
+
+        cache = TieredCache({'LOCAL_MAX_ENTRIES': 2})
+        for key in ('a', 'b', 'c'):
+            cache.set('titles', key, key.upper())
+        assert cache.get('titles', 'c') == 'C'
+        assert cache.get('titles', 'a') == 'A', (
+            'Проверьте, что вытесненная из памяти процесса запись '
+            'читается из общего кэша.'
+        )
+        assert cache.get('genres', 'a') is MISSING, (
+            'Проверьте, что ключи разных пространств имен не пересекаются.'
+        )
+        stats = cache.stats()
+        assert stats['local_evictions'] >= 1
+        assert stats['local_hits'] == 1
+        assert stats['shared_hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_02_versioned_invalidation(self):
+        from api.tiered_cache import MISSING, TieredCache
+
+        cache = TieredCache()
+        other_process = TieredCache({'VERSION_TIMEOUT': 0})
+        cache.set('titles', 'list', [1])
+        cache.set('genres', 'list', [2])
+        assert other_process.get('titles', 'list') == [1]
+        cache.invalidate('titles')
+        assert cache.get('titles', 'list') is MISSING, (
+            'Проверьте, что инвалидация пространства имен делает '
+            'недоступными его записи.'
+        )
+        assert other_process.get('titles', 'list') is MISSING
+        assert cache.get('genres', 'list') == [2]
+
+    def test_03_stampede_protection(self):
+        from api.tiered_cache import TieredCache
+
+        cache = TieredCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                cache.get_or_set('titles', 'slow', compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == ['value'] * 5
+        assert len(calls) == 1, (
+            'Проверьте, что при одновременных промахах значение '
+            'вычисляется один раз.'
+        )
+
+    def test_04_api_responses_cached(self, client, admin_client):
+        url = '/api/v1/categories/'
+        admin_client.post(url, data={'name': 'Фильм', 'slug': 'films'})
+        assert client.get(url).json()['count'] == 1
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.json()['count'] == 1
+        assert len(queries) == 0, (
+            'Проверьте, что повторный запрос списка категорий '
+            'обслуживается из кэша без запросов к БД.'
+        )
+        admin_client.post(url, data={'name': 'Книга', 'slug': 'books'})
+        assert client.get(url).json()['count'] == 2, (
+            'Проверьте, что изменение данных инвалидирует кэш.'
+        )
+
+    def test_05_cache_key_includes_host_and_scheme(self, client,
+                                                   admin_client):
+        url = '/api/v1/categories/?limit=1'
+        for slug in ('films', 'books'):
+            admin_client.post('/api/v1/categories/',
+                              data={'name': slug, 'slug': slug})
+        first = client.get(url, HTTP_HOST='first.example.com').json()
+        assert first['next'].startswith('http://first.example.com/')
+        second = client.get(url, HTTP_HOST='second.example.com',
+                            secure=True).json()
+        assert second['next'].startswith('https://second.example.com/'), (
+            'Проверьте, что ключ кэша ответа учитывает схему и хост: '
+            'ссылки пагинации не должны доставаться другим клиентам.'
+        )
+
+    def test_06_user_changes_invalidate_only_cached_fields(self, client):
+        from api.cache import REVIEWS, api_cache
+        from users.models import CustomUser
+
+        def reviews_version():
+            api_cache.versions.clear()
+            return api_cache.version(REVIEWS)
+
+        version = reviews_version()
+        client.post('/api/v1/auth/signup/',
+                    data={'username': 'new_user',
+                          'email': 'new_user@example.com'})
+        user = CustomUser.objects.get(username='new_user')
+        user.bio = 'Биография'
+        user.save()
+        assert reviews_version() == version, (
+            'Проверьте, что регистрация пользователя и изменение полей, '
+            'которых нет в ответах, не инвалидируют кэш отзывов.'
+        )
+        user.username = 'renamed_user'
+        user.save()
+        assert reviews_version() > version, (
+            'Проверьте, что изменение username пользователя инвалидирует '
+            'кэш отзывов и комментариев.'
+        )
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import resolve
+
+
+def async_get(url):
+    async def get():
+        return await AsyncClient().get(url)
+
+    return async_to_sync(get)()
+
+
+ASGI_URLCONF = 'api_yamdb.urls_asgi'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Asgi:
+
+    def test_01_read_views_are_async(self):
+        for url in ('/api/v1/titles/', '/api/v1/titles/1/',
+                    '/api/v1/genres/', '/api/v1/categories/',
+                    '/api/v1/titles/1/reviews/',
+                    '/api/v1/titles/1/reviews/1/'):
+            assert asyncio.iscoroutinefunction(
+                resolve(url, urlconf=ASGI_URLCONF).func
+            ), (
+                f'Проверьте, что для ASGI эндпойнт `{url}` обслуживается '
+                'асинхронным представлением.'
+            )
+        assert not asyncio.iscoroutinefunction(
+            resolve('/api/v1/users/', urlconf=ASGI_URLCONF).func
+        )
+
+    def test_02_async_responses_match_sync(self, client, admin_client,
+                                           settings):
+        from api_yamdb.asgi import application
+
+        assert callable(application)
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Фильм', 'slug': 'films'})
+        admin_client.post('/api/v1/genres/',
+                          data={'name': 'Драма', 'slug': 'drama'})
+        response = admin_client.post(
+            '/api/v1/titles/',
+            data={'name': 'Начало', 'year': 2010, 'category': 'films',
+                  'genre': ['drama']}
+        )
+        assert response.status_code == 201, response.json()
+        title_id = response.json()['id']
+        urls = ('/api/v1/titles/', f'/api/v1/titles/{title_id}/',
+                '/api/v1/genres/', '/api/v1/categories/',
+                f'/api/v1/titles/{title_id}/reviews/')
+        expected = {url: client.get(url).json() for url in urls}
+        settings.ROOT_URLCONF = ASGI_URLCONF
+        for url in urls:
+            response = async_get(url)
+            assert response.status_code == 200
+            assert asyncio.iscoroutinefunction(
+                response.resolver_match.func
+            ), (
+                f'Проверьте, что запрос к `{url}` через ASGI обслуживается '
+                'асинхронным представлением.'
+            )
+            assert response.json() == expected[url], (
+                f'Проверьте, что асинхронный эндпойнт `{url}` отвечает '
+                'так же, как синхронный.'
+            )
+        assert async_get('/api/v1/titles/100500/').status_code == 404
+        response = admin_client.post('/api/v1/genres/',
+                                     data={'name': 'Комедия',
+                                           'slug': 'comedy'})
+        assert response.status_code == 201, (
+            'Проверьте, что запись через ASGI-эндпойнты работает.'
+        )
+        assert async_get('/api/v1/genres/').json()['count'] == 2
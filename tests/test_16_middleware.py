@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Middleware:
+
+    def test_01_api_skips_session_middleware(self, client, user_client,
+                                             user_superuser):
+        for api_client in (client, user_client):
+            response = api_client.get('/api/v1/categories/')
+            assert response.status_code == 200
+            assert not hasattr(response.wsgi_request, 'session'), (
+                'Проверьте, что запросы к `/api/` не проходят через '
+                'middleware сессий и аутентификации Django.'
+            )
+            assert 'X-Frame-Options' not in response
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == 200, (
+            'Проверьте, что аутентификация по JWT работает без middleware '
+            'сессий.'
+        )
+        response = client.get('/api/v1/categories/',
+                              HTTP_ACCEPT='text/html')
+        assert response.status_code == 200
+
+        session_client = Client()
+        session_client.force_login(user_superuser)
+        response = session_client.get('/admin/')
+        assert response.status_code == 200, (
+            'Проверьте, что админка работает с полной цепочкой middleware.'
+        )
+        assert response.wsgi_request.user.is_superuser
+        assert response['X-Frame-Options'] == 'DENY'
+
+    def test_02_admin_keeps_csrf_protection(self, admin):
+        csrf_client = Client(enforce_csrf_checks=True)
+        response = csrf_client.post('/admin/login/', {
+            'username': admin.username, 'password': '1234567'
+        })
+        assert response.status_code == 403, (
+            'Проверьте, что для админки по-прежнему проверяется CSRF-токен.'
+        )
+        response = csrf_client.get('/admin/login/')
+        assert 'csrftoken' in response.cookies
+
+        async def get():
+            return await AsyncClient().get('/admin/login/')
+
+        response = async_to_sync(get)()
+        assert response.status_code == 200, (
+            'Проверьте, что полная цепочка middleware работает и через ASGI.'
+        )
+        assert response['X-Frame-Options'] == 'DENY'
+
+    def test_03_hybrid_middleware_hooks(self):
+        from django.http import HttpResponse
+
+        from api.middleware import HybridMiddleware
+
+        calls = []
+
+        class Recording(HybridMiddleware):
+            def start(self, request):
+                calls.append('start')
+                return 'state'
+
+            def finish(self, request, state):
+                calls.append(f'finish {state}')
+                return state
+
+            def process_response(self, request, response, state):
+                response['X-State'] = state
+                return response
+
+        def view(request):
+            return HttpResponse()
+
+        async def async_view(request):
+            return HttpResponse()
+
+        def failing_view(request):
+            raise ValueError
+
+        assert Recording(view)(None)['X-State'] == 'state'
+        middleware = Recording(async_view)
+        assert asyncio.iscoroutinefunction(middleware), (
+            'Проверьте, что middleware с асинхронным обработчиком '
+            'работает в асинхронном режиме.'
+        )
+        assert async_to_sync(middleware)(None)['X-State'] == 'state'
+        with pytest.raises(ValueError):
+            Recording(failing_view)(None)
+        assert calls == ['start', 'finish state'] * 3, (
+            'Проверьте, что finish вызывается и при исключении '
+            'в обработчике.'
+        )
@@ -0,0 +1,87 @@
+import gzip
+import os
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.conftest import MANAGE_PATH
+
+REDOC_PATH = os.path.join(MANAGE_PATH, 'static', 'redoc.yaml')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Compression:
+
+    def test_01_api_responses_compressed(self, admin_client, settings):
+        from api.compression import GZIP, compress_stream
+
+        settings.COMPRESSION = dict(settings.COMPRESSION, MIN_SIZE=200)
+        for number in range(10):
+            admin_client.post('/api/v1/genres/', data={
+                'name': f'Жанр с длинным названием {number}',
+                'slug': f'genre-{number}'
+            })
+        url = '/api/v1/genres/'
+        plain = admin_client.get(url)
+        assert 'Content-Encoding' not in plain
+        response = admin_client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        assert response['Content-Encoding'] == 'gzip', (
+            'Проверьте, что крупные ответы API сжимаются в gzip, если '
+            'клиент его принимает.'
+        )
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(response.content) == plain.content
+        assert int(response['Content-Length']) < len(plain.content)
+        assert 'Content-Encoding' not in admin_client.get(
+            url, HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+
+        settings.COMPRESSION = dict(settings.COMPRESSION,
+                                    MIN_SIZE=len(plain.content) + 1)
+        response = admin_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        assert 'Content-Encoding' not in response, (
+            'Проверьте, что ответы меньше COMPRESSION["MIN_SIZE"] не '
+            'сжимаются.'
+        )
+
+        chunks = [b'{"results": [', b'1, ' * 1000, b'2]}']
+        stream = list(compress_stream(iter(chunks), GZIP))
+        assert len(stream) > 1
+        assert gzip.decompress(b''.join(stream)) == b''.join(chunks), (
+            'Проверьте потоковое сжатие gzip.'
+        )
+
+    def test_02_precompressed_static(self, client, settings, tmp_path):
+        settings.STATIC_ROOT = str(tmp_path / 'static')
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+        assert (tmp_path / 'static' / 'redoc.yaml.gz').exists(), (
+            'Проверьте, что collectstatic сохраняет сжатую копию redoc.yaml.'
+        )
+        with open(REDOC_PATH, 'rb') as f:
+            content = f.read()
+
+        page = client.get('/redoc/').content.decode()
+        spec_url = re.search(r"spec-url='([^']+)'", page).group(1)
+        assert re.fullmatch(r'/static/redoc\.yaml\?v=\w+', spec_url)
+        response = client.get(spec_url, HTTP_ACCEPT_ENCODING='gzip')
+        assert response.status_code == 200
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(b''.join(response.streaming_content)) == (
+            content
+        )
+        assert 'max-age=31536000' in response['Cache-Control'], (
+            'Проверьте, что redoc.yaml с версией в адресе отдается '
+            'с долгим временем кэширования.'
+        )
+
+        response = client.get('/static/redoc.yaml')
+        assert 'Content-Encoding' not in response
+        assert b''.join(response.streaming_content) == content
+        assert response['Cache-Control'] == 'no-cache'
+        assert client.get('/static/redoc.yaml',
+                          HTTP_IF_NONE_MATCH=response['ETag']
+                          ).status_code == 304
+        assert client.get('/static/../manage.py').status_code == 404
+        assert client.get('/static/missing.yaml').status_code == 404
@@ -0,0 +1,35 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18Startup:
+
+    def test_01_profile_startup(self, tmp_path):
+        out = StringIO()
+        report_path = tmp_path / 'startup.json'
+        call_command('profile_startup', '--top', '5',
+                     '--json', str(report_path), stdout=out)
+        output = out.getvalue()
+        assert 'django_setup' in output and 'urlconf' in output
+        report = json.loads(report_path.read_text(encoding='utf-8'))
+        assert set(report['phases']) == {
+            'django_setup', 'wsgi_application', 'urlconf', 'total'
+        }
+        assert 'ready' in report['apps']['api'], (
+            'Проверьте, что команда `profile_startup` замеряет ready() '
+            'каждого приложения.'
+        )
+        modules = {name for name, _, _ in report['modules']}
+        assert {'django', 'api.startup', 'api.views'} <= modules, (
+            'Проверьте, что команда `profile_startup` разбирает вывод '
+            '`python -X importtime`.'
+        )
+        assert report['deferred_modules_at_setup'] == [], (
+            'Проверьте, что django.setup() не импортирует модули, нужные '
+            'только для обработки запросов.'
+        )
+        assert report['first_use_modules_at_urlconf'] == []
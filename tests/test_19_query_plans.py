@@ -0,0 +1,106 @@
+import re
+from io import StringIO
+from urllib.parse import quote
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+FULL_SCAN_RE = re.compile(r'^SCAN ')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+# Допустимые полные просмотры: списки без фильтра считают все строки
+# по самому узкому покрывающему индексу и читают страницу по индексу
+# сортировки, останавливаясь на LIMIT.
+ACCEPTED_FULL_SCANS = {
+    '/api/v1/titles/': {
+        'SCAN reviews_title USING COVERING INDEX '
+        'reviews_title_category_id_f88f4f1e',
+        'SCAN reviews_title USING INDEX title_name_idx',
+    },
+    '/api/v1/genres/': {
+        'SCAN reviews_genre USING COVERING INDEX '
+        'sqlite_autoindex_reviews_genre_1',
+        'SCAN reviews_genre USING INDEX genre_name_idx',
+    },
+    '/api/v1/categories/': {
+        'SCAN reviews_category USING COVERING INDEX '
+        'sqlite_autoindex_reviews_category_1',
+        'SCAN reviews_category USING INDEX category_name_idx',
+    },
+}
+
+
+def query_plans(client, url):
+    """Строки EXPLAIN QUERY PLAN всех SELECT-запросов эндпойнта."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    plans = []
+    with connection.cursor() as cursor:
+        for query in queries.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+            plans.append((query['sql'],
+                          [row[3] for row in cursor.fetchall()]))
+    return plans
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19QueryPlans:
+
+    def test_01_hot_paths_use_indexes(self, client, monkeypatch):
+        from api.cache import api_cache
+        from reviews.models import Category, Comment, Genre, Title
+
+        monkeypatch.setattr(api_cache, 'enabled', False)
+        call_command('generate_fake_data', '--users', '30', '--titles', '60',
+                     '--genres', '6', '--categories', '3', '--reviews', '300',
+                     '--comments', '100', '--seed', '1', stdout=StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone():
+                # Общий кэш базы в памяти хранит загруженную статистику,
+                # пока ее не перечитать явно.
+                cursor.execute('DELETE FROM sqlite_stat1')
+                cursor.execute('ANALYZE sqlite_master')
+        connection.close()
+
+        comment = Comment.objects.select_related('review').first()
+        title_id, review_id = comment.review.title_id, comment.review_id
+        ordered_urls = [
+            '/api/v1/titles/',
+            '/api/v1/titles/?year=2000',
+            f'/api/v1/titles/?name={quote(Title.objects.first().name)}',
+            f'/api/v1/titles/?category={Category.objects.first().slug}',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            '/api/v1/genres/',
+            '/api/v1/categories/',
+        ]
+        # Жанры из фильтра по жанру приходят через связующую таблицу,
+        # поэтому страница сортируется после соединения.
+        unordered_urls = [
+            f'/api/v1/titles/?genre={Genre.objects.first().slug}',
+        ]
+        for url in ordered_urls + unordered_urls:
+            for sql, plan in query_plans(client, url):
+                accepted = ACCEPTED_FULL_SCANS.get(url, set())
+                full_scans = [line for line in plan
+                              if FULL_SCAN_RE.match(line)
+                              and line not in accepted]
+                assert not full_scans, (
+                    f'Проверьте, что запрос эндпойнта `{url}` использует '
+                    f'индекс, а не полный просмотр таблицы: {full_scans} '
+                    f'в плане запроса {sql}'
+                )
+                paginated = url in ordered_urls and ' LIMIT ' in sql
+                assert not paginated or TEMP_SORT not in plan, (
+                    f'Проверьте, что запрос эндпойнта `{url}` получает '
+                    f'строки в нужном порядке из индекса, без сортировки: '
+                    f'{sql}'
+                )
@@ -0,0 +1,116 @@
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+
+METRIC_RE = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+def server_timing(response):
+    assert 'Server-Timing' in response, (
+        'Проверьте, что ответ содержит заголовок `Server-Timing`.'
+    )
+    return {name: (float(duration), queries)
+            for name, duration, queries in METRIC_RE.findall(
+                response['Server-Timing']
+            )}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ServerTiming:
+
+    def test_01_sync_metrics_and_log(self, client, settings, monkeypatch,
+                                     caplog):
+        from api.cache import api_cache
+
+        monkeypatch.setattr(api_cache, 'enabled', False)
+        settings.SERVER_TIMING = {'ENABLED': True, 'LOG': True,
+                                  'PUBLIC': True, 'TOKEN': '',
+                                  'HEADER': 'HTTP_X_SERVER_TIMING'}
+        with caplog.at_level(logging.INFO, logger='api.timing'):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        metrics = server_timing(response)
+        assert set(metrics) == {'db', 'view', 'render', 'total'}, (
+            'Проверьте, что в `Server-Timing` есть время работы с БД, '
+            'представления, рендеринга и всего запроса.'
+        )
+        assert int(metrics['db'][1]) == len(queries.captured_queries), (
+            'Проверьте, что в `Server-Timing` указано число SQL-запросов.'
+        )
+        assert metrics['view'][0] + metrics['render'][0] <= (
+            metrics['total'][0]
+        )
+        assert any('TitleViewSet.list' in record.getMessage()
+                   for record in caplog.records), (
+            'Проверьте, что замеры пишутся в лог с именем viewset '
+            'и действия.'
+        )
+
+        settings.SERVER_TIMING = {'ENABLED': False, 'LOG': False,
+                                  'PUBLIC': True, 'TOKEN': '',
+                                  'HEADER': 'HTTP_X_SERVER_TIMING'}
+        response = client.__class__().get('/api/v1/titles/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что при `SERVER_TIMING["ENABLED"] = False` '
+            'заголовок не добавляется.'
+        )
+
+    def test_02_async_views_count_queries(self, settings, monkeypatch):
+        from api.cache import api_cache
+
+        monkeypatch.setattr(api_cache, 'enabled', False)
+        settings.ROOT_URLCONF = 'api_yamdb.urls_asgi'
+
+        async def get():
+            return await AsyncClient().get('/api/v1/genres/')
+
+        response = async_to_sync(get)()
+        assert response.status_code == 200
+        metrics = server_timing(response)
+        assert int(metrics['db'][1]) >= 1, (
+            'Проверьте, что SQL-запросы асинхронных представлений, '
+            'выполняемые в потоках пула, учитываются в `Server-Timing`.'
+        )
+        assert 'render' in metrics
+
+    def test_03_private_header_for_admins_and_token(self, client,
+                                                    admin_client, settings,
+                                                    monkeypatch, caplog):
+        from api.cache import api_cache
+
+        monkeypatch.setattr(api_cache, 'enabled', False)
+        settings.SERVER_TIMING = {'ENABLED': True, 'LOG': True,
+                                  'PUBLIC': False, 'TOKEN': 'secret',
+                                  'HEADER': 'HTTP_X_SERVER_TIMING'}
+        with caplog.at_level(logging.INFO, logger='api.timing'):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что без `SERVER_TIMING["PUBLIC"]` заголовок '
+            '`Server-Timing` не отдается анонимным клиентам.'
+        )
+        assert any('TitleViewSet.list' in record.getMessage()
+                   for record in caplog.records), (
+            'Проверьте, что замеры пишутся в лог и без заголовка '
+            '`Server-Timing`.'
+        )
+        response = client.get('/api/v1/titles/',
+                              HTTP_X_SERVER_TIMING='wrong')
+        assert 'Server-Timing' not in response
+        response = client.get('/api/v1/titles/',
+                              HTTP_X_SERVER_TIMING='secret')
+        assert 'db' in server_timing(response), (
+            'Проверьте, что заголовок `Server-Timing` отдается запросам '
+            'с токеном `SERVER_TIMING["TOKEN"]`.'
+        )
+        response = admin_client.get('/api/v1/titles/')
+        assert 'db' in server_timing(response), (
+            'Проверьте, что заголовок `Server-Timing` отдается '
+            'администраторам.'
+        )
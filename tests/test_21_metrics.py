@@ -0,0 +1,104 @@
+import multiprocessing
+import re
+
+import pytest
+
+SAMPLE_RE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+
+def parse_metrics(text):
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        name, labels, value = SAMPLE_RE.match(line).groups()
+        samples[(name, labels or '')] = float(value)
+    return samples
+
+
+def increment_in_process(directory, amount):
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.METRICS = dict(settings.METRICS, DIR=directory)
+    from api.metrics import inc
+
+    for _ in range(amount):
+        inc('api_db_queries_total', route='other-process')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Metrics:
+
+    def test_01_routes_statuses_and_cache(self, client, settings, tmp_path):
+        settings.METRICS = dict(settings.METRICS, DIR=str(tmp_path))
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/unknown/')
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain'), (
+            'Проверьте, что `/metrics` отдает метрики в текстовом формате '
+            'Prometheus.'
+        )
+        samples = parse_metrics(response.content.decode())
+        route = 'method="GET",route="genres-list"'
+        assert samples[(
+            'api_requests_total', f'{route},status="200"'
+        )] == 2, (
+            'Проверьте, что запросы учитываются по имени маршрута '
+            '(basename и действие DRF) и статусу ответа.'
+        )
+        assert samples[(
+            'api_request_duration_seconds_bucket', f'{route},le="+Inf"'
+        )] == 2
+        assert samples[('api_request_duration_seconds_count', route)] == 2
+        assert samples[(
+            'api_requests_total',
+            'method="GET",route="unmatched",status="404"'
+        )] == 1
+        assert samples[(
+            'api_db_queries_total', 'route="genres-list"'
+        )] >= 1, 'Проверьте, что в метриках учитываются SQL-запросы.'
+        assert samples[(
+            'api_cache_hit_ratio', 'namespace="genres"'
+        )] == 0.5, 'Проверьте, что в метриках есть доля попаданий в кэш.'
+
+        settings.METRICS = dict(settings.METRICS, TOKEN='secret')
+        assert client.get('/metrics').status_code == 403
+        assert client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+        ).status_code == 200
+        assert client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secreT'
+        ).status_code == 403
+
+        settings.METRICS = dict(settings.METRICS, ENABLED=False)
+        assert client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+        ).status_code == 404, (
+            'Проверьте, что при выключенных метриках `/metrics` '
+            'отвечает 404.'
+        )
+
+    def test_02_aggregation_across_processes(self, settings, tmp_path):
+        from api.metrics import collect, inc
+
+        settings.METRICS = dict(settings.METRICS, DIR=str(tmp_path))
+        inc('api_db_queries_total', route='other-process')
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=increment_in_process,
+                                   args=(str(tmp_path), 1000))
+                   for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            assert worker.exitcode == 0
+        samples = collect()
+        assert samples['api_db_queries_total'][
+            (('route', 'other-process'),)
+        ] == 2001, (
+            'Проверьте, что метрики разных процессов суммируются.'
+        )
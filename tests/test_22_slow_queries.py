@@ -0,0 +1,120 @@
+import json
+import logging
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22SlowQueries:
+
+    def test_01_slow_queries_logged_with_plans(self, client, monkeypatch,
+                                               tmp_path):
+        from api.cache import api_cache
+        from api.slow_queries import SlowQueryFormatter, slow_query_log
+
+        monkeypatch.setattr(api_cache, 'enabled', False)
+        monkeypatch.setattr(slow_query_log, 'threshold', 0)
+        monkeypatch.setattr(slow_query_log, 'tokens', 1000)
+        log_file = tmp_path / 'slow.log'
+        handler = logging.FileHandler(log_file, encoding='utf-8')
+        handler.setFormatter(SlowQueryFormatter())
+        logger = logging.getLogger('api.slow_queries')
+        monkeypatch.setattr(logger, 'handlers', [handler])
+        monkeypatch.setattr(logger, 'propagate', False)
+        try:
+            response = client.get('/api/v1/titles/?year=2000')
+            client.get('/api/v1/titles/1/reviews/')
+        finally:
+            handler.close()
+        assert response.status_code == 200
+        records = [json.loads(line) for line in log_file.read_text(
+            encoding='utf-8'
+        ).splitlines()]
+        titles = [record for record in records
+                  if 'FROM "reviews_title"' in record['sql']]
+        assert titles, (
+            'Проверьте, что запросы дольше порога пишутся в журнал '
+            'медленных запросов.'
+        )
+        record = titles[0]
+        assert record['view'] == 'TitleViewSet.list', (
+            'Проверьте, что в журнале указано представление, выполнившее '
+            'запрос.'
+        )
+        assert '2000' in record['params']
+        assert any((record['caller'] or '').startswith('api/views.py:')
+                   for record in records), (
+            'Проверьте, что в журнале указано место вызова в коде '
+            'представлений, а не в обертках выполнения запросов.'
+        )
+        assert not any(record['caller'].startswith(('api/timing.py',
+                                                    'api/slow_queries.py'))
+                       for record in records if record['caller'])
+        assert record['duration_ms'] >= 0
+        assert any('reviews_title' in line for line in record['plan']), (
+            'Проверьте, что для SELECT в журнал пишется план запроса.'
+        )
+
+        out = StringIO()
+        call_command('slow_queries', '--file', str(log_file), '--plans',
+                     stdout=out)
+        report = out.getvalue()
+        assert 'TitleViewSet.list' in report
+        assert 'reviews_title' in report, (
+            'Проверьте, что команда `slow_queries` выводит запросы '
+            'из журнала.'
+        )
+
+    def test_02_rate_limit(self):
+        from api.slow_queries import SlowQueryLog
+
+        log = SlowQueryLog({'RATE': 0, 'BURST': 2})
+        allowed = [log.allow() for _ in range(5)]
+        assert allowed == [0, 0, None, None, None], (
+            'Проверьте, что число записей в журнал медленных запросов '
+            'ограничено.'
+        )
+        log.tokens = 1
+        assert log.allow() == 3, (
+            'Проверьте, что запись после ограничения сообщает число '
+            'пропущенных записей.'
+        )
+
+    def test_03_explain_in_transaction_uses_savepoint(self):
+        from django.db import connection, transaction
+        from django.test.utils import CaptureQueriesContext
+
+        from api.slow_queries import explain
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                plan = explain(connection, 'SELECT * FROM missing_table', ())
+            assert plan[0].startswith('EXPLAIN не выполнен'), plan
+            statements = [query['sql'] for query in queries]
+            assert any(sql.startswith('SAVEPOINT') for sql in statements)
+            assert any(sql.startswith('ROLLBACK TO SAVEPOINT')
+                       for sql in statements), (
+                'Проверьте, что EXPLAIN внутри транзакции выполняется '
+                'в точке сохранения и ошибка не прерывает транзакцию.'
+            )
+            assert connection.needs_rollback is False
+
+    def test_04_params_redacted(self, monkeypatch):
+        from django.db import connection
+
+        from api.slow_queries import SlowQueryLog
+
+        records = []
+        monkeypatch.setattr(
+            'api.slow_queries.logger.warning',
+            lambda *args, extra, **kwargs: records.append(extra['slow_query'])
+        )
+        log = SlowQueryLog({'PARAMS': False})
+        log.report('SELECT %s, %s', ['secret@example.com', 42], 1.0,
+                   {'connection': connection})
+        assert records[0]['params'] == ['str', 'int'], (
+            'Проверьте, что без `SLOW_QUERY_LOG_PARAMS` в журнал пишутся '
+            'только типы параметров, а не их значения.'
+        )
@@ -0,0 +1,80 @@
+import pstats
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Profiling:
+
+    def test_01_profile_by_admin_header(self, admin_client, token_admin,
+                                        token_moderator, settings,
+                                        tmp_path):
+        url = '/api/v1/titles/'
+        response = admin_client.get(url, HTTP_X_PROFILE='1')
+        assert 'X-Profile-Id' not in response, (
+            'Проверьте, что при выключенном профилировании запросы '
+            'не профилируются.'
+        )
+
+        settings.PROFILING = dict(settings.PROFILING, ENABLED=True,
+                                  DIR=str(tmp_path))
+        for token in (None, token_moderator['access']):
+            response = APIClient().get(
+                url, HTTP_X_PROFILE='1',
+                HTTP_AUTHORIZATION=f'Bearer {token}' if token else ''
+            )
+            assert 'X-Profile-Id' not in response, (
+                'Проверьте, что профилирование по заголовку доступно '
+                'только администратору.'
+            )
+        response = APIClient().get(
+            url, HTTP_X_PROFILE='1',
+            HTTP_AUTHORIZATION=f'Bearer {token_admin["access"]}'
+        )
+        assert response.status_code == 200
+        name = response.get('X-Profile-Id')
+        assert name and 'titles-list' in name, (
+            'Проверьте, что запрос администратора с заголовком `X-Profile` '
+            'профилируется, а имя профиля содержит маршрут.'
+        )
+        assert (tmp_path / f'{name}.prof').exists()
+
+        out = StringIO()
+        call_command('profiles', '--functions', '5', stdout=out)
+        assert name in out.getvalue(), (
+            'Проверьте, что команда `profiles` выводит сохраненные профили.'
+        )
+        out = StringIO()
+        call_command('profiles', '--show', name, stdout=out)
+        assert 'function calls' in out.getvalue()
+
+    def test_02_sampling_and_async_views(self, settings, tmp_path):
+        settings.PROFILING = dict(settings.PROFILING, ENABLED=True,
+                                  SAMPLE_RATE=1, DIR=str(tmp_path),
+                                  MAX_FILES=1)
+        settings.ROOT_URLCONF = 'api_yamdb.urls_asgi'
+
+        async def get(url):
+            return await AsyncClient().get(url)
+
+        for url in ('/api/v1/categories/', '/api/v1/genres/'):
+            response = async_to_sync(get)(url)
+            assert response.status_code == 200
+        name = response.get('X-Profile-Id')
+        assert name and 'genres-list' in name, (
+            'Проверьте, что запросы из выборки `SAMPLE_RATE` профилируются.'
+        )
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            f'{name}.json', f'{name}.prof'
+        ], 'Проверьте, что хранятся только последние `MAX_FILES` профилей.'
+        functions = pstats.Stats(str(tmp_path / f'{name}.prof')).stats
+        assert any(filename.endswith('views.py') and 'api' in filename
+                   for filename, _, _ in functions), (
+            'Проверьте, что в профиль асинхронного запроса попадает работа '
+            'представления в потоке пула.'
+        )
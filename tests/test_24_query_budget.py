@@ -0,0 +1,133 @@
+import logging
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+
+from tests.utils import check_query_budget
+
+
+def seed():
+    """Тестовые данные; произведение и отзыв с наибольшим числом детей."""
+    from reviews.models import Review, Title
+
+    call_command('generate_fake_data', '--users', '30', '--titles', '60',
+                 '--genres', '6', '--categories', '3', '--reviews', '400',
+                 '--comments', '400', '--seed', '1', stdout=StringIO())
+    title = Title.objects.annotate(
+        reviews_count=Count('reviews')
+    ).order_by('-reviews_count').first()
+    review = Review.objects.annotate(
+        comments_count=Count('comments')
+    ).order_by('-comments_count').first()
+    return title, review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24QueryBudget:
+
+    def test_01_read_budgets_independent_of_page_size(self, admin_client,
+                                                       monkeypatch):
+        from api.cache import api_cache
+        from api.query_budget import QUERY_BUDGETS
+        from api.urls import router_version_1
+
+        monkeypatch.setattr(api_cache, 'enabled', False)
+        for pattern in router_version_1.urls:
+            if 'get' in (getattr(pattern.callback, 'actions', None) or {}):
+                assert (pattern.name, 'GET') in QUERY_BUDGETS, (
+                    f'Задайте бюджет SQL-запросов для GET `{pattern.name}`.'
+                )
+        title, review = seed()
+        comment = review.comments.first()
+        reviews = f'/api/v1/titles/{review.title_id}/reviews/'
+        for url in ('/api/v1/titles/', '/api/v1/genres/',
+                    '/api/v1/categories/', '/api/v1/users/',
+                    f'/api/v1/titles/{title.id}/reviews/',
+                    f'{reviews}{review.id}/comments/'):
+            _, small = check_query_budget(admin_client, 'get',
+                                          f'{url}?limit=2')
+            response, large = check_query_budget(admin_client, 'get',
+                                                 f'{url}?limit=50')
+            assert len(response.json()['results']) > 2
+            assert small == large, (
+                f'Проверьте, что число SQL-запросов к `{url}` не зависит '
+                f'от размера страницы: {small} при limit=2 и {large} '
+                'при limit=50.'
+            )
+        for url in (f'/api/v1/titles/{title.id}/',
+                    f'{reviews}{review.id}/',
+                    f'{reviews}{review.id}/comments/{comment.id}/',
+                    '/api/v1/users/me/'):
+            check_query_budget(admin_client, 'get', url)
+
+    def test_02_write_budgets(self, admin_client, monkeypatch):
+        from api.cache import api_cache
+        from reviews.models import Category, Genre, Review
+        from users.models import CustomUser
+
+        monkeypatch.setattr(api_cache, 'enabled', False)
+        title, review = seed()
+        genres = list(Genre.objects.values_list('slug', flat=True))
+        response, _ = check_query_budget(admin_client, 'post',
+                                         '/api/v1/titles/', {
+                                             'name': 'Новое произведение',
+                                             'year': 2000,
+                                             'genre': genres,
+                                             'category': (
+                                                 Category.objects.first().slug
+                                             ),
+                                         })
+        new_title = response.json()['id']
+        check_query_budget(admin_client, 'patch',
+                           f'/api/v1/titles/{new_title}/',
+                           {'genre': genres[:1]})
+        response, _ = check_query_budget(
+            admin_client, 'post', f'/api/v1/titles/{new_title}/reviews/',
+            {'text': 'Отзыв', 'score': 5}
+        )
+        reviews = f'/api/v1/titles/{review.title_id}/reviews/'
+        check_query_budget(admin_client, 'post',
+                           f'{reviews}{review.id}/comments/',
+                           {'text': 'Комментарий'})
+        check_query_budget(admin_client, 'patch', f'{reviews}{review.id}/',
+                           {'text': 'Исправленный отзыв'})
+        check_query_budget(admin_client, 'delete', f'{reviews}{review.id}/')
+        check_query_budget(admin_client, 'delete',
+                           f'/api/v1/titles/{title.id}/')
+        check_query_budget(admin_client, 'delete',
+                           f'/api/v1/genres/{genres[0]}/')
+        category = Category.objects.first().slug
+        check_query_budget(admin_client, 'delete',
+                           f'/api/v1/categories/{category}/')
+        author = Review.objects.filter(
+            author__role=CustomUser.USER
+        ).first().author.username
+        check_query_budget(admin_client, 'patch',
+                           f'/api/v1/users/{author}/', {'bio': 'Биография'})
+        check_query_budget(admin_client, 'delete',
+                           f'/api/v1/users/{author}/')
+
+    def test_03_middleware_logs_or_raises(self, admin_client, settings,
+                                          monkeypatch, caplog):
+        from api.query_budget import QUERY_BUDGETS, QueryBudgetExceeded
+
+        monkeypatch.setitem(QUERY_BUDGETS, ('genres-list', 'GET'), 0)
+        settings.QUERY_BUDGET = {'ENABLED': True, 'RAISE': False}
+        with caplog.at_level(logging.WARNING, logger='api.query_budget'):
+            response = admin_client.get('/api/v1/genres/')
+        assert response.status_code == 200
+        assert any('genres-list' in record.getMessage()
+                   for record in caplog.records), (
+            'Проверьте, что `QueryBudgetMiddleware` пишет превышение '
+            'бюджета SQL-запросов в лог `api.query_budget`.'
+        )
+
+        settings.QUERY_BUDGET = {'ENABLED': True, 'RAISE': True}
+        client = type(admin_client)()
+        client.credentials(
+            HTTP_AUTHORIZATION=admin_client._credentials['HTTP_AUTHORIZATION']
+        )
+        with pytest.raises(QueryBudgetExceeded):
+            client.get('/api/v1/genres/')
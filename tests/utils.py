@@ -1,4 +1,9 @@
 from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
 
 
 check_name_and_slug_patterns = (
@@ -305,3 +310,30 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def check_query_budget(client, method, url, data=None):
+    """Запрос к эндпойнту с проверкой числа SQL-запросов по бюджету.
+
+    Возвращает ответ и число выполненных SQL-запросов.
+    """
+    from api.query_budget import query_budget
+
+    route = resolve(urlsplit(url).path).url_name
+    budget = query_budget(route, method.upper())
+    assert budget is not None, (
+        f'Задайте бюджет SQL-запросов для {method.upper()} `{route}` '
+        'в `api.query_budget.QUERY_BUDGETS`.'
+    )
+    kwargs = {} if data is None else {'data': data, 'format': 'json'}
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(url, **kwargs)
+    # Журнал запросов очищается в начале следующего запроса.
+    count = len(queries.captured_queries)
+    assert response.status_code < 400, (url, response.status_code)
+    assert count <= budget, (
+        f'Проверьте, что {method.upper()}-запрос к `{url}` выполняет '
+        f'не больше {budget} SQL-запросов (выполнено {count}): похоже, '
+        'связанные объекты загружаются по одному (N+1).'
+    )
+    return response, count